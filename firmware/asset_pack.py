@@ -0,0 +1,127 @@
+"""
+Reader for asset packs built by scripts/pack_assets.py
+The pack is opened once and its directory read into a dict, so any image,
+font or blob is found in O(1) and served by seeking within the one open file
+
+File layout (little-endian):
+    header     "<4sBBH"        magic b"APAK", version, reserved, entry count
+    directory  "<24sIIIHHHH"   per entry: NUL-padded UTF-8 name, offset,
+                               size, CRC-32, width, height, format, reserved
+    data       entries at offsets aligned to the packer's block size
+"""
+
+import struct
+
+try:
+    import binascii
+except ImportError:
+    import ubinascii as binascii
+
+import lcd
+from bitmap_font import BitmapFont
+from glyph_cache import DEFAULT_BUDGET, GlyphCache
+from rle_image import RLEImage
+
+MAGIC = b"APAK"
+VERSION = 1
+HEADER = "<4sBBH"
+HEADER_SIZE = 8
+ENTRY = "<24sIIIHHHH"
+ENTRY_SIZE = 44
+
+# Entry formats
+FORMAT_RAW = 0
+FORMAT_RGB565 = 1  # Little-endian, as convert_image_to_rgb565.py writes by default
+FORMAT_RGB565_BE = 2  # Panel byte order
+FORMAT_RLE = 3  # rle_image.RLEImage
+FORMAT_FONT = 4  # bitmap_font.BitmapFont
+
+# Bytes read per chunk when streaming RGB565 entries or checking CRCs
+STREAM_BYTES = 4 * 1024
+
+
+class AssetPack:
+    """Named assets served from one open pack file"""
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        magic, version, _, count = struct.unpack(HEADER, self._file.read(HEADER_SIZE))
+        if magic != MAGIC or version != VERSION:
+            self._file.close()
+            raise ValueError("not an asset pack: " + path)
+        directory = self._file.read(count * ENTRY_SIZE)
+        # name -> (offset, size, crc, width, height, format)
+        self._entries = {}
+        for i in range(count):
+            entry = struct.unpack_from(ENTRY, directory, i * ENTRY_SIZE)
+            self._entries[entry[0].split(b"\0")[0].decode()] = entry[1:7]
+        self._buffer = None
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def names(self):
+        return list(self._entries)
+
+    def info(self, name):
+        """(format, width, height, size) of an entry; KeyError if missing"""
+        offset, size, crc, width, height, fmt = self._entries[name]
+        return fmt, width, height, size
+
+    def _stream_buffer(self, min_bytes):
+        if self._buffer is None or len(self._buffer) < min_bytes:
+            self._buffer = lcd.alloc_chunk(max(STREAM_BYTES, min_bytes) // 2, (min_bytes + 1) // 2)
+        return self._buffer
+
+    def read(self, name):
+        """Whole entry as bytes (small assets: icons, palettes, configs)"""
+        offset, size = self._entries[name][:2]
+        self._file.seek(offset)
+        return self._file.read(size)
+
+    def verify(self, name):
+        """True when the entry's bytes match the CRC-32 recorded by the packer"""
+        offset, size, crc = self._entries[name][:3]
+        buf = self._stream_buffer(1)
+        view = memoryview(buf)
+        self._file.seek(offset)
+        value = 0
+        left = size
+        while left:
+            got = self._file.readinto(view[:min(left, len(buf))])
+            if not got:
+                return False
+            value = binascii.crc32(view[:got], value)
+            left -= got
+        return value & 0xFFFFFFFF == crc
+
+    def image(self, name):
+        """RLEImage reading from the pack's file"""
+        return RLEImage(self._file, self._entries[name][0])
+
+    def font(self, name, max_bytes=DEFAULT_BUDGET):
+        """GlyphCache over a packed bitmap font, for Backend.text(font=...)"""
+        return GlyphCache(BitmapFont(self._file, self._entries[name][0]), max_bytes)
+
+    def draw(self, name, panel, x=0, y=0):
+        """Stream an RGB565 or RLE image entry to the panel at (x, y)"""
+        offset, size, crc, width, height, fmt = self._entries[name]
+        if fmt == FORMAT_RLE:
+            self.image(name).draw(panel, x, y)
+        elif fmt in (FORMAT_RGB565, FORMAT_RGB565_BE):
+            self._file.seek(offset)
+            lcd.stream_rgb565(panel, self._file, x, y, width, height,
+                              self._stream_buffer(width * 2), fmt == FORMAT_RGB565)
+        else:
+            raise ValueError("not an image: " + name)
+
+    def close(self):
+        self._file.close()
+
+
+def load_pack(path):
+    """AssetPack for the file at path, or None when it isn't on the device"""
+    try:
+        return AssetPack(path)
+    except OSError:
+        return None
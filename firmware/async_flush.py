@@ -0,0 +1,169 @@
+"""
+Double-buffered background flush for framebuffer displays
+show() copies the dirty regions into one of two small staging buffers and
+returns; the main loop pumps them to the panel between its other work (or a
+_thread worker streams them, where SPI.write lets other threads run)
+"""
+
+try:
+    import _thread
+except ImportError:  # Ports built without threads use CooperativeFlusher
+    _thread = None
+
+# Bytes per staging buffer; two are allocated. A steady monitor tick changes
+# about 7 KB and fits in one; a full redraw (64.8 KB) goes out in several
+# batches and is paced by the bus
+STAGING_BYTES = 8 * 1024
+
+
+class _Staging:
+    """Copies framebuffer regions into alternating staging buffers.
+
+    Regions are packed row after row, so each one reaches the panel as a
+    single window and a single write. Regions that do not fit the space
+    left are split by rows across batches.
+    """
+
+    def __init__(self, panel, buffer_bytes):
+        self.panel = panel
+        self._buffers = (bytearray(buffer_bytes), bytearray(buffer_bytes))
+        self._back = 0
+
+    def submit(self, framebuffer, width, rects):
+        """Queue framebuffer regions ([x0, y0, x1, y1], exclusive ends) for the panel.
+
+        Returns once they are copied out, so the caller may draw again;
+        blocks only while both staging buffers are still being sent.
+        """
+        fb = memoryview(framebuffer)
+        stride = width * 2
+        buf = memoryview(self._buffers[self._back])
+        used = 0
+        job = []
+        for x0, y0, x1, y1 in rects:
+            span = (x1 - x0) * 2
+            y = y0
+            while y < y1:
+                rows = min(y1 - y, (len(buf) - used) // span)
+                if rows == 0:
+                    self._dispatch(job)
+                    buf = memoryview(self._buffers[self._back])
+                    used = 0
+                    job = []
+                    continue
+                start = used
+                src = y * stride + x0 * 2
+                for _ in range(rows):
+                    buf[used:used + span] = fb[src:src + span]
+                    used += span
+                    src += stride
+                job.append((x0, y, x1 - x0, rows, start, used))
+                y += rows
+        if job:
+            self._dispatch(job)
+
+    def _send(self, buf, region):
+        x, y, w, h, start, end = region
+        self.panel.set_window(x, y, w, h)
+        self.panel.transport.write_data(buf[start:end])
+
+
+class ThreadedFlusher(_Staging):
+    """Sends staged batches from a background thread.
+
+    Only the worker touches the SPI bus while a batch is in flight; call
+    wait() before sending panel commands from the main loop.
+
+    This only overlaps the transfer with drawing if machine.SPI.write()
+    releases the GIL while it runs. The ESP32 port is not known to do so
+    (not yet measured on the device), in which case the main loop stalls
+    for the whole transfer just as without a flusher. On the host the
+    mock bus sleeps, which does release it, so bench_flush overstates
+    this class; make_flusher() only picks it when asked.
+    """
+
+    def __init__(self, panel, buffer_bytes=STAGING_BYTES):
+        super().__init__(panel, buffer_bytes)
+        self._job = None
+        self._pending = _thread.allocate_lock()
+        self._pending.acquire()  # Released when a batch is ready
+        self._idle = _thread.allocate_lock()  # Held while a batch is in flight
+        _thread.start_new_thread(self._run, ())
+
+    def _dispatch(self, job):
+        self._idle.acquire()  # The other buffer's batch has been sent
+        self._job = (memoryview(self._buffers[self._back]), job)
+        self._pending.release()
+        self._back ^= 1
+
+    def _run(self):
+        while True:
+            self._pending.acquire()
+            buf, job = self._job
+            try:
+                for region in job:
+                    self._send(buf, region)
+            except Exception as e:
+                print(f"Flush failed: {e}")
+            finally:
+                self._job = None
+                self._idle.release()
+
+    @property
+    def busy(self):
+        return self._idle.locked()
+
+    def wait(self):
+        """Block until everything submitted has reached the panel"""
+        self._idle.acquire()
+        self._idle.release()
+
+
+class CooperativeFlusher(_Staging):
+    """Sends staged batches one region per pump() call.
+
+    Call pump() from the main loop, or run run() as a uasyncio task; a
+    new batch waits for the previous one by pumping it to completion.
+    """
+
+    def __init__(self, panel, buffer_bytes=STAGING_BYTES):
+        super().__init__(panel, buffer_bytes)
+        self._buf = None
+        self._job = []
+
+    def _dispatch(self, job):
+        self.wait()
+        self._buf = memoryview(self._buffers[self._back])
+        self._job = job
+        self._back ^= 1
+
+    def pump(self):
+        """Send the next staged region; returns True while more remain"""
+        if self._job:
+            self._send(self._buf, self._job.pop(0))
+        return bool(self._job)
+
+    @property
+    def busy(self):
+        return bool(self._job)
+
+    def wait(self):
+        """Block until everything submitted has reached the panel"""
+        while self.pump():
+            pass
+
+    async def run(self, asyncio):
+        """Pump forever, yielding to other tasks between regions"""
+        while True:
+            await asyncio.sleep(0 if self.pump() else 0.001)
+
+
+def make_flusher(panel, buffer_bytes=STAGING_BYTES, threaded=False):
+    """Flusher for panel: cooperative unless threaded is set and the port has _thread.
+
+    The cooperative flusher must be pumped (FramebufferBackend.pump()) from
+    the main loop; see ThreadedFlusher for why it is not the default.
+    """
+    if threaded and _thread is not None:
+        return ThreadedFlusher(panel, buffer_bytes)
+    return CooperativeFlusher(panel, buffer_bytes)
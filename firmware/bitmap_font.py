@@ -0,0 +1,90 @@
+"""
+Lazy loader for packed bitmap font files built by scripts/build_font.py
+Only the header and the 8-byte-per-glyph index are held in RAM; glyph rows
+are read from flash on demand, and rendered glyphs are kept by GlyphCache
+
+File layout (little-endian):
+    header  "<4sBBBBHH"  magic b"MFNT", version, height, baseline, reserved,
+                         glyph count, default code point
+    index   "<HBBI"      code point, width, advance, offset of the rows from
+                         the start of the font; one entry per glyph, sorted
+                         by code point
+    rows    height rows of ceil(width / 8) bytes each, most significant bit
+            leftmost
+"""
+
+import struct
+
+from glyph_cache import DEFAULT_BUDGET, GlyphCache
+
+MAGIC = b"MFNT"
+VERSION = 1
+HEADER = "<4sBBBBHH"
+HEADER_SIZE = 12
+ENTRY = "<HBBI"
+ENTRY_SIZE = 8
+
+
+class BitmapFont:
+    """Proportional 1bpp font read glyph by glyph from a font file.
+
+    source is a path, or an open file (e.g. an AssetPack's) holding the
+    font at offset; a file passed in is shared and left open by close().
+    """
+
+    def __init__(self, source, offset=0):
+        self._owned = isinstance(source, str)
+        self._file = open(source, "rb") if self._owned else source
+        self._base = offset
+        self._file.seek(offset)
+        magic, version, self.height, self.baseline, _, self._count, self._default = \
+            struct.unpack(HEADER, self._file.read(HEADER_SIZE))
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError("not a font file: " + (source if self._owned else str(offset)))
+        self._index = self._file.read(self._count * ENTRY_SIZE)
+
+    def _find(self, codepoint):
+        """Index entry of codepoint by binary search, or None"""
+        index = self._index
+        low = 0
+        high = self._count - 1
+        while low <= high:
+            mid = (low + high) >> 1
+            entry = struct.unpack_from(ENTRY, index, mid * ENTRY_SIZE)
+            if entry[0] == codepoint:
+                return entry
+            if entry[0] < codepoint:
+                low = mid + 1
+            else:
+                high = mid - 1
+        return None
+
+    def glyph(self, char):
+        """(width, advance, rows) of char, rows as integers of width bits"""
+        entry = self._find(ord(char)) or self._find(self._default)
+        if entry is None:
+            return 0, 0, ()
+        _, width, advance, offset = entry
+        row_bytes = (width + 7) >> 3
+        if not row_bytes:
+            return width, advance, (0,) * self.height
+        self._file.seek(self._base + offset)
+        data = self._file.read(row_bytes * self.height)
+        shift = row_bytes * 8 - width
+        rows = []
+        for start in range(0, len(data), row_bytes):
+            rows.append(int.from_bytes(data[start:start + row_bytes], "big") >> shift)
+        return width, advance, rows
+
+    def close(self):
+        if self._owned:
+            self._file.close()
+
+
+def load_font(path, max_bytes=DEFAULT_BUDGET):
+    """GlyphCache over the font file at path, or None when it isn't on the device"""
+    try:
+        return GlyphCache(BitmapFont(path), max_bytes)
+    except OSError:
+        return None
@@ -1,28 +1,22 @@
 # Claude Monitor - Framebuffer Version (Maximum Performance)
 import time
 import gc
-from machine import Pin, SPI, I2C, PWM
+from machine import Pin, PWM
+import lcd
+from lcd import FONT_5X7, FramebufferBackend
+from async_flush import make_flusher
+from bitmap_font import load_font
+from widgets import ACTIVITY_ICONS, Bar, Icon, Label, ProgressBar, Screen
 
 print("Claude Monitor Framebuffer v1.0")
 
-class FramebufferDisplay:
+# Optional larger clock font (scripts/build_font.py); the 5x7 font is used without it
+CLOCK_FONT = "clock.fnt"
+
+class FramebufferDisplay(FramebufferBackend):
     def __init__(self):
         # AXP192 setup
-        self.i2c = I2C(0, scl=Pin(22), sda=Pin(21), freq=400000)
-        self.i2c.writeto_mem(0x34, 0x12, bytes([0xFF]))
-        self.i2c.writeto_mem(0x34, 0x96, bytes([0x84]))
-        self.i2c.writeto_mem(0x34, 0x95, bytes([0x02]))
-        time.sleep_ms(200)
-        
-        # High-speed SPI setup (compatible with M5StickC PLUS)
-        self.spi = SPI(1, baudrate=26000000, sck=Pin(13), mosi=Pin(15))
-        self.reset = Pin(18, Pin.OUT, value=1)
-        self.cs = Pin(5, Pin.OUT, value=1)
-        self.dc = Pin(23, Pin.OUT, value=0)
-        
-        # Display dimensions
-        self.width = 135
-        self.height = 240
+        self.i2c = lcd.power_on()
         
         # Colors (RGB565 format)
         self.WHITE = 0xFFFF
@@ -34,57 +28,11 @@ class FramebufferDisplay:
         self.CYAN = 0x07FF
         self.MAGENTA = 0xF81F
         
-        # Create framebuffer (135 x 240 pixels, 2 bytes per pixel)
-        self.framebuffer = bytearray(self.width * self.height * 2)
-        
-        # 5x7 Font definition
-        self.FONT_5X7 = {
-            'A': [0b01110, 0b10001, 0b10001, 0b11111, 0b10001, 0b10001, 0b10001],
-            'B': [0b11110, 0b10001, 0b10001, 0b11110, 0b10001, 0b10001, 0b11110],
-            'C': [0b01111, 0b10000, 0b10000, 0b10000, 0b10000, 0b10000, 0b01111],
-            'D': [0b11110, 0b10001, 0b10001, 0b10001, 0b10001, 0b10001, 0b11110],
-            'E': [0b11111, 0b10000, 0b10000, 0b11110, 0b10000, 0b10000, 0b11111],
-            'F': [0b11111, 0b10000, 0b10000, 0b11110, 0b10000, 0b10000, 0b10000],
-            'G': [0b01111, 0b10000, 0b10000, 0b10011, 0b10001, 0b10001, 0b01111],
-            'H': [0b10001, 0b10001, 0b10001, 0b11111, 0b10001, 0b10001, 0b10001],
-            'I': [0b01110, 0b00100, 0b00100, 0b00100, 0b00100, 0b00100, 0b01110],
-            'J': [0b00111, 0b00001, 0b00001, 0b00001, 0b00001, 0b10001, 0b01110],
-            'K': [0b10001, 0b10010, 0b10100, 0b11000, 0b10100, 0b10010, 0b10001],
-            'L': [0b10000, 0b10000, 0b10000, 0b10000, 0b10000, 0b10000, 0b11111],
-            'M': [0b10001, 0b11011, 0b10101, 0b10101, 0b10001, 0b10001, 0b10001],
-            'N': [0b10001, 0b11001, 0b10101, 0b10101, 0b10011, 0b10001, 0b10001],
-            'O': [0b01110, 0b10001, 0b10001, 0b10001, 0b10001, 0b10001, 0b01110],
-            'P': [0b11110, 0b10001, 0b10001, 0b11110, 0b10000, 0b10000, 0b10000],
-            'Q': [0b01110, 0b10001, 0b10001, 0b10001, 0b10101, 0b10010, 0b01101],
-            'R': [0b11110, 0b10001, 0b10001, 0b11110, 0b10100, 0b10010, 0b10001],
-            'S': [0b01111, 0b10000, 0b10000, 0b01110, 0b00001, 0b00001, 0b11110],
-            'T': [0b11111, 0b00100, 0b00100, 0b00100, 0b00100, 0b00100, 0b00100],
-            'U': [0b10001, 0b10001, 0b10001, 0b10001, 0b10001, 0b10001, 0b01110],
-            'V': [0b10001, 0b10001, 0b10001, 0b10001, 0b10001, 0b01010, 0b00100],
-            'W': [0b10001, 0b10001, 0b10001, 0b10101, 0b10101, 0b11011, 0b10001],
-            'X': [0b10001, 0b10001, 0b01010, 0b00100, 0b01010, 0b10001, 0b10001],
-            'Y': [0b10001, 0b10001, 0b01010, 0b00100, 0b00100, 0b00100, 0b00100],
-            'Z': [0b11111, 0b00001, 0b00010, 0b00100, 0b01000, 0b10000, 0b11111],
-            '0': [0b01110, 0b10001, 0b10011, 0b10101, 0b11001, 0b10001, 0b01110],
-            '1': [0b00100, 0b01100, 0b00100, 0b00100, 0b00100, 0b00100, 0b01110],
-            '2': [0b01110, 0b10001, 0b00001, 0b00110, 0b01000, 0b10000, 0b11111],
-            '3': [0b11111, 0b00001, 0b00010, 0b00110, 0b00001, 0b10001, 0b01110],
-            '4': [0b00010, 0b00110, 0b01010, 0b10010, 0b11111, 0b00010, 0b00010],
-            '5': [0b11111, 0b10000, 0b11110, 0b00001, 0b00001, 0b10001, 0b01110],
-            '6': [0b00110, 0b01000, 0b10000, 0b11110, 0b10001, 0b10001, 0b01110],
-            '7': [0b11111, 0b00001, 0b00010, 0b00100, 0b01000, 0b10000, 0b10000],
-            '8': [0b01110, 0b10001, 0b10001, 0b01110, 0b10001, 0b10001, 0b01110],
-            '9': [0b01110, 0b10001, 0b10001, 0b01111, 0b00001, 0b00010, 0b01100],
-            ':': [0b00000, 0b01100, 0b01100, 0b00000, 0b01100, 0b01100, 0b00000],
-            '$': [0b00100, 0b01111, 0b10100, 0b01110, 0b00101, 0b11110, 0b00100],
-            ' ': [0b00000, 0b00000, 0b00000, 0b00000, 0b00000, 0b00000, 0b00000],
-            '.': [0b00000, 0b00000, 0b00000, 0b00000, 0b00000, 0b11000, 0b11000],
-            '-': [0b00000, 0b00000, 0b00000, 0b11111, 0b00000, 0b00000, 0b00000],
-            '/': [0b00000, 0b00001, 0b00010, 0b00100, 0b01000, 0b10000, 0b00000],
-            '!': [0b01110, 0b10001, 0b10101, 0b10001, 0b10001, 0b10001, 0b01110],  # Clock icon
-        }
-        
-        self._init_display()
+        # ST7789 with a full framebuffer; glyphs are rendered once and reused across frames,
+        # and show() returns while the main loop pumps the changed regions to the panel
+        panel = lcd.m5stick_panel()
+        super().__init__(panel, FONT_5X7, make_flusher(panel))
+        self.status_screen = self._build_status_screen()
         
         # Initialize buzzer for alerts (M5StickC PLUS buzzer on GPIO2)
         try:
@@ -103,189 +51,76 @@ class FramebufferDisplay:
         
         print("Framebuffer display initialized")
     
-    def _cmd(self, c):
-        """Send command"""
-        self.cs.value(0)
-        self.dc.value(0)
-        self.spi.write(bytearray([c]))
-        self.cs.value(1)
-    
-    def _data(self, d):
-        """Send data"""
-        self.cs.value(0)
-        self.dc.value(1)
-        if isinstance(d, int):
-            self.spi.write(bytearray([d]))
+    def _build_status_screen(self):
+        """Widget layout of the status screen"""
+        # Larger clock digits when a bitmap font was deployed
+        clock_font = load_font(CLOCK_FONT)
+        if clock_font is None:
+            clock = Label(25, 25, 85, 15, self.CYAN, 0x2104, key="clock", pad_x=15, pad_y=5)  # Dark blue
         else:
-            self.spi.write(d)
-        self.cs.value(1)
-    
-    def _init_display(self):
-        """Initialize display"""
-        self.reset.value(0)
-        time.sleep_ms(10)
-        self.reset.value(1)
-        time.sleep_ms(100)
-        
-        self._cmd(0x01)  # SWRESET
-        time.sleep_ms(120)
-        self._cmd(0x11)  # SLPOUT
-        time.sleep_ms(120)
-        self._cmd(0x36)
-        self._data(0x00)  # Memory access control
-        self._cmd(0x3A)
-        self._data(0x05)  # RGB565
-        self._cmd(0x21)   # Invert display
-        self._cmd(0x13)   # Normal display mode
-        self._cmd(0x29)   # Display on
-        time.sleep_ms(20)
-    
-    def clear_framebuffer(self, color=None):
-        """Clear framebuffer to specific color"""
-        if color is None:
-            color = self.BLACK
-        
-        # Fill framebuffer with color
-        color_high = (color >> 8) & 0xFF
-        color_low = color & 0xFF
-        
-        for i in range(0, len(self.framebuffer), 2):
-            self.framebuffer[i] = color_high
-            self.framebuffer[i + 1] = color_low
-    
-    def set_pixel(self, x, y, color):
-        """Set pixel in framebuffer"""
-        if 0 <= x < self.width and 0 <= y < self.height:
-            idx = (y * self.width + x) * 2
-            self.framebuffer[idx] = (color >> 8) & 0xFF
-            self.framebuffer[idx + 1] = color & 0xFF
-    
-    def draw_char_to_framebuffer(self, x, y, char, color, bg_color=None):
-        """Draw character directly to framebuffer"""
-        if char not in self.FONT_5X7:
-            char = ' '
-        
-        bitmap = self.FONT_5X7[char]
-        
-        for row in range(7):
-            for col in range(5):
-                pixel_x = x + col
-                pixel_y = y + row
-                
-                if (bitmap[row] >> (4-col)) & 1:
-                    # Foreground pixel
-                    self.set_pixel(pixel_x, pixel_y, color)
-                elif bg_color is not None:
-                    # Background pixel
-                    self.set_pixel(pixel_x, pixel_y, bg_color)
-    
-    def draw_text_to_framebuffer(self, x, y, text, color, bg_color=None):
-        """Draw text string to framebuffer"""
-        char_x = x
-        for char in text.upper():
-            self.draw_char_to_framebuffer(char_x, y, char, color, bg_color)
-            char_x += 6
-    
-    def fill_rect_to_framebuffer(self, x, y, w, h, color):
-        """Fill rectangle in framebuffer"""
-        for py in range(y, min(y + h, self.height)):
-            for px in range(x, min(x + w, self.width)):
-                self.set_pixel(px, py, color)
-    
-    def display_framebuffer(self):
-        """Transfer entire framebuffer to display in one operation"""
-        # Set full screen window with M5StickC PLUS offsets
-        self._cmd(0x2A)  # Column address set
-        self._data((52) >> 8)  # X start high
-        self._data((52) & 0xFF)  # X start low
-        self._data((52 + self.width - 1) >> 8)  # X end high
-        self._data((52 + self.width - 1) & 0xFF)  # X end low
-        
-        self._cmd(0x2B)  # Row address set
-        self._data((40) >> 8)  # Y start high
-        self._data((40) & 0xFF)  # Y start low
-        self._data((40 + self.height - 1) >> 8)  # Y end high
-        self._data((40 + self.height - 1) & 0xFF)  # Y end low
-        
-        self._cmd(0x2C)  # Memory write
-        
-        # Transfer entire framebuffer in one SPI transaction
-        self.cs.value(0)
-        self.dc.value(1)
-        self.spi.write(self.framebuffer)
-        self.cs.value(1)
+            clock = Label(25, 25, 85, 15, self.CYAN, 0x2104, key="clock", font=clock_font,
+                          pad_x=max(0, 85 - clock_font.text_width("00:00")) // 2,
+                          pad_y=max(0, 15 - clock_font.height) // 2)
+        
+        return Screen([
+            # Blue header bar with activity indicator
+            Label(0, 0, self.width, 20, self.WHITE, self.BLUE, value="CLAUDE PRO SESSION", pad_x=15, pad_y=5),
+            Icon(5, 6, ACTIVITY_ICONS, self.BLUE, key="activity"),
+            # Real-time clock with background
+            clock,
+            # Session time with subtle background
+            Label(2, 48, 131, 12, self.WHITE, 0x1082, key="session", pad_x=3, pad_y=2),  # Very dark blue
+            # Status with background (colors follow the status)
+            Label(2, 68, 131, 12, self.WHITE, 0x4208, key="status", pad_x=3, pad_y=2),
+            # Session statistics with clean layout
+            Label(5, 90, 90, 7, self.YELLOW, self.BLACK, key="commands"),
+            Label(5, 110, 90, 7, self.MAGENTA, self.BLACK, key="files"),
+            # Productivity with progress bar
+            Label(5, 130, 78, 7, self.WHITE, self.BLACK, value="PRODUCTIVITY:"),
+            ProgressBar(5, 142, 115, 6, 0x2104, key="productivity"),
+            Label(122, 140, self.width - 122, 7, self.WHITE, self.BLACK, key="percent"),
+            # Alerts with styled background
+            Label(2, 155, 131, 12, self.WHITE, 0x0320, key="alerts", pad_x=3, pad_y=2),
+            # Model and performance info
+            Label(5, 175, 90, 7, self.CYAN, self.BLACK, value="MODEL: SONNET-4"),
+            Label(5, 190, 96, 7, self.GREEN, self.BLACK, value="FRAMEBUFFER MODE"),
+            # Gray footer bar with live token count
+            Bar(0, 205, self.width, 35, value=0x4208),
+            Label(5, 212, 125, 7, self.WHITE, 0x4208, key="tokens"),
+            Label(5, 227, 126, 7, self.CYAN, 0x4208, value="PRESS A: WAKE DISPLAY"),
+        ], self.BLACK)
     
     def render_status_screen(self, session_seconds, status, alerts, current_time):
-        """Render stylish status screen to framebuffer"""
-        # Clear framebuffer
-        self.clear_framebuffer(self.BLACK)
-        
-        # Blue header bar
-        self.fill_rect_to_framebuffer(0, 0, self.width, 20, self.BLUE)
-        self.draw_text_to_framebuffer(15, 5, "CLAUDE PRO SESSION", self.WHITE, self.BLUE)
-        
-        # Real-time clock with background
-        hours = current_time[3]
-        minutes = current_time[4]
-        clock_str = f"{hours:02d}:{minutes:02d}"
-        self.fill_rect_to_framebuffer(25, 25, 85, 15, 0x2104)  # Dark blue
-        self.draw_text_to_framebuffer(40, 30, clock_str, self.CYAN, 0x2104)
-        
-        # Session time with subtle background
+        """Render stylish status screen to framebuffer (only changed widgets are redrawn)"""
         session_hours = session_seconds // 3600
         session_mins = (session_seconds % 3600) // 60
         session_secs = session_seconds % 60
-        time_str = f"SESSION: {session_hours:02d}H{session_mins:02d}M{session_secs:02d}S"
-        self.fill_rect_to_framebuffer(2, 48, 131, 12, 0x1082)  # Very dark blue
-        self.draw_text_to_framebuffer(5, 50, time_str, self.WHITE, 0x1082)
         
-        # Status with background
-        status_color = self.GREEN if status == "active" else self.WHITE
-        status_bg = 0x0320 if status == "active" else 0x4208  # Green or gray
-        status_text = "STATUS: CODING" if status == "active" else "STATUS: IDLE"
-        self.fill_rect_to_framebuffer(2, 68, 131, 12, status_bg)
-        self.draw_text_to_framebuffer(5, 70, status_text, self.WHITE, status_bg)
+        active = status == "active"
+        status_bg = 0x0320 if active else 0x4208  # Green or gray
         
-        # Session statistics with clean layout
         commands_run = (session_seconds // 30) + 1  # Simulate commands
         files_edited = (session_seconds // 45) + 1  # Simulate file edits
-        
-        self.draw_text_to_framebuffer(5, 90, f"COMMANDS: {commands_run:03d}", self.YELLOW, self.BLACK)
-        self.draw_text_to_framebuffer(5, 110, f"FILES: {files_edited:02d}", self.MAGENTA, self.BLACK)
-        
-        # Productivity with progress bar
         productivity = min(100, (session_seconds // 2) + 20)  # Steady increase
-        self.draw_text_to_framebuffer(5, 130, "PRODUCTIVITY:", self.WHITE, self.BLACK)
-        
-        # Progress bar
-        bar_width = int(productivity * 1.15)  # Scale to fit
-        self.fill_rect_to_framebuffer(5, 142, 115, 6, 0x2104)  # Background
-        bar_color = self.GREEN if productivity > 75 else self.YELLOW
-        self.fill_rect_to_framebuffer(5, 142, bar_width, 6, bar_color)
-        self.draw_text_to_framebuffer(122, 140, f"{productivity}%", self.WHITE, self.BLACK)
+        tokens_used = session_seconds * 15  # Simulate token usage
         
-        # Alerts with styled background
         if alerts > 0:
-            self.fill_rect_to_framebuffer(2, 155, 131, 12, 0x6000)  # Dark red
-            alert_str = f"ALERTS: {alerts}"
-            self.draw_text_to_framebuffer(5, 157, alert_str, self.WHITE, 0x6000)
+            alert_value = (f"ALERTS: {alerts}", self.WHITE, 0x6000)  # Dark red
         else:
-            self.fill_rect_to_framebuffer(2, 155, 131, 12, 0x0320)  # Dark green
-            self.draw_text_to_framebuffer(5, 157, "ALERTS: NONE", self.WHITE, 0x0320)
-        
-        # Model and performance info
-        self.draw_text_to_framebuffer(5, 175, "MODEL: SONNET-4", self.CYAN, self.BLACK)
-        self.draw_text_to_framebuffer(5, 190, "FRAMEBUFFER MODE", self.GREEN, self.BLACK)
-        
-        # Gray footer bar
-        self.fill_rect_to_framebuffer(0, 205, self.width, 35, 0x4208)  # Gray
-        
-        # Live token count in footer
-        tokens_used = session_seconds * 15  # Simulate token usage
-        self.draw_text_to_framebuffer(5, 212, f"TOKENS: {tokens_used:,}", self.WHITE, 0x4208)
-        
-        # Footer info (no button instructions needed)
-        self.draw_text_to_framebuffer(5, 227, "PRESS A: WAKE DISPLAY", self.CYAN, 0x4208)
+            alert_value = ("ALERTS: NONE", self.WHITE, 0x0320)  # Dark green
+        
+        return self.status_screen.render(self, {
+            "activity": ("active" if active else "idle", self.GREEN if active else self.WHITE),
+            "clock": f"{current_time[3]:02d}:{current_time[4]:02d}",
+            "session": f"SESSION: {session_hours:02d}H{session_mins:02d}M{session_secs:02d}S",
+            "status": ("STATUS: CODING" if active else "STATUS: IDLE", self.WHITE, status_bg),
+            "commands": f"COMMANDS: {commands_run:03d}",
+            "files": f"FILES: {files_edited:02d}",
+            "productivity": (productivity, self.GREEN if productivity > 75 else self.YELLOW),
+            "percent": f"{productivity}%",
+            "alerts": alert_value,
+            "tokens": f"TOKENS: {tokens_used:,}",
+        })
     
     def beep_alert(self, frequency=800, duration_ms=200):
         """Play alert beep"""
@@ -321,18 +156,20 @@ class FramebufferDisplay:
     def turn_off_display(self):
         """Turn off display to save power"""
         if self.display_on:
-            self._cmd(0x28)  # Display off
+            self.wait()  # Let the last frame finish before sending panel commands
+            self.panel.display_on(False)
             # Turn off backlight via AXP192
-            self.i2c.writeto_mem(0x34, 0x95, bytes([0x00]))  # Backlight off
+            lcd.set_backlight(self.i2c, False)
             self.display_on = False
             print("Display turned off")
     
     def turn_on_display(self):
         """Turn on display and reset activity timer"""
         if not self.display_on:
-            self._cmd(0x29)  # Display on
+            self.wait()
+            self.panel.display_on(True)
             # Turn on backlight via AXP192
-            self.i2c.writeto_mem(0x34, 0x95, bytes([0x02]))  # Backlight on
+            lcd.set_backlight(self.i2c, True)
             self.display_on = True
             print("Display turned on")
         
@@ -360,14 +197,14 @@ def run_framebuffer_monitor():
     button_b = Pin(39, Pin.IN, Pin.PULL_UP)
     
     # Show startup screen with audio
-    display.clear_framebuffer(display.BLACK)
-    display.fill_rect_to_framebuffer(10, 40, 115, 15, display.BLUE)
-    display.draw_text_to_framebuffer(15, 50, "CLAUDE PRO", display.WHITE)
-    display.draw_text_to_framebuffer(20, 70, "SESSION MONITOR", display.GREEN)
-    display.draw_text_to_framebuffer(35, 90, "FRAMEBUFFER", display.CYAN)
-    display.draw_text_to_framebuffer(45, 110, "V2.0", display.YELLOW)
-    display.draw_text_to_framebuffer(15, 140, "INITIALIZING...", display.WHITE)
-    display.display_framebuffer()
+    display.clear(display.BLACK)
+    display.fill_rect(10, 40, 115, 15, display.BLUE)
+    display.text(15, 50, "CLAUDE PRO", display.WHITE)
+    display.text(20, 70, "SESSION MONITOR", display.GREEN)
+    display.text(35, 90, "FRAMEBUFFER", display.CYAN)
+    display.text(45, 110, "V2.0", display.YELLOW)
+    display.text(15, 140, "INITIALIZING...", display.WHITE)
+    display.show()
     
     # Play startup beep
     display.beep_pattern("startup")
@@ -418,7 +255,7 @@ def run_framebuffer_monitor():
                 render_start = time.ticks_ms()
                 
                 display.render_status_screen(session_seconds, status, alerts_pending, current_time)
-                display.display_framebuffer()
+                display.show()
                 
                 render_end = time.ticks_ms()
                 render_time = time.ticks_diff(render_end, render_start)
@@ -439,7 +276,8 @@ def run_framebuffer_monitor():
             # Force immediate refresh to show current state
             if display.display_on:
                 display.render_status_screen(session_seconds, status, alerts_pending, current_time)
-                display.display_framebuffer()
+                display.show()
+                display.wait()
             
             time.sleep(0.3)  # Debounce
         
@@ -455,8 +293,13 @@ def run_framebuffer_monitor():
             gc.collect()
             print("Memory cleanup")
         
-        # Fast loop for responsive updates
-        time.sleep(0.1)
+        # Fast loop for responsive updates; the flusher sends the frame meanwhile
+        deadline = time.ticks_add(time.ticks_ms(), 100)
+        while display.pump() and time.ticks_diff(deadline, time.ticks_ms()) > 0:
+            pass
+        idle_ms = time.ticks_diff(deadline, time.ticks_ms())
+        if idle_ms > 0:
+            time.sleep_ms(idle_ms)
 
 
 if __name__ == "__main__":
@@ -3,8 +3,15 @@ import time
 import gc
 import json
 import network
+import select
+import socket
 import urequests
-from machine import Pin, SPI, I2C, PWM, reset
+import ubinascii
+from machine import Pin, PWM, reset, unique_id
+import lcd
+from lcd import FONT_5X7, BandBackend
+from bitmap_font import load_font
+from widgets import ACTIVITY_ICONS, Bar, Icon, Label, ProgressBar, Screen
 
 print("Claude Monitor WiFi + Framebuffer v1.0")
 
@@ -12,25 +19,16 @@ print("Claude Monitor WiFi + Framebuffer v1.0")
 WIFI_SSID = "ssid"
 WIFI_PASSWORD = "password"
 SERVER_URL = "http://127.0.0.1:8080"  # MCP server on PC
+LONG_POLL_WAIT = 30  # Seconds the server may hold /status open (it caps this at 60)
+POLL_SLICE_MS = 100  # Button flags are checked this often while a long-poll is parked
+DEBOUNCE_MS = 300  # Presses closer together than this are contact bounce
+DEVICE_ID = "m5stick-" + ubinascii.hexlify(unique_id()).decode()  # Identifies this stick to the server
+CLOCK_FONT = "clock.fnt"  # Optional larger clock digits built by scripts/build_font.py
 
-class FramebufferWiFiDisplay:
+class FramebufferWiFiDisplay(BandBackend):
     def __init__(self):
         # AXP192 setup
-        self.i2c = I2C(0, scl=Pin(22), sda=Pin(21), freq=400000)
-        self.i2c.writeto_mem(0x34, 0x12, bytes([0xFF]))
-        self.i2c.writeto_mem(0x34, 0x96, bytes([0x84]))
-        self.i2c.writeto_mem(0x34, 0x95, bytes([0x02]))
-        time.sleep_ms(200)
-        
-        # High-speed SPI setup (compatible with M5StickC PLUS)
-        self.spi = SPI(1, baudrate=26000000, sck=Pin(13), mosi=Pin(15))
-        self.reset = Pin(18, Pin.OUT, value=1)
-        self.cs = Pin(5, Pin.OUT, value=1)
-        self.dc = Pin(23, Pin.OUT, value=0)
-        
-        # Display dimensions
-        self.width = 135
-        self.height = 240
+        self.i2c = lcd.power_on()
         
         # Colors (RGB565 format)
         self.WHITE = 0xFFFF
@@ -42,56 +40,10 @@ class FramebufferWiFiDisplay:
         self.CYAN = 0x07FF
         self.MAGENTA = 0xF81F
         
-        # Create framebuffer (135 x 240 pixels, 2 bytes per pixel)
-        self.framebuffer = bytearray(self.width * self.height * 2)
-        
-        # 5x7 Font definition
-        self.FONT_5X7 = {
-            'A': [0b01110, 0b10001, 0b10001, 0b11111, 0b10001, 0b10001, 0b10001],
-            'B': [0b11110, 0b10001, 0b10001, 0b11110, 0b10001, 0b10001, 0b11110],
-            'C': [0b01111, 0b10000, 0b10000, 0b10000, 0b10000, 0b10000, 0b01111],
-            'D': [0b11110, 0b10001, 0b10001, 0b10001, 0b10001, 0b10001, 0b11110],
-            'E': [0b11111, 0b10000, 0b10000, 0b11110, 0b10000, 0b10000, 0b11111],
-            'F': [0b11111, 0b10000, 0b10000, 0b11110, 0b10000, 0b10000, 0b10000],
-            'G': [0b01111, 0b10000, 0b10000, 0b10011, 0b10001, 0b10001, 0b01111],
-            'H': [0b10001, 0b10001, 0b10001, 0b11111, 0b10001, 0b10001, 0b10001],
-            'I': [0b01110, 0b00100, 0b00100, 0b00100, 0b00100, 0b00100, 0b01110],
-            'J': [0b00111, 0b00001, 0b00001, 0b00001, 0b00001, 0b10001, 0b01110],
-            'K': [0b10001, 0b10010, 0b10100, 0b11000, 0b10100, 0b10010, 0b10001],
-            'L': [0b10000, 0b10000, 0b10000, 0b10000, 0b10000, 0b10000, 0b11111],
-            'M': [0b10001, 0b11011, 0b10101, 0b10101, 0b10001, 0b10001, 0b10001],
-            'N': [0b10001, 0b11001, 0b10101, 0b10101, 0b10011, 0b10001, 0b10001],
-            'O': [0b01110, 0b10001, 0b10001, 0b10001, 0b10001, 0b10001, 0b01110],
-            'P': [0b11110, 0b10001, 0b10001, 0b11110, 0b10000, 0b10000, 0b10000],
-            'Q': [0b01110, 0b10001, 0b10001, 0b10001, 0b10101, 0b10010, 0b01101],
-            'R': [0b11110, 0b10001, 0b10001, 0b11110, 0b10100, 0b10010, 0b10001],
-            'S': [0b01111, 0b10000, 0b10000, 0b01110, 0b00001, 0b00001, 0b11110],
-            'T': [0b11111, 0b00100, 0b00100, 0b00100, 0b00100, 0b00100, 0b00100],
-            'U': [0b10001, 0b10001, 0b10001, 0b10001, 0b10001, 0b10001, 0b01110],
-            'V': [0b10001, 0b10001, 0b10001, 0b10001, 0b10001, 0b01010, 0b00100],
-            'W': [0b10001, 0b10001, 0b10001, 0b10101, 0b10101, 0b11011, 0b10001],
-            'X': [0b10001, 0b10001, 0b01010, 0b00100, 0b01010, 0b10001, 0b10001],
-            'Y': [0b10001, 0b10001, 0b01010, 0b00100, 0b00100, 0b00100, 0b00100],
-            'Z': [0b11111, 0b00001, 0b00010, 0b00100, 0b01000, 0b10000, 0b11111],
-            '0': [0b01110, 0b10001, 0b10011, 0b10101, 0b11001, 0b10001, 0b01110],
-            '1': [0b00100, 0b01100, 0b00100, 0b00100, 0b00100, 0b00100, 0b01110],
-            '2': [0b01110, 0b10001, 0b00001, 0b00110, 0b01000, 0b10000, 0b11111],
-            '3': [0b11111, 0b00001, 0b00010, 0b00110, 0b00001, 0b10001, 0b01110],
-            '4': [0b00010, 0b00110, 0b01010, 0b10010, 0b11111, 0b00010, 0b00010],
-            '5': [0b11111, 0b10000, 0b11110, 0b00001, 0b00001, 0b10001, 0b01110],
-            '6': [0b00110, 0b01000, 0b10000, 0b11110, 0b10001, 0b10001, 0b01110],
-            '7': [0b11111, 0b00001, 0b00010, 0b00100, 0b01000, 0b10000, 0b10000],
-            '8': [0b01110, 0b10001, 0b10001, 0b01110, 0b10001, 0b10001, 0b01110],
-            '9': [0b01110, 0b10001, 0b10001, 0b01111, 0b00001, 0b00010, 0b01100],
-            ':': [0b00000, 0b01100, 0b01100, 0b00000, 0b01100, 0b01100, 0b00000],
-            '$': [0b00100, 0b01111, 0b10100, 0b01110, 0b00101, 0b11110, 0b00100],
-            ' ': [0b00000, 0b00000, 0b00000, 0b00000, 0b00000, 0b00000, 0b00000],
-            '.': [0b00000, 0b00000, 0b00000, 0b00000, 0b00000, 0b11000, 0b11000],
-            '-': [0b00000, 0b00000, 0b00000, 0b11111, 0b00000, 0b00000, 0b00000],
-            '/': [0b00000, 0b00001, 0b00010, 0b00100, 0b01000, 0b10000, 0b00000],
-        }
-        
-        self._init_display()
+        # ST7789 rendered band by band from a display list: a 4.3 KB band instead of the
+        # 64.8 KB framebuffer leaves the heap to the WiFi stack; glyphs are rendered once
+        super().__init__(lcd.m5stick_panel(), FONT_5X7)
+        self.session_screen = self._build_session_screen()
         
         # Initialize buzzer for alerts
         try:
@@ -110,220 +62,103 @@ class FramebufferWiFiDisplay:
         
         print("Framebuffer WiFi display initialized")
     
-    def _cmd(self, c):
-        """Send command"""
-        self.cs.value(0)
-        self.dc.value(0)
-        self.spi.write(bytearray([c]))
-        self.cs.value(1)
-    
-    def _data(self, d):
-        """Send data"""
-        self.cs.value(0)
-        self.dc.value(1)
-        if isinstance(d, int):
-            self.spi.write(bytearray([d]))
+    def _build_session_screen(self):
+        """Widget layout of the session screen"""
+        # Larger clock digits when a bitmap font was deployed
+        clock_font = load_font(CLOCK_FONT)
+        if clock_font is None:
+            clock = Label(25, 25, 85, 15, self.CYAN, 0x2104, key="clock", pad_x=15, pad_y=5)  # Dark blue
         else:
-            self.spi.write(d)
-        self.cs.value(1)
-    
-    def _init_display(self):
-        """Initialize display"""
-        self.reset.value(0)
-        time.sleep_ms(10)
-        self.reset.value(1)
-        time.sleep_ms(100)
-        
-        self._cmd(0x01)  # SWRESET
-        time.sleep_ms(120)
-        self._cmd(0x11)  # SLPOUT
-        time.sleep_ms(120)
-        self._cmd(0x36)
-        self._data(0x00)  # Memory access control
-        self._cmd(0x3A)
-        self._data(0x05)  # RGB565
-        self._cmd(0x21)   # Invert display
-        self._cmd(0x13)   # Normal display mode
-        self._cmd(0x29)   # Display on
-        time.sleep_ms(20)
-    
-    def clear_framebuffer(self, color=None):
-        """Clear framebuffer to specific color"""
-        if color is None:
-            color = self.BLACK
-        
-        # Fill framebuffer with color
-        color_high = (color >> 8) & 0xFF
-        color_low = color & 0xFF
-        
-        for i in range(0, len(self.framebuffer), 2):
-            self.framebuffer[i] = color_high
-            self.framebuffer[i + 1] = color_low
-    
-    def set_pixel(self, x, y, color):
-        """Set pixel in framebuffer"""
-        if 0 <= x < self.width and 0 <= y < self.height:
-            idx = (y * self.width + x) * 2
-            self.framebuffer[idx] = (color >> 8) & 0xFF
-            self.framebuffer[idx + 1] = color & 0xFF
-    
-    def draw_char_to_framebuffer(self, x, y, char, color, bg_color=None):
-        """Draw character directly to framebuffer"""
-        if char not in self.FONT_5X7:
-            char = ' '
-        
-        bitmap = self.FONT_5X7[char]
-        
-        for row in range(7):
-            for col in range(5):
-                pixel_x = x + col
-                pixel_y = y + row
-                
-                if (bitmap[row] >> (4-col)) & 1:
-                    # Foreground pixel
-                    self.set_pixel(pixel_x, pixel_y, color)
-                elif bg_color is not None:
-                    # Background pixel
-                    self.set_pixel(pixel_x, pixel_y, bg_color)
-    
-    def draw_text_to_framebuffer(self, x, y, text, color, bg_color=None):
-        """Draw text string to framebuffer"""
-        char_x = x
-        for char in text.upper():
-            self.draw_char_to_framebuffer(char_x, y, char, color, bg_color)
-            char_x += 6
-    
-    def fill_rect_to_framebuffer(self, x, y, w, h, color):
-        """Fill rectangle in framebuffer"""
-        for py in range(y, min(y + h, self.height)):
-            for px in range(x, min(x + w, self.width)):
-                self.set_pixel(px, py, color)
-    
-    def display_framebuffer(self):
-        """Transfer entire framebuffer to display in one operation"""
-        # Set full screen window with M5StickC PLUS offsets
-        self._cmd(0x2A)  # Column address set
-        self._data((52) >> 8)  # X start high
-        self._data((52) & 0xFF)  # X start low
-        self._data((52 + self.width - 1) >> 8)  # X end high
-        self._data((52 + self.width - 1) & 0xFF)  # X end low
-        
-        self._cmd(0x2B)  # Row address set
-        self._data((40) >> 8)  # Y start high
-        self._data((40) & 0xFF)  # Y start low
-        self._data((40 + self.height - 1) >> 8)  # Y end high
-        self._data((40 + self.height - 1) & 0xFF)  # Y end low
-        
-        self._cmd(0x2C)  # Memory write
-        
-        # Transfer entire framebuffer in one SPI transaction
-        self.cs.value(0)
-        self.dc.value(1)
-        self.spi.write(self.framebuffer)
-        self.cs.value(1)
+            clock = Label(25, 25, 85, 15, self.CYAN, 0x2104, key="clock", font=clock_font,
+                          pad_x=max(0, 85 - clock_font.text_width("00:00")) // 2,
+                          pad_y=max(0, 15 - clock_font.height) // 2)
+        
+        return Screen([
+            # Blue header bar with activity indicator
+            Label(0, 0, self.width, 20, self.WHITE, self.BLUE, value="CLAUDE PRO SESSION", pad_x=15, pad_y=5),
+            Icon(5, 6, ACTIVITY_ICONS, self.BLUE, key="activity"),
+            # Real-time clock with background
+            clock,
+            # Session time from server data
+            Label(2, 48, 131, 12, self.WHITE, 0x1082, key="session", pad_x=3, pad_y=2),  # Very dark blue
+            # Status from server (colors follow the status)
+            Label(2, 68, 131, 12, self.WHITE, 0x4208, key="status", pad_x=3, pad_y=2),
+            # Real session statistics from server
+            Label(5, 90, 120, 7, self.YELLOW, self.BLACK, key="commands"),
+            Label(5, 110, 120, 7, self.MAGENTA, self.BLACK, key="files"),
+            # Productivity with progress bar
+            Label(5, 130, 78, 7, self.WHITE, self.BLACK, value="PRODUCTIVITY:"),
+            ProgressBar(5, 142, 115, 6, 0x2104, key="productivity"),
+            Label(122, 140, self.width - 122, 7, self.WHITE, self.BLACK, key="percent"),
+            # Alerts from server
+            Label(2, 155, 131, 12, self.WHITE, 0x0320, key="alerts", pad_x=3, pad_y=2),
+            # Connection status and model info
+            Label(5, 175, 90, 7, self.CYAN, self.BLACK, value="MODEL: SONNET-4"),
+            Label(5, 190, 90, 7, self.GREEN, self.BLACK, value="WIFI: CONNECTED"),
+            # Gray footer bar with live session info
+            Bar(0, 205, self.width, 35, value=0x4208),
+            Label(5, 212, 125, 7, self.WHITE, 0x4208, key="footer"),
+            Label(5, 227, 126, 7, self.CYAN, 0x4208, value="PRESS A: WAKE DISPLAY"),
+        ], self.BLACK)
     
     def render_session_screen(self, session_data, current_time):
-        """Render session screen from real server data"""
-        # Clear framebuffer
-        self.clear_framebuffer(self.BLACK)
-        
-        # Blue header bar
-        self.fill_rect_to_framebuffer(0, 0, self.width, 20, self.BLUE)
-        self.draw_text_to_framebuffer(15, 5, "CLAUDE PRO SESSION", self.WHITE, self.BLUE)
-        
-        # Real-time clock with background
-        hours = current_time[3]
-        minutes = current_time[4]
-        clock_str = f"{hours:02d}:{minutes:02d}"
-        self.fill_rect_to_framebuffer(25, 25, 85, 15, 0x2104)  # Dark blue
-        self.draw_text_to_framebuffer(40, 30, clock_str, self.CYAN, 0x2104)
-        
-        # Session time from server data
+        """Render session screen from real server data (only changed widgets are redrawn)"""
         duration = session_data.get('duration', 0)
         session_hours = duration // 3600
         session_mins = (duration % 3600) // 60
         session_secs = duration % 60
-        time_str = f"SESSION: {session_hours:02d}H{session_mins:02d}M{session_secs:02d}S"
-        self.fill_rect_to_framebuffer(2, 48, 131, 12, 0x1082)  # Very dark blue
-        self.draw_text_to_framebuffer(5, 50, time_str, self.WHITE, 0x1082)
         
-        # Status from server
-        status = session_data.get('status', 'idle')
-        status_color = self.GREEN if status == "active" else self.WHITE
-        status_bg = 0x0320 if status == "active" else 0x4208  # Green or gray
-        status_text = "STATUS: CODING" if status == "active" else "STATUS: IDLE"
-        self.fill_rect_to_framebuffer(2, 68, 131, 12, status_bg)
-        self.draw_text_to_framebuffer(5, 70, status_text, self.WHITE, status_bg)
-        
-        # Real session statistics from server
-        commands_run = session_data.get('commands', 0)
-        files_edited = session_data.get('files_edited', 0)
-        
-        self.draw_text_to_framebuffer(5, 90, f"COMMANDS: {commands_run:03d}", self.YELLOW, self.BLACK)
-        self.draw_text_to_framebuffer(5, 110, f"FILES: {files_edited:02d}", self.MAGENTA, self.BLACK)
+        active = session_data.get('status', 'idle') == "active"
+        status_bg = 0x0320 if active else 0x4208  # Green or gray
         
         # Productivity calculation from real data
         productivity = min(100, duration // 6 + 20 if duration > 0 else 0)  # Grows with session time
-        self.draw_text_to_framebuffer(5, 130, "PRODUCTIVITY:", self.WHITE, self.BLACK)
         
-        # Progress bar
-        bar_width = int(productivity * 1.15)  # Scale to fit
-        self.fill_rect_to_framebuffer(5, 142, 115, 6, 0x2104)  # Background
-        bar_color = self.GREEN if productivity > 75 else self.YELLOW
-        self.fill_rect_to_framebuffer(5, 142, bar_width, 6, bar_color)
-        self.draw_text_to_framebuffer(122, 140, f"{productivity}%", self.WHITE, self.BLACK)
-        
-        # Alerts from server
         alerts = session_data.get('alerts', 0)
         if alerts > 0:
-            self.fill_rect_to_framebuffer(2, 155, 131, 12, 0x6000)  # Dark red
-            alert_str = f"ALERTS: {alerts}"
-            self.draw_text_to_framebuffer(5, 157, alert_str, self.WHITE, 0x6000)
+            alert_value = (f"ALERTS: {alerts}", self.WHITE, 0x6000)  # Dark red
         else:
-            self.fill_rect_to_framebuffer(2, 155, 131, 12, 0x0320)  # Dark green
-            self.draw_text_to_framebuffer(5, 157, "ALERTS: NONE", self.WHITE, 0x0320)
-        
-        # Connection status and model info
-        self.draw_text_to_framebuffer(5, 175, "MODEL: SONNET-4", self.CYAN, self.BLACK)
-        self.draw_text_to_framebuffer(5, 190, "WIFI: CONNECTED", self.GREEN, self.BLACK)
-        
-        # Gray footer bar
-        self.fill_rect_to_framebuffer(0, 205, self.width, 35, 0x4208)  # Gray
-        
-        # Live session info in footer
-        session_active = session_data.get('active', False)
-        footer_text = "REAL SESSION DATA" if session_active else "NO SESSION"
-        self.draw_text_to_framebuffer(5, 212, footer_text, self.WHITE, 0x4208)
-        
-        # Footer controls
-        self.draw_text_to_framebuffer(5, 227, "PRESS A: WAKE DISPLAY", self.CYAN, 0x4208)
+            alert_value = ("ALERTS: NONE", self.WHITE, 0x0320)  # Dark green
+        
+        return self.session_screen.render(self, {
+            "activity": ("active" if active else "idle", self.GREEN if active else self.WHITE),
+            "clock": f"{current_time[3]:02d}:{current_time[4]:02d}",
+            "session": f"SESSION: {session_hours:02d}H{session_mins:02d}M{session_secs:02d}S",
+            "status": ("STATUS: CODING" if active else "STATUS: IDLE", self.WHITE, status_bg),
+            "commands": f"COMMANDS: {session_data.get('commands', 0):03d}",
+            "files": f"FILES: {session_data.get('files_edited', 0):02d}",
+            "productivity": (productivity, self.GREEN if productivity > 75 else self.YELLOW),
+            "percent": f"{productivity}%",
+            "alerts": alert_value,
+            "footer": "REAL SESSION DATA" if session_data.get('active', False) else "NO SESSION",
+        })
     
     def show_wifi_connecting(self):
         """Show WiFi connecting screen"""
-        self.clear_framebuffer(self.BLACK)
-        self.fill_rect_to_framebuffer(0, 0, self.width, 20, self.YELLOW)
-        self.draw_text_to_framebuffer(25, 5, "CONNECTING...", self.BLACK, self.YELLOW)
-        self.draw_text_to_framebuffer(15, 50, "WIFI: SSID", self.WHITE, self.BLACK)
-        self.draw_text_to_framebuffer(15, 70, "PLEASE WAIT...", self.CYAN, self.BLACK)
-        self.display_framebuffer()
+        self.clear(self.BLACK)
+        self.fill_rect(0, 0, self.width, 20, self.YELLOW)
+        self.text(25, 5, "CONNECTING...", self.BLACK, self.YELLOW)
+        self.text(15, 50, "WIFI: SSID", self.WHITE, self.BLACK)
+        self.text(15, 70, "PLEASE WAIT...", self.CYAN, self.BLACK)
+        self.show()
     
     def show_wifi_connected(self, ip):
         """Show WiFi connected screen"""
-        self.clear_framebuffer(self.BLACK)
-        self.fill_rect_to_framebuffer(0, 0, self.width, 20, self.GREEN)
-        self.draw_text_to_framebuffer(25, 5, "WIFI CONNECTED", self.WHITE, self.GREEN)
-        self.draw_text_to_framebuffer(5, 50, f"IP: {ip}", self.WHITE, self.BLACK)
-        self.draw_text_to_framebuffer(5, 70, "CONNECTING TO SERVER", self.CYAN, self.BLACK)
-        self.display_framebuffer()
+        self.clear(self.BLACK)
+        self.fill_rect(0, 0, self.width, 20, self.GREEN)
+        self.text(25, 5, "WIFI CONNECTED", self.WHITE, self.GREEN)
+        self.text(5, 50, f"IP: {ip}", self.WHITE, self.BLACK)
+        self.text(5, 70, "CONNECTING TO SERVER", self.CYAN, self.BLACK)
+        self.show()
     
     def show_wifi_failed(self):
         """Show WiFi connection failed"""
-        self.clear_framebuffer(self.BLACK)
-        self.fill_rect_to_framebuffer(0, 0, self.width, 20, self.RED)
-        self.draw_text_to_framebuffer(25, 5, "WIFI FAILED", self.WHITE, self.RED)
-        self.draw_text_to_framebuffer(15, 50, "CHECK NETWORK", self.WHITE, self.BLACK)
-        self.draw_text_to_framebuffer(15, 70, "RESTARTING...", self.YELLOW, self.BLACK)
-        self.display_framebuffer()
+        self.clear(self.BLACK)
+        self.fill_rect(0, 0, self.width, 20, self.RED)
+        self.text(25, 5, "WIFI FAILED", self.WHITE, self.RED)
+        self.text(15, 50, "CHECK NETWORK", self.WHITE, self.BLACK)
+        self.text(15, 70, "RESTARTING...", self.YELLOW, self.BLACK)
+        self.show()
     
     def beep_alert(self, frequency=800, duration_ms=100):
         """Play alert beep"""
@@ -340,18 +175,20 @@ class FramebufferWiFiDisplay:
     def turn_off_display(self):
         """Turn off display to save power"""
         if self.display_on:
-            self._cmd(0x28)  # Display off
+            self.wait()  # Let the last frame finish before sending panel commands
+            self.panel.display_on(False)
             # Turn off backlight via AXP192
-            self.i2c.writeto_mem(0x34, 0x95, bytes([0x00]))  # Backlight off
+            lcd.set_backlight(self.i2c, False)
             self.display_on = False
             print("Display turned off")
     
     def turn_on_display(self):
         """Turn on display and reset activity timer"""
         if not self.display_on:
-            self._cmd(0x29)  # Display on
+            self.wait()
+            self.panel.display_on(True)
             # Turn on backlight via AXP192
-            self.i2c.writeto_mem(0x34, 0x95, bytes([0x02]))  # Backlight on
+            lcd.set_backlight(self.i2c, True)
             self.display_on = True
             print("Display turned on")
         
@@ -403,15 +240,26 @@ class WiFiManager:
 class SessionClient:
     def __init__(self, server_url):
         self.server_url = server_url
+        host = server_url.split("://", 1)[-1].split("/", 1)[0]
+        self.host, _, port = host.partition(":")
+        self.port = int(port) if port else 80
         self.last_data = None
+        self.etag = None
+        self.last_fetch_ms = 0
     
     def get_status(self):
-        """Get session status from MCP server"""
+        """Get session status from MCP server (304 reuses the last payload)"""
         try:
-            response = urequests.get(f"{self.server_url}/status", timeout=5)
-            if response.status_code == 200:
+            headers = {"If-None-Match": self.etag} if self.etag and self.last_data else {}
+            response = urequests.get(f"{self.server_url}/status?device={DEVICE_ID}", headers=headers, timeout=5)
+            if response.status_code == 304:
+                response.close()
+                return self.last_data
+            elif response.status_code == 200:
                 data = response.json()
                 self.last_data = data
+                self.last_fetch_ms = time.ticks_ms()
+                self.etag = getattr(response, "headers", {}).get("ETag")
                 response.close()
                 return data
             else:
@@ -422,6 +270,91 @@ class SessionClient:
             print(f"HTTP error: {e}")
             return None
     
+    def _get(self, path, timeout, interrupted=None):
+        """GET path over HTTP/1.0 with the stored ETag: (status, etag, body), or None if interrupted.
+        
+        The response is awaited in POLL_SLICE_MS slices, checking interrupted()
+        between them, so a button press can abandon a parked long-poll.
+        """
+        s = socket.socket()
+        try:
+            s.settimeout(5)
+            s.connect(socket.getaddrinfo(self.host, self.port)[0][-1])
+            condition = f"If-None-Match: {self.etag}\r\n" if self.etag and self.last_data else ""
+            s.send(f"GET {path} HTTP/1.0\r\nHost: {self.host}\r\n{condition}\r\n".encode())
+            
+            poller = select.poll()
+            poller.register(s, select.POLLIN)
+            deadline = time.ticks_add(time.ticks_ms(), int(timeout * 1000))
+            while not poller.poll(POLL_SLICE_MS):
+                if interrupted is not None and interrupted():
+                    return None
+                if time.ticks_diff(deadline, time.ticks_ms()) <= 0:
+                    raise OSError("long-poll timed out")
+            
+            status = int(s.readline().split()[1])
+            etag = None
+            while True:
+                line = s.readline()
+                if not line or line == b"\r\n":
+                    break
+                name, _, value = line.decode().partition(":")
+                if name.strip().lower() == "etag":
+                    etag = value.strip()
+            # HTTP/1.0: the body runs until the server closes the connection
+            chunks = []
+            while True:
+                chunk = s.recv(1024)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+            return status, etag, b"".join(chunks)
+        finally:
+            s.close()
+    
+    def wait_for_status(self, wait=LONG_POLL_WAIT, interrupted=None):
+        """Long-poll: the server answers as soon as the state version moves, or
+        after wait seconds with a 304 for the unchanged state. Returns the last
+        payload early once interrupted() is true."""
+        if not self.last_data or "version" not in self.last_data:
+            return self.get_status()
+        
+        try:
+            path = f"/status?device={DEVICE_ID}&since={self.last_data['version']}&wait={wait}"
+            response = self._get(path, wait + 5, interrupted)
+            if response is None:
+                return self.last_data
+            status, etag, body = response
+            if status == 304:
+                return self.last_data
+            elif status == 200:
+                data = json.loads(body)
+                self.last_data = data
+                self.last_fetch_ms = time.ticks_ms()
+                self.etag = etag
+                return data
+            else:
+                print(f"Server error: {status}")
+                return None
+        except Exception as e:
+            print(f"Long-poll error: {e}")
+            return None
+    
+    def current_data(self):
+        """Last payload with the session duration advanced to now.
+        
+        The server's ETag only changes with the state version, so a 304 keeps
+        the last 200's duration; the aggregate one grows by the session count
+        every second.
+        """
+        if not self.last_data:
+            return None
+        data = dict(self.last_data)
+        if data.get('status') == 'active':
+            elapsed = time.ticks_diff(time.ticks_ms(), self.last_fetch_ms) // 1000
+            data['duration'] = data.get('duration', 0) + elapsed * max(1, data.get('sessions', 1))
+        return data
+    
     def acknowledge_alert(self):
         """Send alert acknowledgment to server"""
         try:
@@ -461,79 +394,95 @@ def run_claude_monitor():
     display.show_wifi_connected(wifi.ip)
     time.sleep(2)
     
+    # Button IRQs only latch a flag; the main loop handles presses between
+    # long-polls, so they never re-enter a render or SPI transfer in progress
+    pressed = [False, False]  # Button A, button B
+    
+    def on_button_a(pin):
+        pressed[0] = True
+    
+    def on_button_b(pin):
+        pressed[1] = True
+    
+    def button_pressed():
+        return pressed[0] or pressed[1]
+    
+    button_a.irq(trigger=Pin.IRQ_FALLING, handler=on_button_a)
+    button_b.irq(trigger=Pin.IRQ_FALLING, handler=on_button_b)
+    
     # Main loop
-    last_update = 0
     last_alert_count = 0
-    last_second = -1
+    last_gc = time.time()
+    last_press = time.ticks_add(time.ticks_ms(), -DEBOUNCE_MS)
     
     print("Starting real-time WiFi session monitoring...")
     
     while True:
         try:
-            current_timestamp = time.time()
-            current_time = time.localtime()
+            # Handle button presses latched by the IRQs
+            if pressed[0] or pressed[1]:
+                wake, refresh = pressed
+                pressed[0] = pressed[1] = False
+                now = time.ticks_ms()
+                if time.ticks_diff(now, last_press) >= DEBOUNCE_MS:
+                    last_press = now
+                    if wake:
+                        # Button A: only wake display and reset the 60-second timeout
+                        display.turn_on_display()
+                        print("*** BUTTON A PRESSED - timeout reset ***")
+                    if refresh:
+                        # Button B: fetch fresh data now instead of waiting out the long-poll
+                        print("*** BUTTON B PRESSED - refreshing ***")
+                        session_client.get_status()
+                    
+                    # Force immediate refresh to show current state
+                    data = session_client.current_data()
+                    if display.display_on and data:
+                        display.render_session_screen(data, time.localtime())
+                        display.show()
             
             # Check display timeout
             display.check_display_timeout()
             
-            # Update every 5 seconds or on button press
-            button_a_pressed = button_a.value() == 0  # Active LOW
-            button_b_pressed = button_b.value() == 0  # Active LOW
-            
-            if (current_timestamp - last_update > 5) or button_b_pressed:
-                print("Fetching session data...")
-                
-                # Check WiFi connection
-                if not wifi.is_connected():
-                    display.show_wifi_failed()
-                    time.sleep(2)
-                    if wifi.connect(WIFI_SSID, WIFI_PASSWORD):
-                        display.show_wifi_connected(wifi.ip)
-                    else:
-                        continue
-                
-                # Get session data from server
-                session_data = session_client.get_status()
-                if session_data:
-                    print(f"Session data: {session_data}")
-                    
-                    # Check for new alerts
-                    current_alerts = session_data.get('alerts', 0)
-                    if current_alerts > last_alert_count:
-                        display.beep_alert()
-                        print(f"New alert! Count: {current_alerts}")
-                    last_alert_count = current_alerts
-                    
-                    # Only render if display is on
-                    if display.display_on:
-                        display.render_session_screen(session_data, current_time)
-                        display.display_framebuffer()
+            # Check WiFi connection
+            if not wifi.is_connected():
+                display.show_wifi_failed()
+                time.sleep(2)
+                if wifi.connect(WIFI_SSID, WIFI_PASSWORD):
+                    display.show_wifi_connected(wifi.ip)
                 else:
-                    print("Failed to get session data")
-                
-                last_update = current_timestamp
+                    continue
             
-            # Handle button A: Only wake display and reset timeout
-            if button_a_pressed:
-                # Wake display and reset 60-second timeout
-                display.turn_on_display()
-                print(f"*** BUTTON A PRESSED - timeout reset ***")
-                
-                # Force immediate refresh to show current state
-                if display.display_on and session_client.last_data:
-                    display.render_session_screen(session_client.last_data, current_time)
-                    display.display_framebuffer()
+            # Park on the server until something changes or a button is pressed;
+            # while the display is on, also wake for the clock's minute rollover
+            # and the display sleep deadline
+            wait = LONG_POLL_WAIT
+            if display.display_on:
+                sleep_in = display.display_timeout - (time.time() - display.last_activity)
+                wait = min(wait, 60 - time.localtime()[5], max(1, int(sleep_in) + 1))
+            
+            session_data = session_client.wait_for_status(wait, button_pressed)
+            if session_data:
+                # Check for new alerts
+                current_alerts = session_data.get('alerts', 0)
+                if current_alerts > last_alert_count:
+                    display.beep_alert()
+                    print(f"New alert! Count: {current_alerts}")
+                last_alert_count = current_alerts
                 
-                time.sleep(0.3)  # Debounce
+                # Only render if display is on
+                if display.display_on:
+                    display.render_session_screen(session_client.current_data(), time.localtime())
+                    display.show()
+            else:
+                print("Failed to get session data")
+                time.sleep(1)
             
             # Memory management
-            if int(current_timestamp) % 60 == 0 and int(current_timestamp) != last_second:
+            if time.time() - last_gc >= 60:
                 gc.collect()
                 print("Memory cleanup")
-                last_second = int(current_timestamp)
-            
-            # Fast loop for responsive updates
-            time.sleep(0.2)
+                last_gc = time.time()
             
         except Exception as e:
             print(f"Main loop error: {e}")
@@ -0,0 +1,105 @@
+"""
+Dirty-rectangle tracking for framebuffer displays
+Drawing calls mark the regions they touch; lcd.FramebufferBackend.show()
+pushes only those regions to the panel instead of the whole framebuffer
+"""
+
+# Upper bound on tracked regions; beyond it the cheapest pair is merged
+MAX_RECTS = 8
+
+# Regions closer than this many pixels are merged (e.g. neighbouring glyphs)
+MERGE_GAP = 2
+
+
+class DirtyRects:
+    """Bounded set of changed framebuffer regions.
+
+    Regions are stored as [x0, y0, x1, y1] with exclusive ends, clipped to
+    the screen. Overlapping or nearly touching regions are merged on add(),
+    and the list never grows past max_rects, so marking stays O(max_rects)
+    per drawing call.
+    """
+
+    def __init__(self, width, height, max_rects=MAX_RECTS):
+        self.width = width
+        self.height = height
+        self.max_rects = max_rects
+        self.rects = []
+        self.full = False
+
+    def __bool__(self):
+        return self.full or bool(self.rects)
+
+    def add(self, x, y, w, h):
+        """Mark a w x h region at (x, y) as changed"""
+        if self.full:
+            return
+        x0 = x if x > 0 else 0
+        y0 = y if y > 0 else 0
+        x1 = x + w if x + w < self.width else self.width
+        y1 = y + h if y + h < self.height else self.height
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        rects = self.rects
+        gap = MERGE_GAP
+        i = 0
+        while i < len(rects):
+            r = rects[i]
+            if r[0] <= x0 and r[1] <= y0 and x1 <= r[2] and y1 <= r[3]:
+                return  # Already covered
+            if x0 <= r[2] + gap and r[0] <= x1 + gap and y0 <= r[3] + gap and r[1] <= y1 + gap:
+                # Absorb it and rescan, the union may now reach other regions
+                x0 = min(x0, r[0])
+                y0 = min(y0, r[1])
+                x1 = max(x1, r[2])
+                y1 = max(y1, r[3])
+                rects.pop(i)
+                i = 0
+            else:
+                i += 1
+
+        if x0 == 0 and y0 == 0 and x1 == self.width and y1 == self.height:
+            self.mark_all()
+            return
+        rects.append([x0, y0, x1, y1])
+        if len(rects) > self.max_rects:
+            self._merge_cheapest()
+
+    def _merge_cheapest(self):
+        """Merge the pair whose union adds the fewest extra pixels"""
+        rects = self.rects
+        best = None
+        best_cost = 0
+        for i in range(len(rects)):
+            a = rects[i]
+            area_a = (a[2] - a[0]) * (a[3] - a[1])
+            for j in range(i + 1, len(rects)):
+                b = rects[j]
+                union = ((max(a[2], b[2]) - min(a[0], b[0])) *
+                         (max(a[3], b[3]) - min(a[1], b[1])))
+                cost = union - area_a - (b[2] - b[0]) * (b[3] - b[1])
+                if best is None or cost < best_cost:
+                    best = (i, j)
+                    best_cost = cost
+        i, j = best
+        b = rects.pop(j)
+        a = rects.pop(i)
+        self.add(min(a[0], b[0]), min(a[1], b[1]),
+                 max(a[2], b[2]) - min(a[0], b[0]), max(a[3], b[3]) - min(a[1], b[1]))
+
+    def mark_all(self):
+        """Mark the whole screen as changed"""
+        self.full = True
+        self.rects = []
+
+    def take(self):
+        """Return the changed regions and start tracking afresh"""
+        if self.full:
+            rects = [[0, 0, self.width, self.height]]
+        else:
+            rects = self.rects
+        self.rects = []
+        self.full = False
+        return rects
+
@@ -0,0 +1,143 @@
+"""
+Pre-rasterized glyph cache for bitmap fonts
+Each (char, fg, bg, scale) is rendered once into a ready RGB565 block and
+blitted row by row; transparent text caches foreground spans instead. The
+cache is bounded in bytes and evicts the least recently used glyph
+"""
+
+import raster
+
+# Bytes of rendered glyphs kept in RAM; a 5x7 glyph at scale 1 is 70 bytes
+DEFAULT_BUDGET = 12 * 1024
+
+
+class DictFont:
+    """Fixed-width font held as a dict of row integers (the built-in 5x7 fonts).
+
+    Glyphs are glyph_height integers of glyph_width bits, most significant
+    bit leftmost. Lowercase falls back to uppercase and anything else
+    missing draws as a space.
+    """
+
+    def __init__(self, glyphs, width=5, height=7, spacing=1):
+        self.glyphs = glyphs
+        self.width = width
+        self.height = height
+        self.advance = width + spacing
+
+    def glyph(self, char):
+        """(width, advance, rows) of char"""
+        rows = self.glyphs.get(char)
+        if rows is None:
+            rows = self.glyphs.get(char.upper()) or self.glyphs[' ']
+        return self.width, self.advance, rows
+
+
+class GlyphCache:
+    """Rendered glyphs of one font.
+
+    font is a DictFont-like object with a height and glyph(char) returning
+    (width, advance, rows); a plain dict is wrapped in a 5x7 DictFont.
+    """
+
+    def __init__(self, font, max_bytes=DEFAULT_BUDGET):
+        if isinstance(font, dict):
+            font = DictFont(font)
+        self.font = font
+        self.height = font.height
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = {}  # key -> [value, size, last use]
+        self._tick = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._tick += 1
+        entry[2] = self._tick
+        return entry[0]
+
+    def _put(self, key, value, size):
+        while self._entries and self.size + size > self.max_bytes:
+            self._evict()
+        self._tick += 1
+        self._entries[key] = [value, size, self._tick]
+        self.size += size
+
+    def _evict(self):
+        """Drop the least recently used glyph (a linear scan; the cache is small)"""
+        oldest_key = None
+        oldest = None
+        for key, entry in self._entries.items():
+            if oldest is None or entry[2] < oldest:
+                oldest_key = key
+                oldest = entry[2]
+        self.size -= self._entries.pop(oldest_key)[1]
+
+    def glyph(self, char, fg, bg, scale=1):
+        """Opaque glyph as (block, width, advance): a big-endian RGB565 block of
+        (width*scale) x (height*scale) pixels"""
+        key = (char, fg, bg, scale)
+        cached = self._get(key)
+        if cached is not None:
+            return cached
+
+        width, advance, bitmap = self.font.glyph(char)
+        fg_px = bytes((fg >> 8, fg & 0xFF)) * scale
+        bg_px = bytes((bg >> 8, bg & 0xFF)) * scale
+        rows = []
+        for bits in bitmap:
+            row = b"".join(fg_px if (bits >> (width - 1 - col)) & 1 else bg_px for col in range(width))
+            rows.append(row * scale)
+        block = b"".join(rows)
+        cached = (block, width, advance)
+        self._put(key, cached, len(block) + 16)
+        return cached
+
+    def spans(self, char, scale=1):
+        """Transparent glyph as (runs, width, advance) with (dy, dx, length) runs of foreground"""
+        key = (char, scale)
+        cached = self._get(key)
+        if cached is not None:
+            return cached
+
+        width, advance, bitmap = self.font.glyph(char)
+        runs = []
+        for row, bits in enumerate(bitmap):
+            col = 0
+            while col < width:
+                if (bits >> (width - 1 - col)) & 1:
+                    start = col
+                    while col < width and (bits >> (width - 1 - col)) & 1:
+                        col += 1
+                    for dy in range(scale):
+                        runs.append((row * scale + dy, start * scale, (col - start) * scale))
+                else:
+                    col += 1
+        cached = (tuple(runs), width, advance)
+        self._put(key, cached, 8 * len(runs) + 16)
+        return cached
+
+    def draw(self, buf, width, height, x, y, char, fg, bg=None, scale=1):
+        """Draw char into a width x height framebuffer and return its advance.
+
+        The caller marks dirty regions.
+        """
+        if bg is not None:
+            block, glyph_width, advance = self.glyph(char, fg, bg, scale)
+            raster.blit(buf, width, height, x, y, glyph_width * scale, self.height * scale, block)
+        else:
+            runs, glyph_width, advance = self.spans(char, scale)
+            for dy, dx, length in runs:
+                raster.fill_rect(buf, width, height, x + dx, y + dy, length, 1, fg)
+        return advance * scale
+
+    def text_width(self, text, scale=1):
+        """Width in pixels text will advance by"""
+        font = self.font
+        return sum(font.glyph(char)[1] for char in text) * scale
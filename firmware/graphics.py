@@ -3,11 +3,21 @@ Graphics module for M5StickC PLUS
 Provides display initialization and drawing functions
 """
 
-import time
-from machine import Pin, SPI, I2C
+import lcd
+import raster
+from lcd import FONT_5X7, FramebufferBackend
+from rle_image import RLEImage
 
-class M5Display:
-    """M5StickC PLUS display driver with graphics functions"""
+# Bytes read per chunk when streaming RGB565 files (15 full-width rows)
+STREAM_BYTES = 4 * 1024
+
+
+class M5Display(FramebufferBackend):
+    """M5StickC PLUS display driver with graphics functions.
+
+    A full framebuffer backend (see lcd.py); show() pushes only the
+    regions drawn since the last call.
+    """
     
     def __init__(self, brightness=True, swap_bytes=True):
         print("Initializing M5StickC PLUS display...")
@@ -16,300 +26,48 @@ class M5Display:
         self.swap_bytes = swap_bytes
         
         # AXP192 power management (CRITICAL for M5StickC PLUS)
-        self.i2c = I2C(0, scl=Pin(22), sda=Pin(21), freq=400000)
-        self.i2c.writeto_mem(0x34, 0x12, bytes([0xFF]))  # Enable power
-        self.i2c.writeto_mem(0x34, 0x96, bytes([0x84]))  # Power config
-        if brightness:
-            self.i2c.writeto_mem(0x34, 0x95, bytes([0x02]))  # Backlight ON
-        else:
-            self.i2c.writeto_mem(0x34, 0x95, bytes([0x00]))  # Backlight OFF
-        time.sleep_ms(200)
-        
-        # SPI configuration for ST7789
-        self.spi = SPI(1, baudrate=26000000, sck=Pin(13), mosi=Pin(15))
-        self.reset = Pin(18, Pin.OUT, value=1)
-        self.cs = Pin(5, Pin.OUT, value=1)
-        self.dc = Pin(23, Pin.OUT, value=0)
-        
-        # Display specifications
-        self.width = 135
-        self.height = 240
-        
-        # Create framebuffer (2 bytes per pixel for RGB565)
-        self.framebuffer = bytearray(self.width * self.height * 2)
-        
-        # Initialize display hardware
-        self._init_hardware()
+        self.i2c = lcd.power_on(brightness)
+        
+        # ST7789 on the M5StickC PLUS SPI pins, with the framebuffer and glyph cache
+        super().__init__(lcd.m5stick_panel(), FONT_5X7)
+        self.spi = self.transport.spi
+        self.cs = self.transport.cs
+        self.dc = self.transport.dc
+        self._byte = bytearray(1)
+        self._stream = None  # File streaming buffer, allocated on first use
         print("Graphics module initialized!")
     
     def _send_cmd(self, cmd):
         """Send command to ST7789"""
-        self.cs.value(0)
-        self.dc.value(0)
-        self.spi.write(bytearray([cmd]))
-        self.cs.value(1)
+        self.transport.write_cmd(cmd)
     
     def _send_data(self, data):
         """Send data to ST7789"""
-        self.cs.value(0)
-        self.dc.value(1)
         if isinstance(data, int):
-            self.spi.write(bytearray([data]))
-        else:
-            self.spi.write(data)
-        self.cs.value(1)
+            self._byte[0] = data
+            data = self._byte
+        self.transport.write_data(data)
     
-    def _init_hardware(self):
-        """Initialize ST7789 display controller"""
-        # Hardware reset sequence
-        self.reset.value(0)
-        time.sleep_ms(10)
-        self.reset.value(1)
-        time.sleep_ms(120)
-        
-        # ST7789 initialization commands
-        self._send_cmd(0x01)  # Software reset
-        time.sleep_ms(150)
-        
-        self._send_cmd(0x11)  # Exit sleep mode
-        time.sleep_ms(120)
-        
-        self._send_cmd(0x36)  # Memory data access control
-        self._send_data(0x00)
-        
-        self._send_cmd(0x3A)  # Interface pixel format (RGB565)
-        self._send_data(0x05)
-        
-        self._send_cmd(0x21)  # Display inversion ON (M5StickC PLUS)
-        self._send_cmd(0x13)  # Normal display mode
-        self._send_cmd(0x29)  # Display ON
-        time.sleep_ms(50)
-    
-    def clear(self, color=0x0000):
-        """Clear framebuffer with specified color"""
-        high = (color >> 8) & 0xFF
-        low = color & 0xFF
-        
-        for i in range(0, len(self.framebuffer), 2):
-            self.framebuffer[i] = high
-            self.framebuffer[i + 1] = low
-    
-    def pixel(self, x, y, color):
-        """Set individual pixel"""
-        if 0 <= x < self.width and 0 <= y < self.height:
-            index = (y * self.width + x) * 2
-            self.framebuffer[index] = (color >> 8) & 0xFF
-            self.framebuffer[index + 1] = color & 0xFF
-    
-    def line(self, x0, y0, x1, y1, color):
-        """Draw line using Bresenham's algorithm"""
-        dx = abs(x1 - x0)
-        dy = abs(y1 - y0)
-        sx = 1 if x0 < x1 else -1
-        sy = 1 if y0 < y1 else -1
-        err = dx - dy
-        
-        x, y = x0, y0
-        while True:
-            self.pixel(x, y, color)
-            if x == x1 and y == y1:
-                break
-            e2 = 2 * err
-            if e2 > -dy:
-                err -= dy
-                x += sx
-            if e2 < dx:
-                err += dx
-                y += sy
-    
-    def rect(self, x, y, width, height, color, filled=True):
-        """Draw rectangle (filled or outline)"""
-        if filled:
-            for py in range(y, min(y + height, self.height)):
-                for px in range(x, min(x + width, self.width)):
-                    self.pixel(px, py, color)
-        else:
-            # Draw outline
-            self.line(x, y, x + width - 1, y, color)  # Top
-            self.line(x, y + height - 1, x + width - 1, y + height - 1, color)  # Bottom
-            self.line(x, y, x, y + height - 1, color)  # Left
-            self.line(x + width - 1, y, x + width - 1, y + height - 1, color)  # Right
-    
-    def circle(self, cx, cy, radius, color, filled=False):
-        """Draw circle using midpoint algorithm"""
-        if filled:
-            # Filled circle
-            for y in range(-radius, radius + 1):
-                for x in range(-radius, radius + 1):
-                    if x*x + y*y <= radius*radius:
-                        self.pixel(cx + x, cy + y, color)
-        else:
-            # Circle outline
-            x = radius
-            y = 0
-            err = 0
-            
-            while x >= y:
-                self.pixel(cx + x, cy + y, color)
-                self.pixel(cx + y, cy + x, color)
-                self.pixel(cx - y, cy + x, color)
-                self.pixel(cx - x, cy + y, color)
-                self.pixel(cx - x, cy - y, color)
-                self.pixel(cx - y, cy - x, color)
-                self.pixel(cx + y, cy - x, color)
-                self.pixel(cx + x, cy - y, color)
-                
-                if err <= 0:
-                    y += 1
-                    err += 2*y + 1
-                if err > 0:
-                    x -= 1
-                    err -= 2*x + 1
-    
-    def text(self, x, y, string, color, bg_color=None, scale=1):
-        """Draw text using built-in font"""
-        pos_x = x
-        for char in str(string).upper():
-            self._draw_char(pos_x, y, char, color, bg_color, scale)
-            pos_x += 6 * scale
-    
-    def _draw_char(self, x, y, char, color, bg_color=None, scale=1):
-        """Draw single character using 5x7 font"""
-        # Simple 5x7 font data
-        font_data = {
-            'A': [0x0E, 0x11, 0x11, 0x1F, 0x11, 0x11, 0x11],
-            'B': [0x1E, 0x11, 0x11, 0x1E, 0x11, 0x11, 0x1E],
-            'C': [0x0F, 0x10, 0x10, 0x10, 0x10, 0x10, 0x0F],
-            'D': [0x1E, 0x11, 0x11, 0x11, 0x11, 0x11, 0x1E],
-            'E': [0x1F, 0x10, 0x10, 0x1E, 0x10, 0x10, 0x1F],
-            'F': [0x1F, 0x10, 0x10, 0x1E, 0x10, 0x10, 0x10],
-            'G': [0x0F, 0x10, 0x10, 0x13, 0x11, 0x11, 0x0F],
-            'H': [0x11, 0x11, 0x11, 0x1F, 0x11, 0x11, 0x11],
-            'I': [0x0E, 0x04, 0x04, 0x04, 0x04, 0x04, 0x0E],
-            'J': [0x07, 0x01, 0x01, 0x01, 0x01, 0x11, 0x0E],
-            'K': [0x11, 0x12, 0x14, 0x18, 0x14, 0x12, 0x11],
-            'L': [0x10, 0x10, 0x10, 0x10, 0x10, 0x10, 0x1F],
-            'M': [0x11, 0x1B, 0x15, 0x15, 0x11, 0x11, 0x11],
-            'N': [0x11, 0x19, 0x15, 0x15, 0x13, 0x11, 0x11],
-            'O': [0x0E, 0x11, 0x11, 0x11, 0x11, 0x11, 0x0E],
-            'P': [0x1E, 0x11, 0x11, 0x1E, 0x10, 0x10, 0x10],
-            'Q': [0x0E, 0x11, 0x11, 0x11, 0x15, 0x12, 0x0D],
-            'R': [0x1E, 0x11, 0x11, 0x1E, 0x14, 0x12, 0x11],
-            'S': [0x0F, 0x10, 0x10, 0x0E, 0x01, 0x01, 0x1E],
-            'T': [0x1F, 0x04, 0x04, 0x04, 0x04, 0x04, 0x04],
-            'U': [0x11, 0x11, 0x11, 0x11, 0x11, 0x11, 0x0E],
-            'V': [0x11, 0x11, 0x11, 0x11, 0x11, 0x0A, 0x04],
-            'W': [0x11, 0x11, 0x11, 0x15, 0x15, 0x1B, 0x11],
-            'X': [0x11, 0x11, 0x0A, 0x04, 0x0A, 0x11, 0x11],
-            'Y': [0x11, 0x11, 0x0A, 0x04, 0x04, 0x04, 0x04],
-            'Z': [0x1F, 0x01, 0x02, 0x04, 0x08, 0x10, 0x1F],
-            '0': [0x0E, 0x11, 0x13, 0x15, 0x19, 0x11, 0x0E],
-            '1': [0x04, 0x0C, 0x04, 0x04, 0x04, 0x04, 0x0E],
-            '2': [0x0E, 0x11, 0x01, 0x06, 0x08, 0x10, 0x1F],
-            '3': [0x1F, 0x01, 0x02, 0x06, 0x01, 0x11, 0x0E],
-            '4': [0x02, 0x06, 0x0A, 0x12, 0x1F, 0x02, 0x02],
-            '5': [0x1F, 0x10, 0x1E, 0x01, 0x01, 0x11, 0x0E],
-            '6': [0x06, 0x08, 0x10, 0x1E, 0x11, 0x11, 0x0E],
-            '7': [0x1F, 0x01, 0x02, 0x04, 0x08, 0x10, 0x10],
-            '8': [0x0E, 0x11, 0x11, 0x0E, 0x11, 0x11, 0x0E],
-            '9': [0x0E, 0x11, 0x11, 0x0F, 0x01, 0x02, 0x0C],
-            ':': [0x00, 0x0C, 0x0C, 0x00, 0x0C, 0x0C, 0x00],
-            '.': [0x00, 0x00, 0x00, 0x00, 0x00, 0x0C, 0x0C],
-            '-': [0x00, 0x00, 0x00, 0x1F, 0x00, 0x00, 0x00],
-            '!': [0x04, 0x04, 0x04, 0x04, 0x04, 0x00, 0x04],
-            ' ': [0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00],
-            '+': [0x00, 0x04, 0x04, 0x1F, 0x04, 0x04, 0x00],
-            '/': [0x00, 0x01, 0x02, 0x04, 0x08, 0x10, 0x00],
-        }
-        
-        if char not in font_data:
-            char = ' '
-        
-        bitmap = font_data[char]
-        
-        for row in range(7):
-            for col in range(5):
-                if (bitmap[row] >> (4 - col)) & 1:
-                    # Draw foreground pixel(s)
-                    for sy in range(scale):
-                        for sx in range(scale):
-                            self.pixel(x + col * scale + sx, y + row * scale + sy, color)
-                elif bg_color is not None:
-                    # Draw background pixel(s)
-                    for sy in range(scale):
-                        for sx in range(scale):
-                            self.pixel(x + col * scale + sx, y + row * scale + sy, bg_color)
+    def _draw_char(self, x, y, char, color, bg_color=None, scale=1, font=None):
+        """Draw single character from pre-rendered glyphs; returns its advance"""
+        return self._glyph(x, y, char, color, bg_color, scale, font or self.glyphs)
     
     def set_window(self, x, y, w, h):
         """Set display window for direct writing (scanline streaming)"""
-        # M5StickC PLUS display offsets (back to original values)
-        x_offset = 52
-        y_offset = 40
-        
-        # Column address set
-        self._send_cmd(0x2A)
-        self._send_data((x_offset + x) >> 8)
-        self._send_data((x_offset + x) & 0xFF)
-        self._send_data((x_offset + x + w - 1) >> 8)
-        self._send_data((x_offset + x + w - 1) & 0xFF)
-        
-        # Row address set  
-        self._send_cmd(0x2B)
-        self._send_data((y_offset + y) >> 8)
-        self._send_data((y_offset + y) & 0xFF)
-        self._send_data((y_offset + y + h - 1) >> 8)
-        self._send_data((y_offset + y + h - 1) & 0xFF)
-        
-        # Memory write command
-        self._send_cmd(0x2C)
+        self.panel.set_window(x, y, w, h)
     
     def write(self, data):
         """Write raw data to display (for scanline streaming)"""
         if self.swap_bytes and len(data) >= 2:
             # Swap bytes if needed (like M5.Lcd.setSwapBytes)
-            swapped = bytearray(len(data))
-            for i in range(0, len(data), 2):
-                if i + 1 < len(data):
-                    swapped[i] = data[i + 1]
-                    swapped[i + 1] = data[i]
-                else:
-                    swapped[i] = data[i]
-            data = swapped
-        
-        self.cs.value(0)
-        self.dc.value(1)
-        self.spi.write(data)
-        self.cs.value(1)  # Properly end SPI transaction
-    
-    def show(self):
-        """Transfer framebuffer to display"""
-        # Set window with M5StickC PLUS offsets for framebuffer
-        self._send_cmd(0x2A)  # Column address set
-        self._send_data(52 >> 8)
-        self._send_data(52 & 0xFF)
-        self._send_data((52 + self.width - 1) >> 8)
-        self._send_data((52 + self.width - 1) & 0xFF)
+            data = bytearray(data)
+            raster.swap_bytes(data, len(data) // 2)
         
-        self._send_cmd(0x2B)  # Row address set
-        self._send_data(40 >> 8)
-        self._send_data(40 & 0xFF)
-        self._send_data((40 + self.height - 1) >> 8)
-        self._send_data((40 + self.height - 1) & 0xFF)
-        
-        self._send_cmd(0x2C)  # Memory write
-        
-        # Send framebuffer data directly (no byte swapping)
-        self.cs.value(0)
-        self.dc.value(1)
-        self.spi.write(self.framebuffer)
-        self.cs.value(1)
+        self.transport.write_data(data)
     
     def brightness(self, on=True):
         """Control display brightness"""
-        if on:
-            self.i2c.writeto_mem(0x34, 0x95, bytes([0x02]))  # Backlight ON
-        else:
-            self.i2c.writeto_mem(0x34, 0x95, bytes([0x00]))  # Backlight OFF
+        lcd.set_backlight(self.i2c, on)
     
     def draw_bitmap(self, x, y, width, height, bitmap_data):
         """Draw RGB565 bitmap image"""
@@ -320,6 +78,7 @@ class M5Display:
         if len(bitmap_data) < expected_size:
             raise ValueError(f"Bitmap data too small: got {len(bitmap_data)}, expected {expected_size}")
         
+        self.dirty.add(x, y, width, height)
         for py in range(height):
             for px in range(width):
                 screen_x = x + px
@@ -334,7 +93,7 @@ class M5Display:
                     high_byte = bitmap_data[bitmap_index + 1]
                     color = (high_byte << 8) | low_byte
                     
-                    self.pixel(screen_x, screen_y, color)
+                    self._put(screen_x, screen_y, color)
     
     def draw_bitmap_scaled(self, x, y, width, height, bitmap_data, scale_x=1, scale_y=1):
         """Draw RGB565 bitmap image with scaling"""
@@ -345,6 +104,7 @@ class M5Display:
         if len(bitmap_data) < expected_size:
             raise ValueError(f"Bitmap data too small: got {len(bitmap_data)}, expected {expected_size}")
         
+        self.dirty.add(x, y, width * scale_x, height * scale_y)
         for py in range(height):
             for px in range(width):
                 # Calculate bitmap index
@@ -362,34 +122,48 @@ class M5Display:
                         screen_y = y + py * scale_y + sy
                         
                         if 0 <= screen_x < self.width and 0 <= screen_y < self.height:
-                            self.pixel(screen_x, screen_y, color)
+                            self._put(screen_x, screen_y, color)
     
     def draw_rgb565_file(self, path, x=0, y=0, w=None, h=None):
-        """Draw RGB565 file using scanline streaming (from cheatsheet)"""
+        """Stream an RGB565 file straight to the panel.
+
+        The window is set once and the file is read in multi-row chunks
+        into a reused buffer. Big-endian files (convert_image_to_rgb565.py
+        --big-endian) go out as stored with swap_bytes=False; little-endian
+        ones are swapped in place, chunk by chunk.
+        """
         if w is None:
             w = self.width
         if h is None:
             h = self.height
             
         line_bytes = w * 2
+        buf = self._stream
+        if buf is None or len(buf) < line_bytes:
+            buf = self._stream = lcd.alloc_chunk(max(STREAM_BYTES, line_bytes) // 2, w)
         
         try:
             with open(path, 'rb') as f:
-                for row in range(h):
-                    buf = f.read(line_bytes)
-                    if not buf or len(buf) < line_bytes:
-                        break
-                    
-                    # Set window for this scanline
-                    self.set_window(x, y + row, w, 1)
-                    # Write scanline directly
-                    self.write(buf)
+                lcd.stream_rgb565(self.panel, f, x, y, w, h, buf, self.swap_bytes)
             
             return True
             
         except Exception as e:
             print(f"Error drawing RGB565 file: {e}")
             return False
+    
+    def draw_rle_file(self, path, x=0, y=0):
+        """Stream a palette + RLE image (scripts/encode_rle_image.py) to the panel"""
+        try:
+            image = RLEImage(path)
+        except (OSError, ValueError) as e:
+            print(f"Error drawing RLE image: {e}")
+            return False
+        try:
+            image.draw(self.panel, x, y)
+        finally:
+            image.close()
+        return True
 
 
 # Color constants (RGB565 format)
@@ -453,8 +227,6 @@ def save_rgb565_file(filename, bitmap_data):
 
 def hsv_to_rgb565(h, s, v):
     """Convert HSV to RGB565 (h: 0-360, s,v: 0-1)"""
-    import math
-    
     c = v * s
     x = c * (1 - abs((h / 60) % 2 - 1))
     m = v - c
@@ -0,0 +1,713 @@
+"""
+Layered ST7789 driver for the M5StickC PLUS
+A Transport (SPI + CS/DC) carries commands, a Panel owns the init table,
+offsets and rotation, and render backends (full framebuffer, band-by-band from
+a display list, or direct to the panel) draw on top; every display class in
+the firmware is built from these
+"""
+
+import time
+from machine import Pin, SPI, I2C
+
+import raster
+from dirty_rects import DirtyRects
+from glyph_cache import GlyphCache
+
+# M5StickC PLUS wiring
+SPI_ID = 1
+SCK_PIN = 13
+MOSI_PIN = 15
+CS_PIN = 5
+DC_PIN = 23
+RESET_PIN = 18
+DEFAULT_BAUDRATE = 26000000
+
+# Visible panel size in portrait orientation
+WIDTH = 135
+HEIGHT = 240
+
+AXP192_ADDR = 0x34
+
+# (command, parameters, delay in ms) sent after the hardware reset
+INIT_SEQUENCE = (
+    (0x01, None, 150),   # Software reset
+    (0x11, None, 120),   # Exit sleep mode
+    (0x3A, b"\x05", 0),  # Interface pixel format (RGB565)
+    (0x21, None, 0),     # Display inversion ON (M5StickC PLUS)
+    (0x13, None, 0),     # Normal display mode
+    (0x29, None, 50),    # Display ON
+)
+
+# Per rotation: (MADCTL, x offset, y offset, width/height swapped) for the
+# 135x240 window inside the controller's 240x320 memory
+ROTATIONS = (
+    (0x00, 52, 40, False),
+    (0x60, 40, 53, True),
+    (0xC0, 53, 40, False),
+    (0xA0, 40, 52, True),
+)
+
+# Default 5x7 font (rows of 5 bits, most significant bit leftmost)
+FONT_5X7 = {
+    'A': [0x0E, 0x11, 0x11, 0x1F, 0x11, 0x11, 0x11],
+    'B': [0x1E, 0x11, 0x11, 0x1E, 0x11, 0x11, 0x1E],
+    'C': [0x0F, 0x10, 0x10, 0x10, 0x10, 0x10, 0x0F],
+    'D': [0x1E, 0x11, 0x11, 0x11, 0x11, 0x11, 0x1E],
+    'E': [0x1F, 0x10, 0x10, 0x1E, 0x10, 0x10, 0x1F],
+    'F': [0x1F, 0x10, 0x10, 0x1E, 0x10, 0x10, 0x10],
+    'G': [0x0F, 0x10, 0x10, 0x13, 0x11, 0x11, 0x0F],
+    'H': [0x11, 0x11, 0x11, 0x1F, 0x11, 0x11, 0x11],
+    'I': [0x0E, 0x04, 0x04, 0x04, 0x04, 0x04, 0x0E],
+    'J': [0x07, 0x01, 0x01, 0x01, 0x01, 0x11, 0x0E],
+    'K': [0x11, 0x12, 0x14, 0x18, 0x14, 0x12, 0x11],
+    'L': [0x10, 0x10, 0x10, 0x10, 0x10, 0x10, 0x1F],
+    'M': [0x11, 0x1B, 0x15, 0x15, 0x11, 0x11, 0x11],
+    'N': [0x11, 0x19, 0x15, 0x15, 0x13, 0x11, 0x11],
+    'O': [0x0E, 0x11, 0x11, 0x11, 0x11, 0x11, 0x0E],
+    'P': [0x1E, 0x11, 0x11, 0x1E, 0x10, 0x10, 0x10],
+    'Q': [0x0E, 0x11, 0x11, 0x11, 0x15, 0x12, 0x0D],
+    'R': [0x1E, 0x11, 0x11, 0x1E, 0x14, 0x12, 0x11],
+    'S': [0x0F, 0x10, 0x10, 0x0E, 0x01, 0x01, 0x1E],
+    'T': [0x1F, 0x04, 0x04, 0x04, 0x04, 0x04, 0x04],
+    'U': [0x11, 0x11, 0x11, 0x11, 0x11, 0x11, 0x0E],
+    'V': [0x11, 0x11, 0x11, 0x11, 0x11, 0x0A, 0x04],
+    'W': [0x11, 0x11, 0x11, 0x15, 0x15, 0x1B, 0x11],
+    'X': [0x11, 0x11, 0x0A, 0x04, 0x0A, 0x11, 0x11],
+    'Y': [0x11, 0x11, 0x0A, 0x04, 0x04, 0x04, 0x04],
+    'Z': [0x1F, 0x01, 0x02, 0x04, 0x08, 0x10, 0x1F],
+    '0': [0x0E, 0x11, 0x13, 0x15, 0x19, 0x11, 0x0E],
+    '1': [0x04, 0x0C, 0x04, 0x04, 0x04, 0x04, 0x0E],
+    '2': [0x0E, 0x11, 0x01, 0x06, 0x08, 0x10, 0x1F],
+    '3': [0x1F, 0x01, 0x02, 0x06, 0x01, 0x11, 0x0E],
+    '4': [0x02, 0x06, 0x0A, 0x12, 0x1F, 0x02, 0x02],
+    '5': [0x1F, 0x10, 0x1E, 0x01, 0x01, 0x11, 0x0E],
+    '6': [0x06, 0x08, 0x10, 0x1E, 0x11, 0x11, 0x0E],
+    '7': [0x1F, 0x01, 0x02, 0x04, 0x08, 0x10, 0x10],
+    '8': [0x0E, 0x11, 0x11, 0x0E, 0x11, 0x11, 0x0E],
+    '9': [0x0E, 0x11, 0x11, 0x0F, 0x01, 0x02, 0x0C],
+    ':': [0x00, 0x0C, 0x0C, 0x00, 0x0C, 0x0C, 0x00],
+    '$': [0x04, 0x0F, 0x14, 0x0E, 0x05, 0x1E, 0x04],
+    '.': [0x00, 0x00, 0x00, 0x00, 0x00, 0x0C, 0x0C],
+    '-': [0x00, 0x00, 0x00, 0x1F, 0x00, 0x00, 0x00],
+    '!': [0x04, 0x04, 0x04, 0x04, 0x04, 0x00, 0x04],
+    ' ': [0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00],
+    '+': [0x00, 0x04, 0x04, 0x1F, 0x04, 0x04, 0x00],
+    '/': [0x00, 0x01, 0x02, 0x04, 0x08, 0x10, 0x00],
+}
+
+# Pixels per streamed chunk for direct-mode fills (one full row by default)
+DIRECT_CHUNK_PIXELS = WIDTH
+
+# Rows per band for BandBackend; a 135x16 band is 4.3 KB
+BAND_ROWS = 16
+
+# Display list entry kinds for BandBackend
+_FILL = 0
+_BLIT = 1
+_GLYPH = 2
+
+
+def power_on(backlight=True):
+    """Enable the AXP192 rails that feed the LCD; returns the I2C bus"""
+    i2c = I2C(0, scl=Pin(22), sda=Pin(21), freq=400000)
+    i2c.writeto_mem(AXP192_ADDR, 0x12, b"\xff")  # Enable power
+    i2c.writeto_mem(AXP192_ADDR, 0x96, b"\x84")  # Power config
+    set_backlight(i2c, backlight)
+    time.sleep_ms(200)
+    return i2c
+
+
+def set_backlight(i2c, on=True):
+    """Switch the backlight through the AXP192"""
+    i2c.writeto_mem(AXP192_ADDR, 0x95, b"\x02" if on else b"\x00")
+
+
+class _Unwired:
+    """Stand-in for a control line that is not connected (e.g. CS tied low)"""
+
+    def value(self, level=None):
+        return 0
+
+
+class Transport:
+    """SPI bus plus chip-select and data/command pins.
+
+    Command bytes go through a preallocated buffer and parameters are
+    sent with their command under one CS assertion, so register writes
+    allocate nothing.
+    """
+
+    def __init__(self, spi, cs, dc):
+        self.spi = spi
+        self.cs = _Unwired() if cs is None else cs
+        self.dc = _Unwired() if dc is None else dc
+        self._cmd = bytearray(1)
+
+    def write_cmd(self, cmd):
+        """Send a bare command byte"""
+        self._cmd[0] = cmd
+        self.cs.value(0)
+        self.dc.value(0)
+        self.spi.write(self._cmd)
+        self.cs.value(1)
+
+    def write_cmd_params(self, cmd, params):
+        """Send a command byte and its parameter block under one CS assertion"""
+        self._cmd[0] = cmd
+        self.cs.value(0)
+        self.dc.value(0)
+        self.spi.write(self._cmd)
+        self.dc.value(1)
+        self.spi.write(params)
+        self.cs.value(1)
+
+    def write_data(self, data):
+        """Send a data block under its own CS assertion"""
+        self.cs.value(0)
+        self.dc.value(1)
+        self.spi.write(data)
+        self.cs.value(1)
+
+    def begin_data(self):
+        """Start a run of write() calls streaming pixel data"""
+        self.cs.value(0)
+        self.dc.value(1)
+
+    def write(self, data):
+        self.spi.write(data)
+
+    def end(self):
+        self.cs.value(1)
+
+
+def alloc_chunk(pixels, min_pixels=32):
+    """Fill buffer of up to pixels pixels, halved until it fits in free RAM"""
+    while True:
+        try:
+            return bytearray(pixels * 2)
+        except MemoryError:
+            if pixels <= min_pixels:
+                raise
+            pixels //= 2
+
+
+def burst_fill(transport, chunk, count, color):
+    """Stream count pixels of color into the current window.
+
+    chunk is a reusable fill buffer: the color is laid down once over as
+    much of it as needed, then sent with a handful of large writes instead
+    of one write per pixel.
+    """
+    if count <= 0:
+        return
+    n = min(count, len(chunk) // 2)
+    raster.fill_span(chunk, 0, n, color)
+    block = memoryview(chunk)[:n * 2]
+    transport.begin_data()
+    for _ in range(count // n):
+        transport.write(block)
+    if count % n:
+        transport.write(block[:(count % n) * 2])
+    transport.end()
+
+
+def stream_rgb565(panel, f, x, y, w, h, buf, swap=False):
+    """Stream up to h rows of w pixels from file f into a window at (x, y).
+
+    buf is a reusable buffer of at least one row: whole rows are read
+    into it with readinto() and sent through a memoryview under one
+    window. Files are big-endian unless swap, which swaps each chunk in
+    place. Returns the rows sent (fewer if the file ends early).
+    """
+    line_bytes = w * 2
+    rows = len(buf) // line_bytes
+    chunk = memoryview(buf)
+    transport = panel.transport
+    panel.set_window(x, y, w, h)
+    transport.begin_data()
+    sent = 0
+    try:
+        while sent < h:
+            want = min(rows, h - sent) * line_bytes
+            got = f.readinto(chunk[:want]) or 0
+            got -= got % line_bytes  # Whole rows only
+            if not got:
+                break
+            if swap:
+                raster.swap_bytes(buf, got // 2)
+            transport.write(chunk[:got])
+            sent += got // line_bytes
+            if got < want:
+                break
+    finally:
+        transport.end()
+    return sent
+
+
+def m5stick_transport(baudrate=DEFAULT_BAUDRATE):
+    """Transport on the M5StickC PLUS LCD pins"""
+    spi = SPI(SPI_ID, baudrate=baudrate, sck=Pin(SCK_PIN), mosi=Pin(MOSI_PIN))
+    return Transport(spi, Pin(CS_PIN, Pin.OUT, value=1), Pin(DC_PIN, Pin.OUT, value=0))
+
+
+class Panel:
+    """ST7789 controller: initialization, rotation and address windows"""
+
+    def __init__(self, transport, reset=None, width=WIDTH, height=HEIGHT, rotation=0):
+        self.transport = transport
+        self.reset = reset
+        self.native_width = width
+        self.native_height = height
+        self._window = bytearray(4)
+        self._madctl = bytearray(1)
+        self.init()
+        self.set_rotation(rotation)
+
+    def init(self):
+        """Hardware reset, then the init table"""
+        if self.reset is not None:
+            self.reset.value(0)
+            time.sleep_ms(10)
+            self.reset.value(1)
+            time.sleep_ms(120)
+        transport = self.transport
+        for cmd, params, delay in INIT_SEQUENCE:
+            if params is None:
+                transport.write_cmd(cmd)
+            else:
+                transport.write_cmd_params(cmd, params)
+            if delay:
+                time.sleep_ms(delay)
+
+    def set_rotation(self, rotation):
+        """Rotate in 90 degree steps; width/height/offsets follow"""
+        madctl, self.x_offset, self.y_offset, swapped = ROTATIONS[rotation % 4]
+        self.rotation = rotation % 4
+        if swapped:
+            self.width, self.height = self.native_height, self.native_width
+        else:
+            self.width, self.height = self.native_width, self.native_height
+        self._madctl[0] = madctl
+        self.transport.write_cmd_params(0x36, self._madctl)  # Memory data access control
+
+    def _range(self, cmd, start, end):
+        window = self._window
+        window[0] = start >> 8
+        window[1] = start & 0xFF
+        window[2] = end >> 8
+        window[3] = end & 0xFF
+        self.transport.write_cmd_params(cmd, window)
+
+    def set_window(self, x, y, w, h):
+        """Address a w x h window at (x, y) and start a memory write"""
+        x += self.x_offset
+        y += self.y_offset
+        self._range(0x2A, x, x + w - 1)  # Column address set
+        self._range(0x2B, y, y + h - 1)  # Row address set
+        self.transport.write_cmd(0x2C)  # Memory write
+
+    def display_on(self, on=True):
+        self.transport.write_cmd(0x29 if on else 0x28)
+
+
+def m5stick_panel(rotation=0, baudrate=DEFAULT_BAUDRATE):
+    """Panel wired to the M5StickC PLUS LCD"""
+    return Panel(m5stick_transport(baudrate), Pin(RESET_PIN, Pin.OUT, value=1), rotation=rotation)
+
+
+class Backend:
+    """Drawing API shared by every render backend.
+
+    Subclasses provide pixel(), _put(), fill_rect(), blit(), clear(),
+    show() and _glyph(); lines, outlines, circles and text are built on
+    those. Colors are RGB565 and blocks big-endian.
+    """
+
+    def __init__(self, panel, font=None):
+        self.panel = panel
+        self.transport = panel.transport
+        self.width = panel.width
+        self.height = panel.height
+        font = FONT_5X7 if font is None else font
+        self.glyphs = font if isinstance(font, GlyphCache) else GlyphCache(font)
+        # Retained layout currently on screen (see widgets.Screen), None after a clear
+        self.screen = None
+
+    def _mark(self, x, y, w, h):
+        """Note that a region is about to change (framebuffer backends track it)"""
+        pass
+
+    def line(self, x0, y0, x1, y1, color):
+        """Draw line using Bresenham's algorithm (straight lines as fills)"""
+        if y0 == y1:
+            self.fill_rect(min(x0, x1), y0, abs(x1 - x0) + 1, 1, color)
+            return
+        if x0 == x1:
+            self.fill_rect(x0, min(y0, y1), 1, abs(y1 - y0) + 1, color)
+            return
+        self._mark(min(x0, x1), min(y0, y1), abs(x1 - x0) + 1, abs(y1 - y0) + 1)
+        dx = abs(x1 - x0)
+        dy = abs(y1 - y0)
+        sx = 1 if x0 < x1 else -1
+        sy = 1 if y0 < y1 else -1
+        err = dx - dy
+
+        x, y = x0, y0
+        while True:
+            self._put(x, y, color)
+            if x == x1 and y == y1:
+                break
+            e2 = 2 * err
+            if e2 > -dy:
+                err -= dy
+                x += sx
+            if e2 < dx:
+                err += dx
+                y += sy
+
+    def rect(self, x, y, width, height, color, filled=True):
+        """Draw rectangle (filled or outline)"""
+        if filled:
+            self.fill_rect(x, y, width, height, color)
+        else:
+            self.fill_rect(x, y, width, 1, color)  # Top
+            self.fill_rect(x, y + height - 1, width, 1, color)  # Bottom
+            self.fill_rect(x, y, 1, height, color)  # Left
+            self.fill_rect(x + width - 1, y, 1, height, color)  # Right
+
+    def circle(self, cx, cy, radius, color, filled=False):
+        """Draw circle using midpoint algorithm (filled circles as row spans)"""
+        if filled:
+            r2 = radius * radius
+            half = radius
+            for y in range(radius + 1):
+                while half * half + y * y > r2:
+                    half -= 1
+                self.fill_rect(cx - half, cy + y, 2 * half + 1, 1, color)
+                if y:
+                    self.fill_rect(cx - half, cy - y, 2 * half + 1, 1, color)
+            return
+
+        self._mark(cx - radius, cy - radius, 2 * radius + 1, 2 * radius + 1)
+        x = radius
+        y = 0
+        err = 0
+        while x >= y:
+            self._put(cx + x, cy + y, color)
+            self._put(cx + y, cy + x, color)
+            self._put(cx - y, cy + x, color)
+            self._put(cx - x, cy + y, color)
+            self._put(cx - x, cy - y, color)
+            self._put(cx - y, cy - x, color)
+            self._put(cx + y, cy - x, color)
+            self._put(cx + x, cy - y, color)
+
+            if err <= 0:
+                y += 1
+                err += 2 * y + 1
+            if err > 0:
+                x -= 1
+                err -= 2 * x + 1
+
+    def text(self, x, y, string, color, bg_color=None, scale=1, font=None):
+        """Draw text in the default 5x7 font or a bitmap_font.load_font() font; returns its width"""
+        font = font or self.glyphs
+        pos_x = x
+        for char in str(string):
+            pos_x += self._glyph(pos_x, y, char, color, bg_color, scale, font)
+        return pos_x - x
+
+
+class FramebufferBackend(Backend):
+    """Full-screen framebuffer; show() pushes only the dirty regions.
+
+    With a flusher (async_flush.make_flusher) show() hands the regions to
+    it and returns while they are sent; call pump() from the main loop to
+    move a cooperative flusher along, and wait() before talking to the
+    panel directly.
+    """
+
+    def __init__(self, panel, font=None, flusher=None):
+        super().__init__(panel, font)
+        self.framebuffer = bytearray(self.width * self.height * 2)
+        # Regions changed since the last show(); the panel starts out unknown
+        self.dirty = DirtyRects(self.width, self.height)
+        self.dirty.mark_all()
+        self.flusher = flusher
+
+    def clear(self, color=0x0000):
+        """Fill the framebuffer with color"""
+        raster.fill(self.framebuffer, color)
+        self.dirty.mark_all()
+        self.screen = None
+
+    def _mark(self, x, y, w, h):
+        self.dirty.add(x, y, w, h)
+
+    def pixel(self, x, y, color):
+        """Set individual pixel"""
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self.dirty.add(x, y, 1, 1)
+            self._put(x, y, color)
+
+    def _put(self, x, y, color):
+        """Set pixel without marking it dirty (callers mark their bounds once)"""
+        if 0 <= x < self.width and 0 <= y < self.height:
+            index = (y * self.width + x) * 2
+            self.framebuffer[index] = (color >> 8) & 0xFF
+            self.framebuffer[index + 1] = color & 0xFF
+
+    def fill_rect(self, x, y, w, h, color):
+        """Fill rectangle (clipped)"""
+        self.dirty.add(x, y, w, h)
+        raster.fill_rect(self.framebuffer, self.width, self.height, x, y, w, h, color)
+
+    def blit(self, x, y, w, h, block):
+        """Copy a big-endian RGB565 block into the framebuffer"""
+        self.dirty.add(x, y, w, h)
+        raster.blit(self.framebuffer, self.width, self.height, x, y, w, h, block)
+
+    def _glyph(self, x, y, char, color, bg_color, scale, font):
+        advance = font.draw(self.framebuffer, self.width, self.height, x, y, char, color, bg_color, scale)
+        self.dirty.add(x, y, advance, font.height * scale)
+        return advance
+
+    def invalidate(self):
+        """Force the next show() to push the whole framebuffer"""
+        self.dirty.mark_all()
+
+    def show(self, full=False):
+        """Transfer changed framebuffer regions to the panel.
+
+        One window per merged dirty region; full-width regions go out as a
+        single contiguous write, others as one write per row.
+        """
+        if full:
+            self.dirty.mark_all()
+        if not self.dirty:
+            return
+        if self.flusher is not None:
+            self.flusher.submit(self.framebuffer, self.width, self.dirty.take())
+            return
+        panel = self.panel
+        transport = self.transport
+        fb = memoryview(self.framebuffer)
+        row_bytes = self.width * 2
+        for x0, y0, x1, y1 in self.dirty.take():
+            panel.set_window(x0, y0, x1 - x0, y1 - y0)
+            transport.begin_data()
+            if x0 == 0 and x1 == self.width:
+                transport.write(fb[y0 * row_bytes:y1 * row_bytes])
+            else:
+                start = y0 * row_bytes + x0 * 2
+                span = (x1 - x0) * 2
+                for _ in range(y1 - y0):
+                    transport.write(fb[start:start + span])
+                    start += row_bytes
+            transport.end()
+
+    def wait(self):
+        """Block until shown regions have reached the panel"""
+        if self.flusher is not None:
+            self.flusher.wait()
+
+    def pump(self):
+        """Send the next staged region with a cooperative flusher; True while more remain"""
+        pump = getattr(self.flusher, "pump", None)
+        return pump is not None and pump()
+
+
+class DirectBackend(Backend):
+    """No framebuffer: every primitive is written straight to the panel.
+
+    Fills stream a reusable chunk of up to chunk_pixels pixels (see
+    burst_fill), so RAM use stays at a few hundred bytes by default. show() is a no-op kept for API compatibility.
+    """
+
+    def __init__(self, panel, font=None, chunk_pixels=DIRECT_CHUNK_PIXELS):
+        super().__init__(panel, font)
+        self.chunk = alloc_chunk(chunk_pixels)
+        self._pixel = bytearray(2)
+
+    def clear(self, color=0x0000):
+        """Fill the whole screen with color"""
+        self.fill_rect(0, 0, self.width, self.height, color)
+        self.screen = None
+
+    def pixel(self, x, y, color):
+        """Set individual pixel (one window per pixel; prefer fill_rect)"""
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self._pixel[0] = (color >> 8) & 0xFF
+            self._pixel[1] = color & 0xFF
+            self.panel.set_window(x, y, 1, 1)
+            self.transport.write_data(self._pixel)
+
+    _put = pixel
+
+    def fill_rect(self, x, y, w, h, color):
+        """Fill rectangle (clipped) with a few large writes"""
+        if x < 0:
+            w += x
+            x = 0
+        if y < 0:
+            h += y
+            y = 0
+        if x + w > self.width:
+            w = self.width - x
+        if y + h > self.height:
+            h = self.height - y
+        if w <= 0 or h <= 0:
+            return
+
+        self.panel.set_window(x, y, w, h)
+        burst_fill(self.transport, self.chunk, w * h, color)
+
+    def blit(self, x, y, w, h, block):
+        """Write a big-endian RGB565 block straight to the panel (clipped per row)"""
+        if x >= 0 and y >= 0 and x + w <= self.width and y + h <= self.height:
+            self.panel.set_window(x, y, w, h)
+            self.transport.write_data(block)
+            return
+        x0 = max(x, 0)
+        x1 = min(x + w, self.width)
+        y0 = max(y, 0)
+        y1 = min(y + h, self.height)
+        if x0 >= x1 or y0 >= y1:
+            return
+        src = memoryview(block)
+        span = (x1 - x0) * 2
+        offset = ((y0 - y) * w + (x0 - x)) * 2
+        self.panel.set_window(x0, y0, x1 - x0, y1 - y0)
+        transport = self.transport
+        transport.begin_data()
+        for _ in range(y1 - y0):
+            transport.write(src[offset:offset + span])
+            offset += w * 2
+        transport.end()
+
+    def _glyph(self, x, y, char, color, bg_color, scale, font):
+        if bg_color is not None:
+            block, width, advance = font.glyph(char, color, bg_color, scale)
+            self.blit(x, y, width * scale, font.height * scale, block)
+        else:
+            runs, width, advance = font.spans(char, scale)
+            for dy, dx, length in runs:
+                self.fill_rect(x + dx, y + dy, length, 1, color)
+        return advance * scale
+
+    def invalidate(self):
+        pass
+
+    def show(self, full=False):
+        pass
+
+    def wait(self):
+        pass
+
+
+class BandBackend(Backend):
+    """Framebuffer-quality drawing from a display list and one small band buffer.
+
+    Drawing calls are recorded, not rasterized. show() replays the list
+    into a band_rows-high, full-width buffer for each band that holds a
+    dirty region and streams the band with a single write, so RAM use is
+    one band (4.3 KB by default) plus the list instead of a 64.8 KB
+    framebuffer. Opaque fills and blits drop the earlier entries they
+    cover, so redrawing a widget over itself keeps the list bounded;
+    clear() starts a new one.
+    """
+
+    def __init__(self, panel, font=None, band_rows=BAND_ROWS):
+        super().__init__(panel, font)
+        # Fewer rows per band if RAM is short (at least one row)
+        self.band = alloc_chunk(self.width * band_rows, self.width)
+        self.band_rows = len(self.band) // (self.width * 2)
+        self.ops = []
+        self.dirty = DirtyRects(self.width, self.height)
+        self.clear()
+
+    def clear(self, color=0x0000):
+        """Start a new display list filled with color"""
+        self.ops = [(_FILL, 0, 0, self.width, self.height, color)]
+        self.dirty.mark_all()
+        self.screen = None
+
+    def _record(self, op):
+        x, y, w, h = op[1], op[2], op[3], op[4]
+        if x >= self.width or y >= self.height or x + w <= 0 or y + h <= 0 or w <= 0 or h <= 0:
+            return
+        if op[0] != _GLYPH:
+            # An opaque rectangle hides every earlier entry inside it
+            x1 = x + w
+            y1 = y + h
+            self.ops = [o for o in self.ops
+                        if not (x <= o[1] and y <= o[2] and o[1] + o[3] <= x1 and o[2] + o[4] <= y1)]
+        self.ops.append(op)
+        self.dirty.add(x, y, w, h)
+
+    def pixel(self, x, y, color):
+        """Set individual pixel"""
+        self._record((_FILL, x, y, 1, 1, color))
+
+    _put = pixel
+
+    def fill_rect(self, x, y, w, h, color):
+        """Fill rectangle (clipped)"""
+        self._record((_FILL, x, y, w, h, color))
+
+    def blit(self, x, y, w, h, block):
+        """Copy a big-endian RGB565 block (kept by reference until the next clear())"""
+        self._record((_BLIT, x, y, w, h, block))
+
+    def _glyph(self, x, y, char, color, bg_color, scale, font):
+        advance = font.text_width(char, scale)
+        self._record((_GLYPH, x, y, advance, font.height * scale, char, color, bg_color, scale, font))
+        return advance
+
+    def invalidate(self):
+        """Force the next show() to redraw every band"""
+        self.dirty.mark_all()
+
+    def _render(self, top, rows):
+        """Rasterize the display list into the band buffer for rows top..top+rows.
+
+        The list always starts with an opaque full-screen entry (clear()
+        or whatever covered it), so every band pixel is repainted.
+        """
+        band = self.band
+        width = self.width
+        bottom = top + rows
+        for op in self.ops:
+            y = op[2]
+            if y >= bottom or y + op[4] <= top:
+                continue
+            kind = op[0]
+            if kind == _FILL:
+                raster.fill_rect(band, width, rows, op[1], y - top, op[3], op[4], op[5])
+            elif kind == _BLIT:
+                raster.blit(band, width, rows, op[1], y - top, op[3], op[4], op[5])
+            else:
+                op[9].draw(band, width, rows, op[1], y - top, op[5], op[6], op[7], op[8])
+
+    def show(self, full=False):
+        """Redraw and send every band that holds a changed region"""
+        if full:
+            self.dirty.mark_all()
+        if not self.dirty:
+            return
+        n = self.band_rows
+        touched = bytearray((self.height + n - 1) // n)
+        for x0, y0, x1, y1 in self.dirty.take():
+            for i in range(y0 // n, (y1 - 1) // n + 1):
+                touched[i] = 1
+        band = memoryview(self.band)
+        for i in range(len(touched)):
+            if touched[i]:
+                top = i * n
+                rows = min(n, self.height - top)
+                self._render(top, rows)
+                self.panel.set_window(0, top, self.width, rows)
+                self.transport.write_data(band[:rows * self.width * 2])
+
+    def wait(self):
+        pass
@@ -0,0 +1,134 @@
+"""
+Fast raster primitives for big-endian RGB565 framebuffers
+Spans are filled by doubling copies through a memoryview and rows by slice
+assignment; on MicroPython a viper loop stores whole pixels natively
+"""
+
+try:
+    import micropython
+except ImportError:  # CPython: host tests and benchmarks use the slice path
+    micropython = None
+
+
+def _fill_span_slices(buf, start, count, color):
+    """Fill count pixels from pixel index start by repeated doubling"""
+    mv = memoryview(buf)
+    first = start * 2
+    total = count * 2
+    mv[first] = color >> 8
+    mv[first + 1] = color & 0xFF
+    filled = 2
+    while filled < total:
+        n = filled if filled < total - filled else total - filled
+        mv[first + filled:first + filled + n] = mv[first:first + n]
+        filled += n
+
+
+if micropython is not None:
+    @micropython.viper
+    def _fill_span_viper(buf, start: int, count: int, value: int):
+        # value is the pixel byte-swapped, so a little-endian 16-bit store lays down hi, lo
+        p = ptr16(buf)  # noqa: F821 (viper builtin)
+        i = start
+        end = start + count
+        while i < end:
+            p[i] = value
+            i += 1
+
+    def fill_span(buf, start, count, color):
+        """Fill count pixels of buf from pixel index start with color"""
+        if count > 0:
+            _fill_span_viper(buf, start, count, ((color & 0xFF) << 8) | ((color >> 8) & 0xFF))
+
+    @micropython.viper
+    def _swap_viper(buf, count: int):
+        p = ptr8(buf)  # noqa: F821 (viper builtin)
+        i = 0
+        end = count * 2
+        while i < end:
+            t = p[i]
+            p[i] = p[i + 1]
+            p[i + 1] = t
+            i += 2
+
+    def swap_bytes(buf, count):
+        """Byte-swap the first count pixels of buf in place (little- to big-endian)"""
+        if count > 0:
+            _swap_viper(buf, count)
+
+    ACCELERATED = True
+else:
+    def fill_span(buf, start, count, color):
+        """Fill count pixels of buf from pixel index start with color"""
+        if count > 0:
+            _fill_span_slices(buf, start, count, color)
+
+    def swap_bytes(buf, count):
+        """Byte-swap the first count pixels of buf in place (little- to big-endian)"""
+        if count > 0:
+            end = count * 2
+            buf[0:end:2], buf[1:end:2] = buf[1:end:2], buf[0:end:2]
+
+    ACCELERATED = False
+
+
+def fill(buf, color):
+    """Fill a whole framebuffer with color"""
+    fill_span(buf, 0, len(buf) // 2, color)
+
+
+def fill_rect(buf, width, height, x, y, w, h, color):
+    """Fill a rectangle, clipped to the width x height framebuffer"""
+    if x < 0:
+        w += x
+        x = 0
+    if y < 0:
+        h += y
+        y = 0
+    if x + w > width:
+        w = width - x
+    if y + h > height:
+        h = height - y
+    if w <= 0 or h <= 0:
+        return
+
+    start = y * width + x
+    if w == width:
+        # Full-width rows are one contiguous span
+        fill_span(buf, start, w * h, color)
+        return
+
+    fill_span(buf, start, w, color)
+    if h > 1:
+        # Copy the finished first row into the rows below it
+        mv = memoryview(buf)
+        first = start * 2
+        span = w * 2
+        row = mv[first:first + span]
+        stride = width * 2
+        offset = first + stride
+        for _ in range(h - 1):
+            mv[offset:offset + span] = row
+            offset += stride
+
+
+def blit(buf, width, height, x, y, w, h, src):
+    """Copy a w x h RGB565 block into the framebuffer, clipped, one slice per row"""
+    x0 = x if x > 0 else 0
+    y0 = y if y > 0 else 0
+    x1 = x + w if x + w < width else width
+    y1 = y + h if y + h < height else height
+    if x0 >= x1 or y0 >= y1:
+        return
+
+    mv = memoryview(buf)
+    src = memoryview(src)
+    span = (x1 - x0) * 2
+    offset = (y0 * width + x0) * 2
+    src_offset = ((y0 - y) * w + (x0 - x)) * 2
+    stride = width * 2
+    src_stride = w * 2
+    for _ in range(y1 - y0):
+        mv[offset:offset + span] = src[src_offset:src_offset + span]
+        offset += stride
+        src_offset += src_stride
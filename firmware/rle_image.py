@@ -0,0 +1,168 @@
+"""
+Streaming decoder for palette + RLE images built by scripts/encode_rle_image.py
+Only the header, palette and row offset table are held in RAM; rows are read
+in multi-row chunks, expanded into a small line buffer and streamed to the
+panel through one address window
+
+File layout (little-endian):
+    header   "<4sBBHHH"  magic b"IRLE", version, bits per index (1, 2, 4
+                         or 8), width, height, palette size (1-256)
+    palette  palette size big-endian RGB565 colors (panel byte order)
+    offsets  height + 1 "<I" offsets of each row's runs from the start of
+             the run data; the last is the run data size
+    runs     per row, PackBits over palette indices: a control byte c < 128
+             is followed by c + 1 literal indices packed most significant
+             bits first (whole bytes per literal run), c >= 128 by one index
+             byte repeated c - 126 times
+"""
+
+import struct
+
+import raster
+
+try:
+    import micropython
+except ImportError:  # CPython: host tools decode with the Python loop
+    micropython = None
+
+MAGIC = b"IRLE"
+VERSION = 1
+HEADER = "<4sBBHHH"
+HEADER_SIZE = 12
+
+# Bytes of expanded pixels streamed per chunk (15 full-width rows)
+LINE_BYTES = 4 * 1024
+
+
+if micropython is not None:
+    @micropython.viper
+    def _expand_viper(src, pos: int, count: int, bits: int, palette, line, out: int) -> int:
+        # 16-bit copies keep the palette's big-endian byte order
+        s = ptr8(src)  # noqa: F821 (viper builtin)
+        p = ptr16(palette)  # noqa: F821 (viper builtin)
+        d = ptr16(line)  # noqa: F821 (viper builtin)
+        mask = (1 << bits) - 1
+        x = out
+        end = out + count
+        while x < end:
+            c = s[pos]
+            pos += 1
+            if c < 128:
+                n = c + 1
+                if bits == 8:
+                    while n > 0:
+                        d[x] = p[s[pos]]
+                        pos += 1
+                        x += 1
+                        n -= 1
+                else:
+                    k = 0
+                    while k < n:
+                        bit = k * bits
+                        d[x] = p[(s[pos + (bit >> 3)] >> (8 - bits - (bit & 7))) & mask]
+                        x += 1
+                        k += 1
+                    pos += (n * bits + 7) >> 3
+            else:
+                n = c - 126
+                v = p[s[pos]]
+                pos += 1
+                while n > 0:
+                    d[x] = v
+                    x += 1
+                    n -= 1
+        return pos
+
+    def expand_row(src, pos, count, bits, palette, line, out):
+        """Expand count pixels of runs at src[pos] into line from pixel out; returns the next pos"""
+        return _expand_viper(src, pos, count, bits, palette, line, out)
+else:
+    def expand_row(src, pos, count, bits, palette, line, out):
+        """Expand count pixels of runs at src[pos] into line from pixel out; returns the next pos"""
+        mask = (1 << bits) - 1
+        x = out
+        end = out + count
+        while x < end:
+            c = src[pos]
+            pos += 1
+            if c < 128:
+                for bit in range(0, (c + 1) * bits, bits):
+                    i = 2 * ((src[pos + (bit >> 3)] >> (8 - bits - (bit & 7))) & mask)
+                    line[2 * x:2 * x + 2] = palette[i:i + 2]
+                    x += 1
+                pos += ((c + 1) * bits + 7) >> 3
+            else:
+                i = 2 * src[pos]
+                pos += 1
+                raster.fill_span(line, x, c - 126, (palette[i] << 8) | palette[i + 1])
+                x += c - 126
+        return pos
+
+
+class RLEImage:
+    """Palette + RLE image streamed from a file.
+
+    source is a path, or an open file (e.g. an AssetPack's) holding the
+    image at offset; a file passed in is shared and left open by close().
+    """
+
+    def __init__(self, source, offset=0):
+        self._owned = isinstance(source, str)
+        self._file = open(source, "rb") if self._owned else source
+        self._file.seek(offset)
+        magic, version, self.bits, self.width, self.height, colors = \
+            struct.unpack(HEADER, self._file.read(HEADER_SIZE))
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError("not an RLE image: " + (source if self._owned else str(offset)))
+        self.palette = self._file.read(colors * 2)
+        self._offsets = self._file.read((self.height + 1) * 4)
+        self._runs = offset + HEADER_SIZE + colors * 2 + (self.height + 1) * 4
+
+    def _offset(self, row):
+        return struct.unpack_from("<I", self._offsets, row * 4)[0]
+
+    def draw(self, panel, x=0, y=0, row=0, rows=None):
+        """Stream rows row..row+rows (all by default) to the panel at (x, y)"""
+        width = self.width
+        if rows is None:
+            rows = self.height - row
+        rows = min(rows, self.height - row)
+        if width <= 0 or rows <= 0:
+            return
+        per_chunk = max(1, LINE_BYTES // (width * 2))
+        line = bytearray(per_chunk * width * 2)
+        # Worst case for PackBits: every pixel literal plus a control byte per 128
+        src = bytearray(per_chunk * (width + (width + 127) // 128))
+        src_view = memoryview(src)
+        line_view = memoryview(line)
+        transport = panel.transport
+
+        panel.set_window(x, y, width, rows)
+        transport.begin_data()
+        try:
+            end = row + rows
+            while row < end:
+                n = min(per_chunk, end - row)
+                start = self._offset(row)
+                self._file.seek(self._runs + start)
+                self._file.readinto(src_view[:self._offset(row + n) - start])
+                pos = 0
+                for i in range(n):
+                    pos = expand_row(src, pos, width, self.bits, self.palette, line, i * width)
+                transport.write(line_view[:n * width * 2])
+                row += n
+        finally:
+            transport.end()
+
+    def close(self):
+        if self._owned:
+            self._file.close()
+
+
+def load_image(path):
+    """RLEImage for the file at path, or None when it isn't on the device"""
+    try:
+        return RLEImage(path)
+    except OSError:
+        return None
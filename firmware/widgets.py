@@ -0,0 +1,131 @@
+"""
+Retained-mode widgets for the framebuffer monitor screens
+A Screen is a fixed layout of widgets, each with bounds and the last value it
+drew; render() only re-rasterizes widgets whose bound value changed
+"""
+
+_UNSET = object()
+
+# 5x5 activity indicators: filled while coding, hollow while idle
+ACTIVITY_ICONS = {
+    "active": (".###.", "#####", "#####", "#####", ".###."),
+    "idle": (".###.", "#...#", "#...#", "#...#", ".###."),
+}
+
+
+class Widget:
+    """Base widget: a screen box that redraws itself when its value changes"""
+
+    def __init__(self, x, y, w, h, key=None, value=None):
+        self.x = x
+        self.y = y
+        self.w = w
+        self.h = h
+        self.key = key  # None for static decoration drawn once per invalidate
+        self.value = value
+        self.drawn = _UNSET
+
+    def update(self, display, value):
+        """Draw value if it differs from what is on screen; True when redrawn"""
+        if value == self.drawn:
+            return False
+        self.draw(display, value)
+        self.drawn = value
+        return True
+
+    def draw(self, display, value):
+        raise NotImplementedError
+
+
+class Bar(Widget):
+    """Filled rectangle; the value is its color"""
+
+    def draw(self, display, color):
+        display.fill_rect(self.x, self.y, self.w, self.h, color)
+
+
+class Label(Widget):
+    """Text on a background box.
+
+    The value is either the text or a (text, fg, bg) tuple for labels
+    whose colors follow their state. The whole box is repainted so a
+    shorter string never leaves stale characters behind. font is a
+    bitmap_font.load_font() result, or None for the display's 5x7 font.
+    """
+
+    def __init__(self, x, y, w, h, fg, bg, key=None, value=None, pad_x=0, pad_y=0, font=None):
+        super().__init__(x, y, w, h, key, value)
+        self.fg = fg
+        self.bg = bg
+        self.pad_x = pad_x
+        self.pad_y = pad_y
+        self.font = font
+
+    def draw(self, display, value):
+        fg, bg = self.fg, self.bg
+        if isinstance(value, tuple):
+            value, fg, bg = value
+        display.fill_rect(self.x, self.y, self.w, self.h, bg)
+        display.text(self.x + self.pad_x, self.y + self.pad_y, value, fg, bg, 1, self.font)
+
+
+class ProgressBar(Widget):
+    """Horizontal bar on a track; the value is (percent, color)"""
+
+    def __init__(self, x, y, w, h, track, key=None, value=None):
+        super().__init__(x, y, w, h, key, value)
+        self.track = track
+
+    def draw(self, display, value):
+        percent, color = value
+        filled = self.w * min(100, max(0, percent)) // 100
+        display.fill_rect(self.x + filled, self.y, self.w - filled, self.h, self.track)
+        if filled:
+            display.fill_rect(self.x, self.y, filled, self.h, color)
+
+
+class Icon(Widget):
+    """1bpp bitmap from an icon set of equally sized '#'/'.' rows; the value is (name, fg)"""
+
+    def __init__(self, x, y, icons, bg, key=None, value=None):
+        rows = icons[next(iter(icons))]
+        super().__init__(x, y, len(rows[0]), len(rows), key, value)
+        self.icons = icons
+        self.bg = bg
+
+    def draw(self, display, value):
+        name, fg = value
+        for row, bits in enumerate(self.icons[name]):
+            for col in range(self.w):
+                display.pixel(self.x + col, self.y + row, fg if bits[col] == "#" else self.bg)
+
+
+class Screen:
+    """Declarative layout of widgets sharing one background color"""
+
+    def __init__(self, widgets, bg=0x0000):
+        self.widgets = widgets
+        self.bg = bg
+
+    def invalidate(self):
+        """Forget what is on screen so the next render() redraws everything"""
+        for widget in self.widgets:
+            widget.drawn = _UNSET
+
+    def render(self, display, values):
+        """Bring the framebuffer up to date with values (a key -> value dict).
+
+        If another screen was drawn since, the framebuffer is cleared and
+        every widget repainted; otherwise only changed widgets are drawn.
+        Returns the number of widgets redrawn.
+        """
+        if display.screen is not self:
+            display.clear(self.bg)
+            self.invalidate()
+            display.screen = self
+        redrawn = 0
+        for widget in self.widgets:
+            value = widget.value if widget.key is None else values[widget.key]
+            if widget.update(display, value):
+                redrawn += 1
+        return redrawn
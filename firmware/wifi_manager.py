@@ -135,6 +135,64 @@ class WiFiManager:
         finally:
             gc.collect()
     
+    def http_stream(self, url, timeout=45):
+        """Open a Server-Sent Events stream (e.g. /events) on one long-lived socket"""
+        if not self.is_connected():
+            return None
+            
+        try:
+            # Parse URL
+            if url.startswith('http://'):
+                url = url[7:]
+            elif url.startswith('https://'):
+                print("HTTPS not supported, use HTTP")
+                return None
+                
+            if '/' in url:
+                host, path = url.split('/', 1)
+                path = '/' + path
+            else:
+                host = url
+                path = '/'
+                
+            if ':' in host:
+                host, port = host.split(':')
+                port = int(port)
+            else:
+                port = 80
+            
+            # Create socket; timeout must exceed the server heartbeat interval
+            addr = socket.getaddrinfo(host, port)[0][-1]
+            s = socket.socket()
+            s.settimeout(timeout)
+            
+            # Connect and send request (connection stays open). HTTP/1.0 keeps the
+            # server from chunking the body, so it is the raw event stream until close
+            s.connect(addr)
+            request = f"GET {path} HTTP/1.0\r\nHost: {host}\r\nAccept: text/event-stream\r\n\r\n"
+            s.send(request.encode())
+            
+            # Read status line and headers
+            status = s.readline()
+            if b' 200 ' not in status:
+                print(f"HTTP Error: {status.decode().strip()}")
+                s.close()
+                return None
+            while True:
+                line = s.readline()
+                if not line or line == b'\r\n':
+                    break
+                if line.lower().startswith(b'transfer-encoding:') and b'chunked' in line.lower():
+                    print("HTTP stream error: chunked response not supported")
+                    s.close()
+                    return None
+            
+            return EventStream(s)
+                
+        except Exception as e:
+            print(f"HTTP stream error: {e}")
+            return None
+    
     def http_post(self, url, data, content_type="application/json", timeout=10):
         """Simple HTTP POST request"""
         if not self.is_connected():
@@ -227,3 +285,55 @@ class WiFiManager:
             return duration
         except:
             return None
+
+
+
+class EventStream:
+    """Reader for a Server-Sent Events response"""
+    
+    def __init__(self, sock):
+        self.sock = sock
+        self.last_id = None
+        
+    def read_event(self):
+        """Block until the next event; returns (event, data) or None once the stream closes.
+        Raises OSError if nothing (not even a heartbeat) arrives within the socket timeout."""
+        event = 'message'
+        data = []
+        while True:
+            line = self.sock.readline()
+            if not line:
+                return None
+            line = line.rstrip(b'\r\n')
+            
+            if not line:
+                # Blank line dispatches the event
+                if data:
+                    return event, '\n'.join(data)
+                event = 'message'
+                continue
+            if line[0] == 0x3A:  # ':' comment / heartbeat
+                continue
+            
+            sep = line.find(b':')
+            if sep < 0:
+                field, value = line, b''
+            else:
+                field, value = line[:sep], line[sep + 1:]
+                if value[:1] == b' ':
+                    value = value[1:]
+            
+            if field == b'data':
+                data.append(value.decode())
+            elif field == b'event':
+                event = value.decode()
+            elif field == b'id':
+                self.last_id = value.decode()
+                
+    def close(self):
+        """Close the underlying socket"""
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+        gc.collect()
\ No newline at end of file
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Host benchmark for the background framebuffer flush
+Runs lcd.FramebufferBackend against the mock SPI bus at the device's 26 MHz,
+timing how long show() blocks the main loop with and without a flusher, then
+checks every variant leaves the same image in panel memory
+The mock bus sleeps through the wire time, which releases the GIL, so the
+threaded numbers are a best case; on the device they hold only if SPI.write
+releases it too
+"""
+
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.join(HERE, "..", "firmware"))
+
+import mock_spi  # noqa: E402
+
+BAUDRATE = 26000000
+FRAMES = 30
+APP_WORK_MS = 5  # Button polling, alert tones, network between frames
+
+
+def draw_frame(display, n):
+    """A monitor-like tick: clock, session line, progress bar and a full redraw every 10 frames"""
+    if n % 10 == 0:
+        display.clear(0x0000)
+        display.fill_rect(0, 0, display.width, 20, 0x001F)
+        display.text(15, 5, "CLAUDE PRO SESSION", 0xFFFF, 0x001F)
+    display.fill_rect(25, 25, 85, 15, 0x2104)
+    display.text(40, 30, f"12:{n % 60:02d}", 0x07FF, 0x2104)
+    display.fill_rect(2, 48, 131, 12, 0x1082)
+    display.text(5, 50, f"SESSION: 00H00M{n % 60:02d}S", 0xFFFF, 0x1082)
+    display.fill_rect(5, 142, 115, 6, 0x2104)
+    display.fill_rect(5, 142, n * 115 // FRAMES, 6, 0x07E0)
+
+
+def app_work(display, ms):
+    """Stand-in for the rest of the main loop; a cooperative flusher is pumped meanwhile"""
+    deadline = time.perf_counter() + ms / 1000
+    pump = getattr(display.flusher, "pump", None)
+    while time.perf_counter() < deadline:
+        if pump is None or not pump():
+            time.sleep(0.0005)
+
+
+def run(make_flusher, timed):
+    """(seconds show() blocked on ticks, on full redraws, wall seconds, bus seconds, panel image)"""
+    bus = mock_spi.install(BAUDRATE if timed else None, decode=not timed)
+    import lcd
+
+    panel = lcd.m5stick_panel()
+    display = lcd.FramebufferBackend(panel, flusher=make_flusher(panel) if make_flusher else None)
+    bus.busy_s = 0.0
+    blocked = [0.0, 0.0]
+    start = time.perf_counter()
+    for n in range(FRAMES):
+        draw_frame(display, n)
+        t = time.perf_counter()
+        display.show()
+        blocked[n % 10 == 0] += time.perf_counter() - t
+        app_work(display, APP_WORK_MS if timed else 0)
+    display.wait()
+    total = time.perf_counter() - start
+    image = bus.region(panel.x_offset, panel.y_offset, panel.width, panel.height)
+    return blocked[0], blocked[1], total, bus.busy_s, image
+
+
+def main():
+    import async_flush
+
+    variants = (
+        ("synchronous", None),
+        ("threaded", async_flush.ThreadedFlusher),
+        ("cooperative", async_flush.CooperativeFlusher),
+    )
+    print(f"{FRAMES} frames at {BAUDRATE // 1000000} MHz, {APP_WORK_MS} ms of app work per frame")
+    print("Time show() blocks the main loop, summed over steady ticks and full redraws")
+    print(f"{'flush':<12} {'ticks':>9} {'redraws':>9} {'wall time':>10} {'bus time':>9}")
+    for name, flusher in variants:
+        ticks, redraws, total, busy, _ = run(flusher, timed=True)
+        print(f"{name:<12} {ticks * 1000:>6.1f} ms {redraws * 1000:>6.1f} ms "
+              f"{total * 1000:>7.1f} ms {busy * 1000:>6.1f} ms")
+
+    reference = run(None, timed=False)[-1]
+    for name, flusher in variants[1:]:
+        if run(flusher, timed=False)[-1] != reference:
+            print(f"{name}: panel image differs from the synchronous flush")
+            sys.exit(1)
+    print("Panel images identical")
+
+
+if __name__ == "__main__":
+    main()
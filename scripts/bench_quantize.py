@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Host benchmark for the RGB565 quantization modes
+Times truncation, Bayer and Floyd-Steinberg dithering on a batch of volcano
+images and a sky gradient, and reports PSNR (plain and after a 3x3 blur, closer
+to how dither patterns look on the panel) plus .rle size per palette size
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+from convert_image_to_rgb565 import fit_image
+from encode_rle_image import encode, index_colors
+from quantize import expand, floyd_steinberg, ordered, psnr, quantize_rgb565
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PHOTOS = ("volcano-portrait.gif", "volcano-landscape.png")
+WIDTH = 135
+HEIGHT = 240
+BATCH = 32
+
+RGB565_MODES = (
+    ("truncate", lambda rgb: quantize_rgb565(rgb)),
+    ("bayer 4x4", lambda rgb: ordered(rgb, 4)),
+    ("bayer 8x8", lambda rgb: ordered(rgb, 8)),
+    ("floyd-steinberg", floyd_steinberg),
+)
+PALETTE_SIZES = (256, 64, 16)
+PALETTE_DITHERS = ("none", "bayer", "floyd-steinberg")
+
+
+def sky_gradient():
+    """Dusk sky like the volcano backdrops: slow vertical ramps that band when truncated"""
+    t = np.linspace(0, 1, HEIGHT, dtype=np.float32)[:, None]
+    rgb = np.empty((HEIGHT, WIDTH, 3), dtype=np.float32)
+    rgb[..., 0] = 40 + 90 * t
+    rgb[..., 1] = 60 + 40 * t
+    rgb[..., 2] = 150 - 70 * t
+    return Image.fromarray(rgb.astype(np.uint8), "RGB")
+
+
+def load_images():
+    images = [("sky gradient", sky_gradient())]
+    for name in PHOTOS:
+        with Image.open(os.path.join(HERE, "..", "photos", name)) as img:
+            images.append((name, fit_image(img, WIDTH, HEIGHT)))
+    return images
+
+
+def blur(rgb):
+    """3x3 box blur of an 8-bit RGB array"""
+    padded = np.pad(np.asarray(rgb, dtype=np.float32), ((1, 1), (1, 1), (0, 0)), mode="edge")
+    h, w = rgb.shape[:2]
+    return sum(padded[dy:dy + h, dx:dx + w] for dy in range(3) for dx in range(3)) / 9
+
+
+def main():
+    images = load_images()
+    arrays = [np.asarray(img) for _, img in images]
+    batch = np.stack([arrays[i % len(arrays)] for i in range(BATCH)])
+    megapixels = BATCH * WIDTH * HEIGHT / 1e6
+
+    print(f"RGB565 quantization, batch of {BATCH} {WIDTH}x{HEIGHT} images")
+    names = "".join(f" {name[:14]:>14}" for name, _ in images)
+    print(f"{'mode':<16} {'Mpixel/s':>9}  PSNR / blurred PSNR (dB):{names}")
+    for mode, quantize in RGB565_MODES:
+        start = time.perf_counter()
+        quantize(batch)
+        rate = megapixels / (time.perf_counter() - start)
+        scores = ""
+        for rgb in arrays:
+            shown = expand(quantize(rgb))
+            scores += f" {psnr(rgb, shown):6.2f}/{psnr(blur(rgb), blur(shown)):6.2f}"
+        print(f"{mode:<16} {rate:9.2f}  {' ' * 24}{scores}")
+
+    print()
+    print("Palette + RLE assets (bytes, PSNR / blurred PSNR in dB)")
+    print(f"{'colors':<7} {'dither':<16}{names}")
+    for colors in PALETTE_SIZES:
+        for dither in PALETTE_DITHERS:
+            cells = ""
+            for (_, img), rgb in zip(images, arrays):
+                palette, indices = index_colors(img, colors, dither)
+                size = len(encode(WIDTH, HEIGHT, palette, indices))
+                shown = expand(np.array(palette, dtype=np.uint16)[np.frombuffer(indices, dtype=np.uint8)])
+                shown = shown.reshape(HEIGHT, WIDTH, 3)
+                cells += f" {size:>5} {psnr(rgb, shown):5.1f}/{psnr(blur(rgb), blur(shown)):4.1f}"
+            print(f"{colors:<7} {dither:<16}{cells}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
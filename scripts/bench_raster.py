@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Host benchmark for the firmware raster fast path
+Times firmware/raster.py's slice-based fills and byte swap against the
+per-pixel loops the display classes used before, and checks both produce identical framebuffers
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "firmware"))
+
+import raster  # noqa: E402
+
+WIDTH = 135
+HEIGHT = 240
+
+# (name, x, y, w, h) rectangles drawn by the monitor screens
+RECTS = (
+    ("full screen", 0, 0, WIDTH, HEIGHT),
+    ("header bar", 0, 0, WIDTH, 20),
+    ("status box", 2, 68, 131, 12),
+    ("clock box", 25, 25, 85, 15),
+    ("progress bar", 5, 142, 115, 6),
+    ("clipped", -10, 230, 40, 30),
+)
+
+
+def reference_clear(buf, color):
+    """The old per-byte clear loop"""
+    high = (color >> 8) & 0xFF
+    low = color & 0xFF
+    for i in range(0, len(buf), 2):
+        buf[i] = high
+        buf[i + 1] = low
+
+
+def reference_fill_rect(buf, x, y, w, h, color):
+    """The old per-pixel fill via set_pixel"""
+    for py in range(y, min(y + h, HEIGHT)):
+        for px in range(x, min(x + w, WIDTH)):
+            if 0 <= px < WIDTH and 0 <= py < HEIGHT:
+                idx = (py * WIDTH + px) * 2
+                buf[idx] = (color >> 8) & 0xFF
+                buf[idx + 1] = color & 0xFF
+
+
+def reference_swap(data):
+    """The old per-pixel byte swap in M5Display.write()"""
+    swapped = bytearray(len(data))
+    for i in range(0, len(data), 2):
+        swapped[i] = data[i + 1]
+        swapped[i + 1] = data[i]
+    return swapped
+
+
+def swap_copy(data):
+    swapped = bytearray(data)
+    raster.swap_bytes(swapped, len(swapped) // 2)
+    return swapped
+
+
+def timed(func, repeat):
+    """Best-of-three mean seconds per call"""
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        best = min(best, (time.perf_counter() - start) / repeat)
+    return best
+
+
+def report(name, old, new):
+    print(f"{name:<14} {old * 1000:9.3f} ms {new * 1000:9.3f} ms {old / new:8.1f}x")
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    color = 0x2104
+    old = bytearray(WIDTH * HEIGHT * 2)
+    new = bytearray(WIDTH * HEIGHT * 2)
+
+    print(f"{'primitive':<14} {'per-pixel':>12} {'raster':>12} {'speedup':>9}")
+    reference_clear(old, color)
+    raster.fill(new, color)
+    assert old == new, "clear output differs"
+    report("clear", timed(lambda: reference_clear(old, color), repeat),
+           timed(lambda: raster.fill(new, color), repeat))
+
+    for name, x, y, w, h in RECTS:
+        reference_fill_rect(old, x, y, w, h, 0xF800)
+        raster.fill_rect(new, WIDTH, HEIGHT, x, y, w, h, 0xF800)
+        assert old == new, f"{name} output differs"
+        report(name, timed(lambda: reference_fill_rect(old, x, y, w, h, 0xF800), repeat),
+               timed(lambda: raster.fill_rect(new, WIDTH, HEIGHT, x, y, w, h, 0xF800), repeat))
+
+    image = bytes(range(256)) * (len(old) // 256) + bytes(len(old) % 256)
+    assert reference_swap(image) == swap_copy(image), "byte swap output differs"
+    report("byte swap", timed(lambda: reference_swap(image), repeat),
+           timed(lambda: swap_copy(image), repeat))
+
+    print("All outputs identical")
+
+
+if __name__ == "__main__":
+    main()
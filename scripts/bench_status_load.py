@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Load benchmark for the status server's fan-out paths
+Simulates a fleet of M5StickC clients (streaming, long-polling and plain
+polling) against standalone_server's aiohttp app and reports p50/p99 latency
+"""
+
+import asyncio
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+import aiohttp
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+PORT = 8765
+
+
+def run_server():
+    """Serve standalone_server's app in a separate process"""
+    sys.path.insert(0, ROOT)
+    import logging
+    logging.disable(logging.CRITICAL)
+    from aiohttp import web
+    import standalone_server
+
+    async def make_app():
+        return await standalone_server.create_app()
+
+    web.run_app(make_app(), host="127.0.0.1", port=PORT, print=None, access_log=None)
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile in milliseconds"""
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index] * 1000
+
+
+async def streamer(session, index, received, ready):
+    """Hold /events open and timestamp every event id"""
+    async with session.get(f"http://127.0.0.1:{PORT}/events?device=stream-{index}") as response:
+        ready.release()
+        async for line in response.content:
+            if line.startswith(b"id: "):
+                received.append((int(line[4:]), time.perf_counter()))
+
+
+async def long_poller(session, index, received, ready, stop):
+    """Loop on /status?since=&wait= and timestamp each version change"""
+    url = f"http://127.0.0.1:{PORT}/status?device=lp-{index}"
+    async with session.get(url) as response:
+        version = (await response.json())["version"]
+    ready.release()
+    while not stop.is_set():
+        async with session.get(f"{url}&since={version}&wait=30") as response:
+            data = await response.json()
+        if data["version"] != version:
+            version = data["version"]
+            received.append((version, time.perf_counter()))
+
+
+async def poller(session, index, latencies, ready, stop, interval):
+    """Plain conditional polling with If-None-Match"""
+    url = f"http://127.0.0.1:{PORT}/status?device=poll-{index}"
+    etag = None
+    ready.release()
+    while not stop.is_set():
+        headers = {"If-None-Match": etag} if etag else {}
+        start = time.perf_counter()
+        async with session.get(url, headers=headers) as response:
+            await response.read()
+            etag = response.headers.get("ETag", etag)
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(interval)
+
+
+async def run_benchmark(clients, changes):
+    connector = aiohttp.TCPConnector(limit=0)
+    timeout = aiohttp.ClientTimeout(total=None, sock_read=60)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        base_url = f"http://127.0.0.1:{PORT}"
+        async with session.get(f"{base_url}/status") as response:
+            base_version = (await response.json())["version"]
+
+        streams, polls = clients * 2 // 5, clients * 2 // 5
+        plain = clients - streams - polls
+        ready = asyncio.Semaphore(0)
+        stop = asyncio.Event()
+        stream_events, poll_events, poll_latencies = [], [], []
+
+        tasks = [asyncio.create_task(streamer(session, i, stream_events, ready)) for i in range(streams)]
+        tasks += [asyncio.create_task(long_poller(session, i, poll_events, ready, stop)) for i in range(polls)]
+        tasks += [asyncio.create_task(poller(session, i, poll_latencies, ready, stop, 1.0)) for i in range(plain)]
+        for _ in range(clients):
+            await ready.acquire()
+        print(f"{streams} streaming, {polls} long-polling, {plain} polling clients connected")
+
+        # Drive state changes and remember when each version was published
+        published = {}
+        for change in range(changes):
+            published[base_version + change + 1] = time.perf_counter()
+            async with session.post(f"{base_url}/set_alert", json={"pending": change % 2 == 0}) as response:
+                await response.read()
+            await asyncio.sleep(0.25)
+        await asyncio.sleep(1.0)
+
+        stop.set()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def delivery(events):
+        return [t - published[v] for v, t in events if v in published]
+
+    print(f"\n{'path':<22}{'samples':>9}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, samples in (("stream delivery", delivery(stream_events)),
+                          ("long-poll wake", delivery(poll_events)),
+                          ("poll request", poll_latencies)):
+        print(f"{name:<22}{len(samples):>9}{percentile(samples, 50):>10.1f}{percentile(samples, 99):>10.1f}")
+
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    changes = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    # Each client needs a socket on both ends
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, max(soft, clients * 3 + 256)), hard))
+
+    server = multiprocessing.Process(target=run_server, daemon=True)
+    server.start()
+    time.sleep(1.5)
+    try:
+        asyncio.run(run_benchmark(clients, changes))
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Bitmap font builder for the M5StickC PLUS firmware
+Rasterizes a TTF/OTF, BDF or PCF font with Pillow into the packed font format
+that firmware/bitmap_font.py reads glyph by glyph from flash
+"""
+
+import argparse
+import os
+import struct
+import sys
+import tempfile
+
+from PIL import BdfFontFile, Image, ImageDraw, ImageFont, PcfFontFile
+
+MAGIC = b"MFNT"
+VERSION = 1
+HEADER = "<4sBBBBHH"
+ENTRY = "<HBBI"
+
+DEFAULT_CHARS = "".join(chr(code) for code in range(32, 127))
+
+
+def load_font(path, size):
+    """Pillow font for a scalable font file or a BDF/PCF bitmap font"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".bdf", ".pcf"):
+        reader = BdfFontFile.BdfFontFile if extension == ".bdf" else PcfFontFile.PcfFontFile
+        with open(path, "rb") as fp:
+            font_file = reader(fp)
+        with tempfile.TemporaryDirectory() as tmp:
+            base = os.path.join(tmp, "font")
+            font_file.save(base)  # Writes font.pil + font.pbm
+            font = ImageFont.load(base + ".pil")
+            font.getbbox("A")  # Force the bitmap into memory before tmp goes away
+            return font
+    return ImageFont.truetype(path, size)
+
+
+def rasterize(font, chars, threshold):
+    """(height, baseline, glyphs) with glyphs as (code point, width, advance, packed rows)"""
+    boxes = {char: font.getbbox(char) for char in chars}
+    top = min(box[1] for box in boxes.values())
+    bottom = max(box[3] for box in boxes.values())
+    height = bottom - top
+    ascent = font.getmetrics()[0] if hasattr(font, "getmetrics") else bottom
+    if height > 255:
+        raise ValueError(f"Font too tall for the format: {height} px")
+
+    glyphs = []
+    for char in chars:
+        right = boxes[char][2]
+        try:
+            advance = round(font.getlength(char))
+        except AttributeError:
+            advance = right + 1
+        width = max(right, 0)
+        if width > 255 or advance > 255:
+            raise ValueError(f"Glyph {char!r} too wide for the format")
+
+        row_bytes = (width + 7) // 8
+        packed = bytearray()
+        if width:
+            image = Image.new("L", (width, height), 0)
+            ImageDraw.Draw(image).text((0, -top), char, font=font, fill=255)
+            pixels = image.load()
+            shift = row_bytes * 8 - width
+            for y in range(height):
+                bits = 0
+                for x in range(width):
+                    bits = (bits << 1) | (pixels[x, y] >= threshold)
+                packed += (bits << shift).to_bytes(row_bytes, "big")
+        glyphs.append((ord(char), width, advance, bytes(packed)))
+    return height, max(0, ascent - top), glyphs
+
+
+def pack(height, baseline, glyphs, default_char="?"):
+    """Serialize glyphs into the packed font format"""
+    glyphs = sorted(glyphs)
+    codes = [glyph[0] for glyph in glyphs]
+    default = ord(default_char) if ord(default_char) in codes else codes[0]
+
+    header = struct.pack(HEADER, MAGIC, VERSION, height, baseline, 0, len(glyphs), default)
+    offset = len(header) + len(glyphs) * struct.calcsize(ENTRY)
+    index = bytearray()
+    data = bytearray()
+    for code, width, advance, rows in glyphs:
+        index += struct.pack(ENTRY, code, width, advance, offset + len(data))
+        data += rows
+    return header + index + data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a packed bitmap font for the firmware")
+    parser.add_argument("font", help="TTF/OTF, BDF or PCF font file")
+    parser.add_argument("output", help="Font file to write (e.g. firmware/clock.fnt)")
+    parser.add_argument("--size", type=int, default=12, help="Pixel size for scalable fonts")
+    parser.add_argument("--chars", default=DEFAULT_CHARS, help="Characters to include (default: printable ASCII)")
+    parser.add_argument("--threshold", type=int, default=128, help="Gray level at which a pixel is set")
+    args = parser.parse_args()
+
+    chars = "".join(sorted(set(args.chars)))
+    try:
+        font = load_font(args.font, args.size)
+        height, baseline, glyphs = rasterize(font, chars, args.threshold)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    data = pack(height, baseline, glyphs)
+    with open(args.output, "wb") as f:
+        f.write(data)
+    print(f"Wrote {args.output}: {len(glyphs)} glyphs, {height} px high, {len(data)} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Batch asset converter for the M5StickC PLUS firmware
+Converts image files or whole directories to raw RGB565 (either byte order) or
+palette + RLE assets in a process pool, skipping assets whose source and
+settings are unchanged since the last run
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+
+from convert_image_to_rgb565 import fit_image
+from encode_rle_image import encode, index_colors
+from quantize import DITHERS, quantize_rgb565
+
+IMAGE_EXTENSIONS = (".png", ".gif", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp")
+
+# Output file suffix per format
+SUFFIXES = {"le": ".rgb565", "be": "-be.rgb565", "rle": ".rle"}
+
+# Manifest in the output directory: output name -> cache key of what produced it
+CACHE_FILE = ".asset_cache.json"
+
+# Bumped whenever the converters' output changes, invalidating every cache entry
+CACHE_VERSION = 1
+
+
+def find_images(paths):
+    """(source path, name relative to its input root) for every image under paths"""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in sorted(files):
+                    if name.lower().endswith(IMAGE_EXTENSIONS):
+                        source = os.path.join(root, name)
+                        found.append((source, os.path.relpath(source, path)))
+        else:
+            found.append((path, os.path.basename(path)))
+    return found
+
+
+def output_name(relative, fmt):
+    return os.path.splitext(relative)[0] + SUFFIXES[fmt]
+
+
+def cache_key(source, settings):
+    """Hash of the source bytes and everything that shapes the output"""
+    digest = hashlib.sha256()
+    with open(source, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    digest.update(json.dumps([CACHE_VERSION, settings], sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def convert(source, settings):
+    """Asset bytes for one source image"""
+    with Image.open(source) as img:
+        img = fit_image(img, settings["width"], settings["height"], settings["crop"])
+    if settings["format"] == "rle":
+        palette, indices = index_colors(img, settings["colors"], settings["dither"])
+        return encode(settings["width"], settings["height"], palette, indices)
+    values = quantize_rgb565(img, settings["dither"])
+    return values.astype(">u2" if settings["format"] == "be" else "<u2").tobytes()
+
+
+def convert_one(job):
+    """Worker: (output path, cache key, bytes written or None when skipped)"""
+    source, target, settings, cached = job
+    key = cache_key(source, settings)
+    if key == cached and os.path.exists(target):
+        return target, key, None
+    data = convert(source, settings)
+    os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+    with open(target, "wb") as f:
+        f.write(data)
+    return target, key, len(data)
+
+
+def load_cache(out_dir):
+    try:
+        with open(os.path.join(out_dir, CACHE_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(out_dir, cache):
+    with open(os.path.join(out_dir, CACHE_FILE), "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=1, sort_keys=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert images to firmware assets in parallel")
+    parser.add_argument("inputs", nargs="+", help="Image files or directories of images")
+    parser.add_argument("-o", "--output", default="assets", help="Output directory (default: assets)")
+    parser.add_argument("--format", choices=sorted(SUFFIXES), default="le",
+                        help="le/be: raw RGB565 little- or big-endian (panel order); rle: palette + RLE")
+    parser.add_argument("--width", type=int, default=135, help="Target width in pixels")
+    parser.add_argument("--height", type=int, default=240, help="Target height in pixels")
+    parser.add_argument("--crop", action="store_true", help="Center-crop to the target aspect ratio before resizing")
+    parser.add_argument("--colors", type=int, default=256, help="Palette size for --format rle (2-256)")
+    parser.add_argument("--dither", choices=DITHERS, default="none",
+                        help="bayer or floyd-steinberg to hide RGB565/palette banding (default: truncate)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--force", action="store_true", help="Reconvert even when the cache is current")
+    args = parser.parse_args()
+
+    if not 2 <= args.colors <= 256:
+        print("Error: --colors must be between 2 and 256")
+        sys.exit(1)
+    images = find_images(args.inputs)
+    missing = [source for source, _ in images if not os.path.isfile(source)]
+    if missing:
+        print(f"Error: not found: {', '.join(missing)}")
+        sys.exit(1)
+
+    settings = {"format": args.format, "width": args.width, "height": args.height,
+                "crop": args.crop, "colors": args.colors if args.format == "rle" else None,
+                "dither": args.dither}
+    os.makedirs(args.output, exist_ok=True)
+    cache = {} if args.force else load_cache(args.output)
+    jobs = []
+    for source, relative in images:
+        name = output_name(relative, args.format)
+        jobs.append((source, os.path.join(args.output, name), settings, cache.get(name)))
+
+    start = time.perf_counter()
+    converted = skipped = 0
+    if args.jobs > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            results = list(pool.map(convert_one, jobs))
+    else:
+        results = [convert_one(job) for job in jobs]
+    for target, key, size in results:
+        cache[os.path.relpath(target, args.output)] = key
+        if size is None:
+            skipped += 1
+        else:
+            converted += 1
+            print(f"Wrote {target} ({size} bytes)")
+    save_cache(args.output, cache)
+    print(f"{converted} converted, {skipped} unchanged in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,60 +2,75 @@
 """
 Image to RGB565 converter for M5StickC Plus
 Converts images to RGB565 little-endian format for MicroPython display
+(or big-endian panel order with --big-endian, streamed without swapping)
 """
 
 import sys
 import os
+import numpy as np
 from PIL import Image
-import struct
 
-def rgb_to_rgb565(r, g, b):
-    """Convert RGB888 to RGB565"""
-    r = (r >> 3) & 0x1F
-    g = (g >> 2) & 0x3F  
-    b = (b >> 3) & 0x1F
-    return (r << 11) | (g << 5) | b
+def rgb565_values(img):
+    """RGB565 value of every pixel of an RGB image as a height x width uint16 array"""
+    rgb = np.asarray(img, dtype=np.uint16)
+    return ((rgb[..., 0] & 0xF8) << 8) | ((rgb[..., 1] & 0xFC) << 3) | (rgb[..., 2] >> 3)
 
-def convert_image_to_rgb565(input_path, output_path, target_width=135, target_height=240):
+def image_to_rgb565(img, big_endian=False):
+    """RGB565 bytes of an RGB image, packed and byte-ordered in one vectorized pass"""
+    return rgb565_values(img).astype(">u2" if big_endian else "<u2").tobytes()
+
+def fit_image(img, target_width=135, target_height=240, crop=False):
+    """RGB copy of img resized to the target; crop=True first trims it to the target aspect ratio"""
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    if crop:
+        img_ratio = img.size[0] / img.size[1]
+        target_ratio = target_width / target_height
+        if img_ratio > target_ratio:
+            # Image wider than target, crop width
+            new_width = int(img.size[1] * target_ratio)
+            left = (img.size[0] - new_width) // 2
+            img = img.crop((left, 0, left + new_width, img.size[1]))
+        elif img_ratio < target_ratio:
+            # Image taller than target, crop height
+            new_height = int(img.size[0] / target_ratio)
+            top = (img.size[1] - new_height) // 2
+            img = img.crop((0, top, img.size[0], top + new_height))
+    return img.resize((target_width, target_height), Image.Resampling.LANCZOS)
+
+def load_image(input_path, target_width=135, target_height=240):
+    """Open an image as RGB, resized to the target dimensions"""
+    with Image.open(input_path) as img:
+        print(f"Original size: {img.size}")
+        
+        # Convert to RGB if needed and resize to target dimensions
+        img_resized = fit_image(img, target_width, target_height)
+        print(f"Resized to: {img_resized.size}")
+        return img_resized
+
+def convert_image_to_rgb565(input_path, output_path, target_width=135, target_height=240, big_endian=False):
     """Convert image to RGB565 format for M5StickC Plus"""
     
     print(f"Converting {input_path} to RGB565 format...")
     
     try:
         # Open and resize image
-        with Image.open(input_path) as img:
-            print(f"Original size: {img.size}")
-            
-            # Convert to RGB if needed
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-            
-            # Resize to target dimensions
-            img_resized = img.resize((target_width, target_height), Image.Resampling.LANCZOS)
-            print(f"Resized to: {img_resized.size}")
-            
-            # Convert to RGB565
-            rgb565_data = bytearray()
-            
-            for y in range(target_height):
-                for x in range(target_width):
-                    r, g, b = img_resized.getpixel((x, y))
-                    rgb565 = rgb_to_rgb565(r, g, b)
-                    
-                    # Store as little endian (low byte first)
-                    rgb565_data.append(rgb565 & 0xFF)        # Low byte
-                    rgb565_data.append((rgb565 >> 8) & 0xFF) # High byte
-            
-            # Save RGB565 data
-            with open(output_path, 'wb') as f:
-                f.write(rgb565_data)
-            
-            print(f"Converted image saved as: {output_path}")
-            print(f"RGB565 data size: {len(rgb565_data)} bytes")
-            print(f"Expected size: {target_width * target_height * 2} bytes")
-            
-            return True
-            
+        img_resized = load_image(input_path, target_width, target_height)
+        
+        # Convert to RGB565: little endian (low byte first), or panel byte order
+        # that M5Display(swap_bytes=False) streams as stored
+        rgb565_data = image_to_rgb565(img_resized, big_endian)
+        
+        # Save RGB565 data
+        with open(output_path, 'wb') as f:
+            f.write(rgb565_data)
+        
+        print(f"Converted image saved as: {output_path}")
+        print(f"RGB565 data size: {len(rgb565_data)} bytes")
+        print(f"Expected size: {target_width * target_height * 2} bytes")
+        
+        return True
+        
     except Exception as e:
         print(f"Error converting image: {e}")
         return False
@@ -96,13 +111,15 @@ def create_micropython_array(rgb565_file, output_py_file, array_name="image_data
         return False
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python convert_image_to_rgb565.py <input_image> [output_prefix]")
+    args = [arg for arg in sys.argv[1:] if arg != "--big-endian"]
+    big_endian = len(args) < len(sys.argv) - 1
+    if len(args) < 1:
+        print("Usage: python convert_image_to_rgb565.py [--big-endian] <input_image> [output_prefix]")
         print("Example: python convert_image_to_rgb565.py volcano.png volcano")
         sys.exit(1)
     
-    input_image = sys.argv[1]
-    output_prefix = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(os.path.basename(input_image))[0]
+    input_image = args[0]
+    output_prefix = args[1] if len(args) > 1 else os.path.splitext(os.path.basename(input_image))[0]
     
     if not os.path.exists(input_image):
         print(f"Error: Input file '{input_image}' not found")
@@ -113,7 +130,7 @@ def main():
     micropython_file = f"{output_prefix}_image.py"
     
     # Convert image
-    if convert_image_to_rgb565(input_image, rgb565_file):
+    if convert_image_to_rgb565(input_image, rgb565_file, big_endian=big_endian):
         # Create MicroPython array
         create_micropython_array(rgb565_file, micropython_file, f"{output_prefix}_data")
         print(f"\nConversion complete!")
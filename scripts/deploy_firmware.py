@@ -4,26 +4,60 @@ Deploy Claude Monitor firmware to M5StickC PLUS
 Clean production deployment script
 """
 import os
+import re
 import sys
 import subprocess
 
+FIRMWARE_DIR = "firmware"
+IMPORT_PATTERN = re.compile(r"^\s*(?:from\s+(\w+)\s+import|import\s+(\w+))", re.MULTILINE)
+
+def support_modules(firmware_file):
+    """Firmware modules imported (directly or indirectly) by firmware_file"""
+    found = []
+    pending = [firmware_file]
+    while pending:
+        with open(os.path.join(FIRMWARE_DIR, pending.pop()), encoding="utf-8") as f:
+            source = f.read()
+        for match in IMPORT_PATTERN.finditer(source):
+            module = f"{match.group(1) or match.group(2)}.py"
+            if module not in found and module != firmware_file and os.path.exists(os.path.join(FIRMWARE_DIR, module)):
+                found.append(module)
+                pending.append(module)
+    return found
+
+def data_files():
+    """Fonts (scripts/build_font.py), RLE images (scripts/encode_rle_image.py) and asset packs
+    (scripts/pack_assets.py) that ship next to the firmware"""
+    return sorted(name for name in os.listdir(FIRMWARE_DIR) if name.endswith((".fnt", ".rle", ".pak")))
+
+def upload(port, local_path, remote_name):
+    """Copy one file to the device; returns False on failure"""
+    cmd = f'pipenv run ampy --port {port} put "{local_path}" {remote_name}'
+    result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"Error uploading {remote_name}: {result.stderr}")
+        return False
+    return True
+
 def deploy_firmware(port="COM4", firmware_file="claude_monitor_main.py"):
     """Deploy specified firmware to M5StickC PLUS"""
     print(f"Deploying Claude Monitor to M5StickC PLUS on {port}...")
     
-    firmware_path = f"firmware/{firmware_file}"
+    firmware_path = f"{FIRMWARE_DIR}/{firmware_file}"
     if not os.path.exists(firmware_path):
         print(f"Error: {firmware_path} not found")
         return False
     
     try:
+        # Modules the firmware imports go first so main.py never starts without them
+        for module in support_modules(firmware_file) + data_files():
+            print(f"Uploading {module}...")
+            if not upload(port, f"{FIRMWARE_DIR}/{module}", module):
+                return False
+        
         # Deploy main firmware
         print(f"Uploading {firmware_file} as main.py...")
-        cmd = f'pipenv run ampy --port {port} put "{firmware_path}" main.py'
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-        
-        if result.returncode != 0:
-            print(f"Error deploying firmware: {result.stderr}")
+        if not upload(port, firmware_path, "main.py"):
             return False
         
         print("* Firmware deployed successfully")
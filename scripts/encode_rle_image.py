@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Palette + RLE image encoder for the M5StickC PLUS firmware
+Converts an image (or a raw little-endian .rgb565 file) to at most 256 RGB565
+colors and PackBits-compressed rows that firmware/rle_image.py streams;
+palettes of 16 colors or fewer pack literal indices at 4, 2 or 1 bits
+"""
+
+import argparse
+import struct
+import sys
+
+import numpy as np
+from PIL import Image
+
+from convert_image_to_rgb565 import load_image
+from quantize import DITHERS, expand, quantize_rgb565, reduce_palette
+
+MAGIC = b"IRLE"
+VERSION = 1
+HEADER = "<4sBBHHH"
+
+MAX_LITERAL = 128
+MAX_REPEAT = 129
+
+
+def load_raw(path, width, height):
+    """RGB image from a raw little-endian RGB565 file"""
+    with open(path, "rb") as f:
+        data = f.read(width * height * 2)
+    if len(data) < width * height * 2:
+        raise ValueError(f"{path}: expected {width * height * 2} bytes, got {len(data)}")
+    values = np.frombuffer(data, dtype="<u2").reshape(height, width)
+    return Image.fromarray(expand(values), "RGB")
+
+
+def index_colors(img, colors=256, dither="none"):
+    """(palette of RGB565 values, one index byte per pixel).
+
+    Images whose RGB565 conversion (dithered as asked) fits in colors
+    values keep them exactly; others are reduced to a median cut palette
+    (see quantize.reduce_palette).
+    """
+    palette, indices = np.unique(quantize_rgb565(img, dither), return_inverse=True)
+    if len(palette) <= colors:
+        return [int(value) for value in palette], indices.astype(np.uint8).tobytes()
+    return reduce_palette(img, colors, dither)
+
+
+def index_bits(colors):
+    """Bits per packed literal index for a palette of colors entries"""
+    for bits in (1, 2, 4):
+        if colors <= 1 << bits:
+            return bits
+    return 8
+
+
+def pack_literal(indices, bits):
+    """Control byte and indices packed bits each, most significant bits first"""
+    out = bytearray([len(indices) - 1])
+    acc = 0
+    filled = 0
+    for index in indices:
+        acc = (acc << bits) | index
+        filled += bits
+        if filled == 8:
+            out.append(acc)
+            acc = 0
+            filled = 0
+    if filled:
+        out.append(acc << (8 - filled))
+    return out
+
+
+def pack_row(indices, bits=8):
+    """PackBits runs for one row of palette indices"""
+    out = bytearray()
+    literal = bytearray()
+    i = 0
+    n = len(indices)
+    while i < n:
+        run = 1
+        while i + run < n and run < MAX_REPEAT and indices[i + run] == indices[i]:
+            run += 1
+        if run >= 3:
+            if literal:
+                out += pack_literal(literal, bits)
+                literal = bytearray()
+            out.append(run + 126)
+            out.append(indices[i])
+            i += run
+        else:
+            literal.append(indices[i])
+            i += 1
+            if len(literal) == MAX_LITERAL:
+                out += pack_literal(literal, bits)
+                literal = bytearray()
+    if literal:
+        out += pack_literal(literal, bits)
+    return out
+
+
+def encode(width, height, palette, indices):
+    """Serialize an indexed image into the palette + RLE format"""
+    bits = index_bits(len(palette))
+    runs = bytearray()
+    offsets = []
+    for row in range(height):
+        offsets.append(len(runs))
+        runs += pack_row(indices[row * width:(row + 1) * width], bits)
+    offsets.append(len(runs))
+
+    header = struct.pack(HEADER, MAGIC, VERSION, bits, width, height, len(palette))
+    colors = b"".join(struct.pack(">H", value) for value in palette)
+    table = struct.pack(f"<{height + 1}I", *offsets)
+    return header + colors + table + runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Encode an image as a palette + RLE asset for the firmware")
+    parser.add_argument("input", help="Image file, or a raw little-endian .rgb565 file with --raw")
+    parser.add_argument("output", help="Asset to write (e.g. volcano.rle)")
+    parser.add_argument("--width", type=int, default=135, help="Target width in pixels")
+    parser.add_argument("--height", type=int, default=240, help="Target height in pixels")
+    parser.add_argument("--raw", action="store_true", help="Input is raw RGB565 of --width x --height")
+    parser.add_argument("--colors", type=int, default=256, help="Palette size (2-256)")
+    parser.add_argument("--dither", choices=DITHERS, default="none", help="Dithering when reducing colors")
+    args = parser.parse_args()
+
+    if not 2 <= args.colors <= 256:
+        print("Error: --colors must be between 2 and 256")
+        sys.exit(1)
+    try:
+        if args.raw:
+            img = load_raw(args.input, args.width, args.height)
+        else:
+            img = load_image(args.input, args.width, args.height)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    palette, indices = index_colors(img, args.colors, args.dither)
+    data = encode(args.width, args.height, palette, indices)
+    with open(args.output, "wb") as f:
+        f.write(data)
+    raw_size = args.width * args.height * 2
+    print(f"Wrote {args.output}: {args.width}x{args.height}, {len(palette)} colors, "
+          f"{len(data)} bytes ({raw_size / len(data):.1f}x smaller than raw RGB565)")
+
+
+if __name__ == "__main__":
+    main()
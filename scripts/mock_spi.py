@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Host-side stand-in for MicroPython's machine module
+A mock SPI bus decodes ST7789 CASET/RASET/RAMWR traffic into panel memory and
+can simulate the transfer time of a real bus, so firmware display code runs
+and can be checked on a PC
+"""
+
+import sys
+import threading
+import time
+import types
+
+DC_PIN = 23  # lcd.DC_PIN: the data/command line the bus follows
+
+# ST7789 controller memory is 240 columns x 320 rows
+RAM_WIDTH = 240
+RAM_HEIGHT = 320
+
+
+class MockBus:
+    """ST7789 as seen from the SPI bus.
+
+    Tracks the data/command line, the address window and the write pointer,
+    and stores RAMWR pixels big-endian in ram (skipped when decode is
+    False, for timing runs). When baudrate is set, each write sleeps for
+    the time the bytes would take on the wire.
+    """
+
+    def __init__(self, baudrate=None, decode=True):
+        self.baudrate = baudrate
+        self.decode = decode
+        self.ram = bytearray(RAM_WIDTH * RAM_HEIGHT * 2)
+        self.dc = 0
+        self.writes = 0
+        self.bytes = 0
+        self.busy_s = 0.0
+        self.lock = threading.Lock()
+        self._cmd = None
+        self._params = bytearray()
+        self._cols = (0, RAM_WIDTH - 1)
+        self._rows = (0, RAM_HEIGHT - 1)
+        self._x = 0
+        self._y = 0
+
+    def write(self, data):
+        with self.lock:
+            self.writes += 1
+            self.bytes += len(data)
+            if self.dc == 0:
+                for cmd in bytes(data):
+                    self._command(cmd)
+            elif self.decode:
+                self._data(bytes(data))
+        if self.baudrate:
+            seconds = len(data) * 8 / self.baudrate
+            self.busy_s += seconds
+            time.sleep(seconds)
+
+    def _command(self, cmd):
+        self._cmd = cmd
+        self._params = bytearray()
+        if cmd == 0x2C:  # RAMWR starts at the window origin
+            self._x = self._cols[0]
+            self._y = self._rows[0]
+
+    def _data(self, data):
+        if self._cmd in (0x2A, 0x2B):
+            self._params += data
+            if len(self._params) >= 4:
+                p = self._params
+                span = ((p[0] << 8) | p[1], (p[2] << 8) | p[3])
+                if self._cmd == 0x2A:
+                    self._cols = span
+                else:
+                    self._rows = span
+        elif self._cmd == 0x2C:
+            data = self._params + data
+            self._params = bytearray(data[len(data) & ~1:])  # Half a pixel carries over
+            ram = self.ram
+            for i in range(0, len(data) - 1, 2):
+                if self._x < RAM_WIDTH and self._y < RAM_HEIGHT:
+                    index = (self._y * RAM_WIDTH + self._x) * 2
+                    ram[index] = data[i]
+                    ram[index + 1] = data[i + 1]
+                self._x += 1
+                if self._x > self._cols[1]:
+                    self._x = self._cols[0]
+                    self._y += 1
+
+    def region(self, x, y, w, h):
+        """Big-endian RGB565 bytes of a w x h area of controller memory"""
+        out = bytearray()
+        for row in range(y, y + h):
+            start = (row * RAM_WIDTH + x) * 2
+            out += self.ram[start:start + w * 2]
+        return bytes(out)
+
+
+bus = MockBus()
+
+
+class Pin:
+    OUT = 1
+    IN = 0
+    PULL_UP = 2
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
+
+    def __init__(self, number=None, mode=None, pull=None, value=None):
+        self.number = number
+        self.level = 1 if value is None else value
+
+    def init(self, mode=None, pull=None, value=None):
+        if value is not None:
+            self.value(value)
+
+    def value(self, level=None):
+        if level is None:
+            return self.level
+        self.level = level
+        if self.number == DC_PIN:
+            bus.dc = level
+
+    def irq(self, handler=None, trigger=None):
+        pass
+
+
+class SPI:
+    def __init__(self, spi_id=1, baudrate=None, **kwargs):
+        pass
+
+    def write(self, data):
+        bus.write(data)
+
+
+class I2C:
+    def __init__(self, i2c_id=0, **kwargs):
+        self.memory = {}
+
+    def writeto_mem(self, addr, reg, data):
+        self.memory[(addr, reg)] = bytes(data)
+
+    def readfrom_mem(self, addr, reg, n):
+        return self.memory.get((addr, reg), bytes(n))
+
+
+class PWM:
+    def __init__(self, pin, freq=0, duty=0):
+        pass
+
+    def freq(self, value=None):
+        pass
+
+    def duty(self, value=None):
+        pass
+
+
+def install(baudrate=None, decode=True):
+    """Register the mock as the machine module and add time.sleep_ms/ticks_*.
+
+    Returns the MockBus every SPI instance writes to.
+    """
+    global bus
+    bus = MockBus(baudrate, decode)
+    machine = types.ModuleType("machine")
+    machine.Pin = Pin
+    machine.SPI = SPI
+    machine.I2C = I2C
+    machine.PWM = PWM
+    machine.reset = lambda: None
+    machine.unique_id = lambda: b"\x00\x00\x00\x00\x00\x00"
+    sys.modules["machine"] = machine
+
+    time.sleep_ms = lambda ms: time.sleep(ms / 1000)
+    time.ticks_ms = lambda: int(time.monotonic() * 1000)
+    time.ticks_us = lambda: int(time.monotonic() * 1000000)
+    time.ticks_diff = lambda a, b: a - b
+    return bus
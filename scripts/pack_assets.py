@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Asset packer for the M5StickC PLUS firmware
+Bundles RGB565 images, .rle images, .fnt fonts and any other small files into
+one indexed pack that firmware/asset_pack.py opens once and serves by seeking;
+entries start on block boundaries and carry a CRC-32 each
+"""
+
+import argparse
+import os
+import struct
+import sys
+import zlib
+
+MAGIC = b"APAK"
+VERSION = 1
+HEADER = "<4sBBH"
+ENTRY = "<24sIIIHHHH"
+NAME_BYTES = 24
+
+# Entry formats, as in firmware/asset_pack.py
+FORMAT_RAW = 0
+FORMAT_RGB565 = 1
+FORMAT_RGB565_BE = 2
+FORMAT_RLE = 3
+FORMAT_FONT = 4
+
+FORMAT_NAMES = {FORMAT_RAW: "raw", FORMAT_RGB565: "rgb565", FORMAT_RGB565_BE: "rgb565-be",
+                FORMAT_RLE: "rle", FORMAT_FONT: "font"}
+
+
+def find_files(paths):
+    """(source path, entry name) for every file under paths; names use forward slashes"""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if not name.startswith("."):
+                        source = os.path.join(root, name)
+                        found.append((source, os.path.relpath(source, path).replace(os.sep, "/")))
+        else:
+            found.append((path, os.path.basename(path)))
+    return found
+
+
+def describe(name, data, width, height):
+    """(format, width, height) of an entry, from its name and header"""
+    if data[:4] == b"IRLE":
+        _, _, _, w, h, _ = struct.unpack_from("<4sBBHHH", data)
+        return FORMAT_RLE, w, h
+    if data[:4] == b"MFNT":
+        return FORMAT_FONT, 0, data[6]
+    if name.endswith(".rgb565"):
+        fmt = FORMAT_RGB565_BE if name.endswith("-be.rgb565") else FORMAT_RGB565
+        if len(data) != width * height * 2:
+            raise ValueError(f"{name}: {len(data)} bytes is not {width}x{height} RGB565 (see --width/--height)")
+        return fmt, width, height
+    return FORMAT_RAW, 0, 0
+
+
+def align(offset, block):
+    return (offset + block - 1) // block * block
+
+
+def pack(entries, block=512):
+    """Serialize (name, data, format, width, height) entries into a pack"""
+    offset = align(struct.calcsize(HEADER) + len(entries) * struct.calcsize(ENTRY), block)
+    directory = bytearray()
+    placed = []
+    for name, data, fmt, width, height in entries:
+        directory += struct.pack(ENTRY, name.encode(), offset, len(data), zlib.crc32(data),
+                                 width, height, fmt, 0)
+        placed.append((offset, data))
+        offset = align(offset + len(data), block)
+
+    out = bytearray(struct.pack(HEADER, MAGIC, VERSION, 0, len(entries)))
+    out += directory
+    for start, data in placed:
+        out += bytes(start - len(out))
+        out += data
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bundle firmware assets into one indexed pack")
+    parser.add_argument("inputs", nargs="+", help="Asset files or directories of assets")
+    parser.add_argument("-o", "--output", default="assets.pak", help="Pack to write (e.g. firmware/assets.pak)")
+    parser.add_argument("--width", type=int, default=135, help="Width of raw .rgb565 entries")
+    parser.add_argument("--height", type=int, default=240, help="Height of raw .rgb565 entries")
+    parser.add_argument("--align", type=int, default=512,
+                        help="Block size entries start on, so reads don't straddle flash blocks (default: 512)")
+    args = parser.parse_args()
+
+    if args.align < 1:
+        print("Error: --align must be at least 1")
+        sys.exit(1)
+    entries = []
+    seen = set()
+    try:
+        for source, name in find_files(args.inputs):
+            if len(name.encode()) > NAME_BYTES:
+                raise ValueError(f"{name}: names are limited to {NAME_BYTES} bytes")
+            if name in seen:
+                raise ValueError(f"{name}: duplicate entry name")
+            seen.add(name)
+            with open(source, "rb") as f:
+                data = f.read()
+            entries.append((name, data) + describe(name, data, args.width, args.height))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    data = pack(entries, args.align)
+    with open(args.output, "wb") as f:
+        f.write(data)
+    for name, payload, fmt, width, height in entries:
+        dims = f"{width}x{height}" if width else (f"h{height}" if height else "")
+        print(f"  {name:<24} {FORMAT_NAMES[fmt]:<9} {dims:>8} {len(payload):>7} bytes")
+    content = sum(len(entry[1]) for entry in entries)
+    print(f"Wrote {args.output}: {len(entries)} entries, {len(data)} bytes "
+          f"({len(data) - content} bytes of directory and padding)")
+
+
+if __name__ == "__main__":
+    main()
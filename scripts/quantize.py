@@ -0,0 +1,139 @@
+"""
+Color quantization for the RGB565 asset converters
+Reduces 8-bit RGB to RGB565 by truncation, ordered (Bayer) dithering or
+Floyd-Steinberg error diffusion, and to small palettes for .rle assets; every
+mode is vectorized with NumPy and works on single images or whole batches
+"""
+
+import numpy as np
+from PIL import Image
+
+from convert_image_to_rgb565 import rgb565_values
+
+DITHERS = ("none", "bayer", "floyd-steinberg")
+
+# Levels per channel in RGB565
+LEVELS = np.array([31, 63, 31], dtype=np.float32)
+
+
+def bayer_matrix(size=4):
+    """size x size ordered-dither thresholds in [-0.5, 0.5); size is a power of two"""
+    m = np.zeros((1, 1), dtype=np.float32)
+    while m.shape[0] < size:
+        m = np.block([[4 * m, 4 * m + 2], [4 * m + 3, 4 * m + 1]])
+    return (m + 0.5) / m.size - 0.5
+
+
+def _thresholds(h, w, size):
+    """Bayer thresholds tiled over an h x w image, shaped to broadcast over channels"""
+    m = bayer_matrix(size)
+    return np.tile(m, ((h + size - 1) // size, (w + size - 1) // size))[:h, :w, None]
+
+
+def _pack(q):
+    """RGB565 values from per-channel levels (..., 3)"""
+    q = q.astype(np.uint16)
+    return (q[..., 0] << 11) | (q[..., 1] << 5) | q[..., 2]
+
+
+def expand(values):
+    """8-bit RGB (..., 3) the panel shows for RGB565 values"""
+    values = np.asarray(values, dtype=np.uint16)
+    r = (values >> 11) & 0x1F
+    g = (values >> 5) & 0x3F
+    b = values & 0x1F
+    return np.stack(((r << 3) | (r >> 2), (g << 2) | (g >> 4), (b << 3) | (b >> 2)), axis=-1).astype(np.uint8)
+
+
+def nearest(rgb):
+    """RGB565 values closest to 8-bit RGB (..., 3), rounding instead of truncating"""
+    return _pack(np.clip(np.rint(np.asarray(rgb, dtype=np.float32) * (LEVELS / 255)), 0, LEVELS))
+
+
+def ordered(rgb, size=4):
+    """RGB565 values of rgb ((h, w, 3) or (n, h, w, 3)) with a size x size Bayer matrix.
+
+    Each channel is offset by up to half a quantization step before
+    rounding to the nearest level, so flat gradients break into a fine
+    regular pattern instead of bands.
+    """
+    rgb = np.asarray(rgb, dtype=np.float32)
+    q = np.rint(rgb * (LEVELS / 255) + _thresholds(rgb.shape[-3], rgb.shape[-2], size))
+    return _pack(np.clip(q, 0, LEVELS))
+
+
+def floyd_steinberg(rgb):
+    """RGB565 values of rgb ((h, w, 3) or (n, h, w, 3)) with Floyd-Steinberg error diffusion.
+
+    Pixel (x, y) only receives error from (x - 1, y) and the row above,
+    so all pixels on an anti-diagonal x + 2y = t can be quantized
+    together: the image takes w + 2h vectorized steps instead of w * h
+    scalar ones, and a batch shares those steps.
+    """
+    rgb = np.asarray(rgb, dtype=np.float32)
+    single = rgb.ndim == 3
+    if single:
+        rgb = rgb[None]
+    n, h, w, _ = rgb.shape
+    # One spare column each side and a spare row below absorb error pushed off the edge
+    work = np.zeros((n, h + 1, w + 2, 3), dtype=np.float32)
+    work[:, :h, 1:w + 1] = rgb
+    out = np.zeros((n, h, w, 3), dtype=np.float32)
+    scale = LEVELS / 255
+    rows = np.arange(h)
+    for t in range(w + 2 * (h - 1)):
+        ys = rows[(t - 2 * rows >= 0) & (t - 2 * rows < w)]
+        xs = t - 2 * ys
+        old = work[:, ys, xs + 1]
+        q = np.clip(np.rint(old * scale), 0, LEVELS)
+        out[:, ys, xs] = q
+        err = old - q / scale
+        work[:, ys, xs + 2] += err * (7 / 16)
+        work[:, ys + 1, xs] += err * (3 / 16)
+        work[:, ys + 1, xs + 1] += err * (5 / 16)
+        work[:, ys + 1, xs + 2] += err * (1 / 16)
+    values = _pack(out)
+    return values[0] if single else values
+
+
+def quantize_rgb565(img, dither="none", bayer_size=4):
+    """height x width uint16 RGB565 values of an RGB image (or a batch array)"""
+    if dither == "bayer":
+        return ordered(img, bayer_size)
+    if dither == "floyd-steinberg":
+        return floyd_steinberg(img)
+    # Truncation, as the converters have always done
+    return rgb565_values(img)
+
+
+def reduce_palette(img, colors, dither="none", bayer_size=4):
+    """(palette of RGB565 values, one index byte per pixel) with at most colors entries.
+
+    The palette comes from Pillow's median cut; pixels are then mapped to
+    it plainly, through a Bayer offset scaled to the palette's spacing, or
+    with Pillow's Floyd-Steinberg.
+    """
+    img = img.convert("RGB")
+    base = img.quantize(colors=colors, method=Image.Quantize.MEDIANCUT, dither=Image.Dither.NONE)
+    if dither == "floyd-steinberg":
+        mapped = img.quantize(palette=base, dither=Image.Dither.FLOYDSTEINBERG)
+    elif dither == "bayer":
+        rgb = np.asarray(img, dtype=np.float32)
+        # A quarter of the mean spacing of colors spread evenly over the RGB cube;
+        # median cut packs them closer where the image needs them
+        spread = 0.25 * 255 / colors ** (1 / 3)
+        offset = rgb + _thresholds(rgb.shape[0], rgb.shape[1], bayer_size) * spread
+        offset = np.clip(offset, 0, 255).astype(np.uint8)
+        mapped = Image.fromarray(offset, "RGB").quantize(palette=base, dither=Image.Dither.NONE)
+    else:
+        mapped = base
+    indices = mapped.tobytes()
+    rgb = np.array(base.getpalette()[:3 * (max(indices) + 1)], dtype=np.uint8).reshape(-1, 3)
+    return [int(value) for value in nearest(rgb)], indices
+
+
+def psnr(reference, rgb):
+    """Peak signal-to-noise ratio in dB between two 8-bit RGB arrays"""
+    diff = np.asarray(reference, dtype=np.float64) - np.asarray(rgb, dtype=np.float64)
+    mse = np.mean(diff * diff)
+    return float("inf") if mse == 0 else 10 * np.log10(255 * 255 / mse)
@@ -0,0 +1,151 @@
+"""
+Server-Sent Events push channel for M5StickC devices
+Streams compact deltas of the status payload whenever the tracker state changes,
+diffed per subscriber filter against what those devices were last sent
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+from status_snapshot import StatusSnapshot
+from subscriber_hub import SubscriberHub
+
+logger = logging.getLogger("claude-monitor")
+
+# Comment lines keep idle connections (and NAT entries) alive
+HEARTBEAT_INTERVAL = 15.0
+HEARTBEAT = b": keepalive\n\n"
+
+
+def format_event(event: str, data: Dict[str, Any], event_id: int) -> bytes:
+    """Encode one SSE message"""
+    payload = json.dumps(data, separators=(",", ":"))
+    return f"id: {event_id}\nevent: {event}\ndata: {payload}\n\n".encode()
+
+
+class EventPublisher:
+    """Turns tracker state changes into deltas, encoded once per subscriber filter.
+
+    Subscribers sharing a (project, user) filter share a view: the payload
+    those devices last received. Every delta is diffed against that view,
+    so a filtered device never misses a change that happened while other
+    projects were updating, and project filters see that project's values.
+    """
+
+    def __init__(self, snapshot: StatusSnapshot, get_status: Callable[[], Dict[str, Any]],
+                 hub: SubscriberHub,
+                 get_project_status: Optional[Callable[[str], Dict[str, Any]]] = None,
+                 user: Optional[str] = None):
+        self.snapshot = snapshot
+        self.get_status = get_status
+        self.hub = hub
+        self.get_project_status = get_project_status
+        self.user = user
+        # (project, user) filter -> [payload last sent, snapshot event of it]
+        self._views: Dict[Tuple[Optional[str], Optional[str]], List[Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def current(self, project: Optional[str] = None) -> Dict[str, Any]:
+        """Fresh status payload (a project's own, if given) without the version"""
+        if project is not None and self.get_project_status is not None:
+            status = self.get_project_status(project)
+        else:
+            status = self.get_status()
+        status.pop("version", None)
+        return status
+
+    def view(self, project: Optional[str] = None, user: Optional[str] = None) -> bytes:
+        """Snapshot event a new subscriber with this filter starts from.
+
+        Register the subscriber without awaiting in between, so the next
+        delta for the filter applies on top of exactly this payload.
+        """
+        key = (project, user)
+        view = self._views.get(key)
+        if view is None:
+            payload = self.current(project)
+            view = self._views[key] = [payload, format_event("snapshot", payload, self.snapshot.version)]
+        return view[1]
+
+    def start(self):
+        """Start publishing in the background"""
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        """Stop publishing"""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        version = self.snapshot.version
+        while True:
+            await self.snapshot.wait(version, HEARTBEAT_INTERVAL)
+            if self.snapshot.version == version:
+                self.hub.publish(HEARTBEAT)
+                continue
+
+            try:
+                version = self.snapshot.version
+                active = self.hub.filters()
+                for key in [key for key in self._views if key not in active]:
+                    del self._views[key]
+                for key, view in self._views.items():
+                    self._update(key, view, version)
+            except Exception as e:
+                logger.error(f"Event publisher error: {e}")
+
+    def _update(self, key: Tuple[Optional[str], Optional[str]], view: List[Any], version: int):
+        """Diff one filter's view against the current state and queue the delta"""
+        project, user = key
+        if user is not None and user != self.user:
+            return  # Nothing on this server belongs to that user
+        last = view[0]
+        current = self.current(project)
+        view[0] = current
+        view[1] = format_event("snapshot", current, version)
+        if any(name not in current for name in last):
+            # A delta can't remove fields (e.g. a project whose session ended)
+            self.hub.publish(view[1], view[1], key)
+            return
+        delta = {name: value for name, value in current.items() if last.get(name) != value}
+        if delta:
+            self.hub.publish(format_event("delta", delta, version), view[1], key)
+
+
+async def stream_events(request: web.Request, hub: SubscriberHub,
+                        publisher: EventPublisher) -> web.StreamResponse:
+    """Serve /events?device=<id>&project=&user=: a full snapshot, then fanned-out deltas"""
+    device_id = request.query.get("device") or f"{request.remote}:{id(request)}"
+    response = web.StreamResponse(headers={
+        "Content-Type": "text/event-stream",
+        "Cache-Control": "no-cache",
+    })
+    await response.prepare(request)
+
+    # No await between the snapshot and registering, so no delta can be missed
+    project, user = request.query.get("project"), request.query.get("user")
+    first = publisher.view(project, user)
+    subscriber = hub.register(device_id, project, user, request.remote)
+    subscriber.task = asyncio.current_task()
+
+    try:
+        await response.write(first)
+        while True:
+            message = await subscriber.queue.get()
+            if message is None:
+                break  # Evicted
+            await response.write(message)
+            subscriber.delivered += 1
+            if subscriber.queue.empty():
+                subscriber.overflows = 0  # Caught up; only overflows without a catch-up count
+    except (ConnectionResetError, ConnectionError):
+        pass
+    finally:
+        hub.unregister(subscriber)
+
+    return response
@@ -0,0 +1,180 @@
+"""
+Filesystem-event activity source for Claude Code sessions
+Watches project directories and Claude's transcript directory through
+watchdog (inotify on Linux) and coalesces bursts of events into activity
+ticks with real counts of edited files; idle directories cost nothing
+"""
+
+import asyncio
+import fnmatch
+import logging
+import os
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # Activity detection falls back to the process watcher
+    FileSystemEventHandler = object
+    Observer = None
+
+logger = logging.getLogger("claude-monitor")
+
+# Events closer together than this form one activity tick
+COALESCE_WINDOW = 2.0
+
+# Directory names whose churn says nothing about editing activity
+IGNORED_DIRS = frozenset((".git", "__pycache__", "node_modules", ".venv", "venv",
+                          ".mypy_cache", ".pytest_cache", ".ruff_cache", ".tox", ".nox", ".idea",
+                          "build", "dist", "target", ".next", ".cache", ".gradle", "coverage"))
+
+# Editor swap/backup/lock files and build artifacts; never counted as edits
+IGNORED_FILES = ("*.swp", "*.swo", "*.swx", "*~", ".#*", "#*#", "*.tmp", "4913",
+                 "*.pyc", "*.o", "*.class")
+
+_CHANGE_EVENTS = frozenset(("created", "modified", "moved", "deleted"))
+
+# A move's destination is a file written under its final name (atomic saves)
+_EDIT_EVENTS = frozenset(("created", "modified", "moved"))
+
+
+def _ignored_file(name: str) -> bool:
+    return any(fnmatch.fnmatchcase(name, pattern) for pattern in IGNORED_FILES)
+
+
+def project_dirs_from_env() -> List[str]:
+    """Project directories listed in CLAUDE_MONITOR_PROJECTS (os.pathsep separated)"""
+    value = os.environ.get("CLAUDE_MONITOR_PROJECTS", "")
+    return [os.path.expanduser(path) for path in value.split(os.pathsep) if path]
+
+
+class _Handler(FileSystemEventHandler):
+    """Forwards change events under one watched root to the source"""
+
+    def __init__(self, source: "FileActivitySource", root: Optional[str]):
+        self.source = source
+        self.root = root  # None for the transcript directory
+
+    def on_any_event(self, event):
+        if event.is_directory or event.event_type not in _CHANGE_EVENTS:
+            return
+        path = getattr(event, "dest_path", "") or event.src_path
+        parts = path.split(os.sep)
+        if IGNORED_DIRS.intersection(parts) or _ignored_file(parts[-1]):
+            return
+        if self.root is None:
+            self.source._post(None, path)
+            return
+        # Deletions are activity but not edits; only regular files count
+        edited = event.event_type in _EDIT_EVENTS and os.path.isfile(path)
+        self.source._post(self.root, path if edited else None)
+
+
+class FileActivitySource:
+    """Coalesced filesystem activity for a set of project directories.
+
+    Watchdog delivers events on its observer thread; they are grouped per
+    project under a lock and handed to the event loop once per burst, so a
+    large checkout or build costs one callback rather than thousands.
+    """
+
+    def __init__(self, project_dirs: Iterable[str] = (), transcript_dir: Optional[str] = None,
+                 coalesce: float = COALESCE_WINDOW):
+        self.project_dirs = [os.path.abspath(path) for path in project_dirs]
+        self.transcript_dir = transcript_dir
+        self.coalesce = coalesce
+
+        self.watched_projects: List[str] = []
+        self.watching_transcripts = False
+        self._observer = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._on_activity: Optional[Callable[[str, Set[str]], None]] = None
+        self._on_transcript: Optional[Callable[[], None]] = None
+
+        # Burst state, shared with the observer thread
+        self._lock = threading.Lock()
+        self._bursts: Dict[str, Set[str]] = {}
+        self._transcripts_changed = False
+        self._flush_scheduled = False
+
+    @property
+    def running(self) -> bool:
+        return self._observer is not None
+
+    def start(self, on_activity: Callable[[str, Set[str]], None],
+              on_transcript: Optional[Callable[[], None]] = None) -> bool:
+        """Start watching; False when watchdog is unavailable or nothing can be watched.
+
+        on_activity(project, paths) is called once per burst of changes in a
+        project directory with the regular files created or modified in it
+        (possibly none), on_transcript() once per burst of transcript writes.
+        """
+        if Observer is None:
+            logger.info("watchdog not installed; using process-based activity detection")
+            return False
+
+        self._loop = asyncio.get_running_loop()
+        self._on_activity = on_activity
+        self._on_transcript = on_transcript
+        observer = Observer()
+        self.watched_projects = [root for root in self.project_dirs if self._schedule(observer, root, root)]
+        if self.transcript_dir:
+            self.watching_transcripts = bool(self._schedule(observer, self.transcript_dir, None))
+        watched = len(self.watched_projects) + self.watching_transcripts
+        if not watched:
+            return False
+
+        observer.daemon = True
+        observer.start()
+        self._observer = observer
+        logger.info(f"Watching {watched} directories for activity")
+        return True
+
+    def stop(self):
+        """Stop watching"""
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer = None
+        self.watched_projects = []
+        self.watching_transcripts = False
+
+    def _schedule(self, observer, path: str, root: Optional[str]) -> int:
+        if not os.path.isdir(path):
+            logger.warning(f"Not watching missing directory {path}")
+            return 0
+        try:
+            observer.schedule(_Handler(self, root), path, recursive=True)
+        except OSError as e:  # e.g. inotify watch limit reached
+            logger.error(f"Cannot watch {path}: {e}")
+            return 0
+        return 1
+
+    def _post(self, root: Optional[str], path: Optional[str]):
+        """Observer thread: add an event (and the file it edited, if any) to the current burst"""
+        with self._lock:
+            if root is None:
+                self._transcripts_changed = True
+            else:
+                paths = self._bursts.setdefault(root, set())
+                if path is not None:
+                    paths.add(path)
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        self._loop.call_soon_threadsafe(self._loop.call_later, self.coalesce, self._flush)
+
+    def _flush(self):
+        """Event loop: report the finished burst"""
+        with self._lock:
+            bursts, self._bursts = self._bursts, {}
+            transcripts, self._transcripts_changed = self._transcripts_changed, False
+            self._flush_scheduled = False
+
+        for root, paths in bursts.items():
+            try:
+                self._on_activity(os.path.basename(root.rstrip(os.sep)) or root, paths)
+            except Exception as e:
+                logger.error(f"File activity callback error: {e}")
+        if transcripts and self._on_transcript is not None:
+            self._on_transcript()
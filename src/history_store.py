@@ -0,0 +1,222 @@
+"""
+Embedded time-series store for session history
+Per-minute samples are added to fixed-size, array-backed ring buffers at
+1 minute, 1 hour and 1 day resolution, so range queries read at most a few
+hundred pre-aggregated buckets instead of raw samples
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+from array import array
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from aiohttp import web
+
+logger = logging.getLogger("claude-monitor")
+
+METRICS = ("duration", "activity", "cost", "commands", "alerts")
+
+# (bucket width in seconds, bucket count): one week of minutes, 90 days of hours, 5 years of days
+RESOLUTIONS = ((60, 7 * 24 * 60), (3600, 90 * 24), (86400, 5 * 366))
+
+# Enough points for a sparkline across the 240 px display
+MAX_POINTS = 240
+DEFAULT_POINTS = 60
+
+_MAGIC = b"HIST1\n"
+_SEPARATORS = (",", ":")
+
+
+class RingSeries:
+    """One resolution: a bucket stamp ring shared by per-metric value rings"""
+
+    def __init__(self, width: int, size: int):
+        self.width = width
+        self.size = size
+        self.stamps = array("q", [-1]) * size  # Absolute bucket number held in each slot
+        self.values = {metric: array("d", [0.0]) * size for metric in METRICS}
+
+    def add(self, metric: str, value: float, timestamp: float):
+        bucket = int(timestamp // self.width)
+        slot = bucket % self.size
+        if self.stamps[slot] != bucket:
+            # Slot still holds an expired bucket; recycle it for every metric
+            self.stamps[slot] = bucket
+            for values in self.values.values():
+                values[slot] = 0.0
+        self.values[metric][slot] += value
+
+    def sum(self, metric: str, first_bucket: int, last_bucket: int) -> float:
+        """Total of metric over buckets [first_bucket, last_bucket)"""
+        stamps, values, size = self.stamps, self.values[metric], self.size
+        # The ring holds at most size buckets, so never walk more than that
+        first_bucket = max(first_bucket, last_bucket - size)
+        total = 0.0
+        for bucket in range(first_bucket, last_bucket):
+            slot = bucket % size
+            if stamps[slot] == bucket:
+                total += values[slot]
+        return total
+
+    def oldest(self, now: float) -> float:
+        """Earliest timestamp this ring can still answer for"""
+        return (int(now // self.width) - self.size + 1) * self.width
+
+
+class HistoryStore:
+    """Time-series of tracker metrics with 1 min/1 h/1 day rollups.
+
+    record() adds a value to the current bucket of every resolution, so
+    rollups are maintained on write. query() answers from the finest
+    resolution that both fits the requested step and still covers the
+    requested range.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.series = [RingSeries(width, size) for width, size in RESOLUTIONS]
+        self._task: Optional[asyncio.Task] = None
+        self._dirty = False
+
+    def record(self, metric: str, value: float, timestamp: Optional[float] = None):
+        """Add a sample to the current minute, hour and day"""
+        if not value:
+            return
+        timestamp = timestamp or time.time()
+        for series in self.series:
+            series.add(metric, value, timestamp)
+        self._dirty = True
+
+    def _pick_series(self, start: float, step: int, now: float) -> RingSeries:
+        for series in self.series:
+            if series.width <= step and series.oldest(now) <= start:
+                return series
+        # Nothing fine enough reaches back that far; fall back to the longest retention
+        return self.series[-1]
+
+    def query(self, metric: str, start: float, end: float, step: Optional[int] = None) -> Dict[str, Any]:
+        """Downsampled points of metric over [start, end), clamped to what the rings keep"""
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        if not (math.isfinite(start) and math.isfinite(end)):
+            raise ValueError("from and to must be finite epoch seconds")
+        if start >= end:
+            raise ValueError("from must be before to")
+        now = time.time()
+        end = min(end, now)
+        start = min(max(start, self.series[-1].oldest(now)), end)
+        span = max(end - start, 60)
+        step = max(60, int(step or span // DEFAULT_POINTS), int(-(-span // MAX_POINTS)))
+        step = min(step, max(60, int(-(-span // 60)) * 60))  # One point can cover the whole range
+
+        series = self._pick_series(start, step, now)
+        width = series.width
+        step = -(-step // width) * width  # Whole buckets per point
+        first = int(start // step) * step
+        count = int(-(-(end - first) // step))
+
+        points = []
+        per_point = step // width
+        bucket = first // width
+        for _ in range(count):
+            total = series.sum(metric, bucket, bucket + per_point)
+            points.append(round(total, 4) if metric == "cost" else int(total))
+            bucket += per_point
+
+        return {
+            "metric": metric,
+            "from": first,
+            "step": step,
+            "resolution": width,
+            "total": round(sum(points), 4) if metric == "cost" else sum(points),
+            "points": points,
+        }
+
+    def start(self, tick: Callable[[float], Dict[str, float]], save_every: float = 600.0):
+        """Sample tick(elapsed_seconds) once a minute and save periodically"""
+        self._task = asyncio.create_task(self._run(tick, save_every))
+
+    async def stop(self):
+        """Stop sampling and save the rings"""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        if self.path and self._dirty:
+            await asyncio.get_running_loop().run_in_executor(None, self.save)
+
+    async def _run(self, tick: Callable[[float], Dict[str, float]], save_every: float):
+        loop = asyncio.get_running_loop()
+        last_tick = last_save = time.monotonic()
+        while True:
+            # Sample on minute boundaries so each sample lands in its own bucket
+            await asyncio.sleep(60 - time.time() % 60)
+            now = time.monotonic()
+            try:
+                for metric, value in tick(now - last_tick).items():
+                    self.record(metric, value)
+                if self.path and self._dirty and now - last_save >= save_every:
+                    await loop.run_in_executor(None, self.save)
+                    last_save = now
+            except Exception as e:
+                logger.error(f"History sampler error: {e}")
+            last_tick = now
+
+    def save(self):
+        """Write every ring to disk (call from a worker thread)"""
+        self._dirty = False
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_MAGIC)
+            for series in self.series:
+                f.write(series.stamps.tobytes())
+                for metric in METRICS:
+                    f.write(series.values[metric].tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def load(self):
+        """Read rings saved by save(); layout changes start a fresh history"""
+        if not self.path:
+            return
+        try:
+            with open(self.path, "rb") as f:
+                if f.read(len(_MAGIC)) != _MAGIC:
+                    raise ValueError("bad header")
+                for series in self.series:
+                    stamps = array("q")
+                    stamps.fromfile(f, series.size)
+                    values = {}
+                    for metric in METRICS:
+                        values[metric] = array("d")
+                        values[metric].fromfile(f, series.size)
+                    series.stamps, series.values = stamps, values
+        except FileNotFoundError:
+            pass
+        except (ValueError, EOFError) as e:
+            logger.error(f"Ignoring unreadable history file: {e}")
+            self.series = [RingSeries(width, size) for width, size in RESOLUTIONS]
+
+
+def history_params(request: web.Request) -> Tuple[str, float, float, Optional[int]]:
+    """Parse ?metric=&from=&to=&step= (epoch seconds; defaults to the last 24 hours)"""
+    now = time.time()
+    metric = request.query.get("metric", "duration")
+    end = float(request.query.get("to", now))
+    start = float(request.query.get("from", end - 86400))
+    step = int(request.query["step"]) if "step" in request.query else None
+    return metric, start, end, step
+
+
+async def history_response(request: web.Request, store: HistoryStore) -> web.Response:
+    """Serve GET /history as a compact JSON series"""
+    try:
+        result = store.query(*history_params(request))
+    except ValueError as e:
+        return web.json_response({"error": str(e)}, status=400)
+    return web.json_response(result, dumps=lambda data: json.dumps(data, separators=_SEPARATORS))
@@ -5,31 +5,48 @@ Tracks Claude Code sessions and sends data to M5StickC PLUS
 """
 
 import asyncio
-import json
+import os
 import time
-import psutil
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
-import aiohttp
+from datetime import date, datetime, timedelta
+from typing import Dict, Any, Optional, Set
 from aiohttp import web
 import mcp.server.stdio
 import mcp.types as types
 from mcp.server import NotificationOptions, Server
+from process_watcher import ProcessWatcher
+from status_snapshot import StatusSnapshot, long_poll_params, status_response
+from event_stream import EventPublisher, stream_events
+from subscriber_hub import SubscriberHub
+from session_registry import Session, SessionRegistry
+from session_journal import SessionJournal
+from history_store import METRICS, HistoryStore, history_response
+from transcript_ingester import TranscriptIngester, Usage
+from file_activity import FileActivitySource, project_dirs_from_env
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("claude-monitor")
 
+# Sessions with no activity for this long are ended
+SESSION_TIMEOUT = 5 * 60
+
 class SessionTracker:
-    def __init__(self):
-        self.session_start: Optional[datetime] = None
+    def __init__(self, journal: Optional[SessionJournal] = None,
+                 history: Optional[HistoryStore] = None):
         self.total_duration: timedelta = timedelta()
-        self.estimated_cost: float = 0.0
-        self.command_pending: bool = False
-        self.session_active: bool = False
-        self.m5stick_ip: Optional[str] = None
-        self.last_activity: Optional[datetime] = None
+        self.user: Optional[str] = os.environ.get("USER") or os.environ.get("USERNAME")
+        
+        # Live sessions keyed by session id (defaults to the project name)
+        self.sessions = SessionRegistry(on_change=self._session_changed)
+        
+        # Every mutation is applied from a record and journaled, so a
+        # restart can rebuild the same state by replaying the records
+        self.journal = journal
+        self._replaying = False
+        
+        # Per-minute time series of activity, cost, commands and alerts
+        self.history = history
         
         # Cost estimation (rough approximations)
         self.model_rates = {
@@ -38,107 +55,439 @@ class SessionTracker:
         }
         
         # Session stats
-        self.stats = {
+        self.stats_day = date.today().isoformat()
+        self.stats = self._empty_stats()
+        
+        # Pre-serialized /status payload, rebuilt only on state changes
+        self.snapshot = StatusSnapshot()
+        self.updated_at = datetime.now()
+    
+    @staticmethod
+    def _empty_stats() -> Dict[str, Any]:
+        return {
             "sessions_today": 0,
             "total_cost_today": 0.0,
             "longest_session": 0,
-            "commands_run": 0
+            "commands_run": 0,
+            "files_edited": 0
         }
     
-    def start_session(self, project_name: str = "Default"):
-        """Start a new Claude session"""
-        if not self.session_active:
-            self.session_start = datetime.now()
-            self.session_active = True
-            self.last_activity = self.session_start
-            self.stats["sessions_today"] += 1
-            logger.info(f"Session started: {project_name}")
+    @property
+    def session_active(self) -> bool:
+        return len(self.sessions) > 0
+    
+    @property
+    def command_pending(self) -> bool:
+        return self.sessions.alerts > 0
+    
+    @property
+    def estimated_cost(self) -> float:
+        return self.sessions.cost
+    
+    @property
+    def project(self) -> str:
+        current = self.sessions.get()
+        return current.project if current else "Claude Code"
+    
+    def _state_changed(self):
+        """Invalidate the cached status payload after a mutation"""
+        self.updated_at = datetime.now()
+        self.snapshot.invalidate()
+    
+    def _session_changed(self, session: Session):
+        """Registry callback: invalidate the aggregate and the session's own view"""
+        if session.snapshot is not None:
+            session.snapshot.invalidate()
+        self._state_changed()
+    
+    def _resolve(self, session_id: Optional[str]) -> str:
+        """Pin a default session id before journaling, so replay is unambiguous"""
+        return session_id or self.sessions.current_id or "Auto-detected"
+    
+    def _record(self, event: str, session_id: Optional[str], timestamp: Optional[float] = None, **fields):
+        """Apply an event to the in-memory state and append it to the journal"""
+        record = {"e": event, "t": timestamp or time.time(), "s": session_id, **fields}
+        result = self._apply(record)
+        if self.journal is not None:
+            self.journal.append(record)
+        return result
+    
+    def _roll_day(self, timestamp: float):
+        """Reset the daily stats when a record falls on a new day"""
+        day = date.fromtimestamp(timestamp).isoformat()
+        if day > self.stats_day:  # Back-dated records (idle session ends) never roll back
+            self.stats_day = day
+            self.stats = self._empty_stats()
+            self._state_changed()
+    
+    def _open(self, session_id: str, project_name: str, timestamp: float) -> Session:
+        self.stats["sessions_today"] += 1
+        if not self._replaying:
+            logger.info(f"Session started: {session_id} ({project_name})")
+        return self.sessions.open(session_id, project_name, timestamp)
+    
+    def _apply(self, record: Dict[str, Any]):
+        """Mutate the tracker state from one journal record"""
+        event, timestamp, session_id = record["e"], record["t"], record["s"]
+        self._roll_day(timestamp)
+        
+        if event == "start":
+            if session_id in self.sessions:
+                return False
+            self._open(session_id, record["p"], timestamp)
             return True
-        return False
-    
-    def end_session(self):
-        """End the current session"""
-        if self.session_active and self.session_start:
-            duration = datetime.now() - self.session_start
-            self.total_duration += duration
-            self.session_active = False
+        
+        if event == "end":
+            session = self.sessions.close(session_id)
+            if session is None:
+                return 0
+            session_seconds = timestamp - session.started
+            self.total_duration += timedelta(seconds=session_seconds)
             
             # Update stats
-            session_seconds = duration.total_seconds()
+            self.stats["total_cost_today"] += session.cost
             if session_seconds > self.stats["longest_session"]:
                 self.stats["longest_session"] = session_seconds
             
-            logger.info(f"Session ended. Duration: {duration}")
-            return duration.total_seconds()
-        return 0
+            if not self._replaying:
+                logger.info(f"Session {session_id} ended. Duration: {timedelta(seconds=int(session_seconds))}")
+            return session_seconds
+        
+        if event == "ack":
+            # No session id acknowledges every session's alerts
+            if session_id is None:
+                self.sessions.clear_alerts()
+            elif session_id in self.sessions:
+                self.sessions.clear_alerts(self.sessions.get(session_id))
+            return None
+        
+        # Remaining events auto-start their session when Claude shows up unannounced
+        session = self.sessions.get(session_id)
+        if session is None:
+            session = self._open(session_id, session_id, timestamp)
+        
+        if event == "activity":
+            self.sessions.touch(session, timestamp)
+            self._record_history("activity", 1, timestamp)
+        elif event == "command":
+            self.stats["commands_run"] += 1
+            self.sessions.add(session, commands=1)
+            self._record_history("commands", 1, timestamp)
+        elif event == "cost":
+            self._record_history("cost", record["c"] - session.cost, timestamp)
+            self.sessions.set_cost(session, record["c"])
+        elif event == "alert":
+            self.sessions.push_alert(session, timestamp)
+            self._record_history("alerts", 1, timestamp)
+        elif event == "usage":
+            self.stats["commands_run"] += record["k"]
+            self.stats["files_edited"] += record["f"]
+            self.sessions.touch(session, timestamp)
+            self.sessions.add(session, record["k"], record["f"], record["c"])
+            self._record_history("cost", record["c"], timestamp)
+            self._record_history("commands", record["k"], timestamp)
+        elif event == "files":
+            self.stats["files_edited"] += record["f"]
+            self.sessions.add(session, files_edited=record["f"])
+        return None
     
-    def update_activity(self):
+    def _record_history(self, metric: str, value: float, timestamp: float):
+        # Replayed records were already sampled before the restart
+        if self.history is not None and not self._replaying:
+            self.history.record(metric, value, timestamp)
+    
+    def history_tick(self, elapsed: float) -> Dict[str, float]:
+        """Per-minute sample of session time (seconds summed over live sessions)"""
+        return {"duration": len(self.sessions) * elapsed}
+    
+    def export_state(self) -> Dict[str, Any]:
+        """Compact snapshot of the tracker state for journal compaction"""
+        return {
+            "day": self.stats_day,
+            "stats": dict(self.stats),
+            "total_duration": self.total_duration.total_seconds(),
+            "sessions": [{
+                "s": s.session_id,
+                "p": s.project,
+                "started": s.started,
+                "last_activity": s.last_activity,
+                "cost": s.cost,
+                "commands": s.commands,
+                "files_edited": s.files_edited,
+                "alerts": list(s.alerts),
+            } for s in self.sessions]
+        }
+    
+    def restore(self):
+        """Rebuild state from the latest journal snapshot plus the records after it"""
+        if self.journal is None:
+            return
+        started = time.perf_counter()
+        state, records = self.journal.load()
+        
+        self._replaying = True
+        try:
+            if state:
+                self.stats_day = state["day"]
+                self.stats.update(state["stats"])
+                self.total_duration = timedelta(seconds=state["total_duration"])
+                for saved in state["sessions"]:
+                    session = self.sessions.open(saved["s"], saved["p"], saved["started"])
+                    self.sessions.add(session, saved["commands"], saved["files_edited"], saved["cost"])
+                    for alert_time in saved["alerts"]:
+                        self.sessions.push_alert(session, alert_time)
+                    self.sessions.touch(session, saved["last_activity"])
+            for record in records:
+                self._apply(record)
+        finally:
+            self._replaying = False
+        
+        # Sessions that went idle while the server was down end at their last
+        # journaled activity, so the downtime doesn't count toward their duration
+        ended = self.end_idle_sessions()
+        self._roll_day(time.time())
+        
+        logger.info(f"Restored {len(self.sessions)} sessions from journal, ended {ended} idle "
+                    f"({len(records)} records replayed in {(time.perf_counter() - started) * 1000:.1f} ms)")
+    
+    def start_session(self, project_name: str = "Default", session_id: Optional[str] = None):
+        """Start a new Claude session"""
+        session_id = session_id or project_name
+        if session_id in self.sessions:
+            return False
+        return self._record("start", session_id, p=project_name)
+    
+    def end_session(self, session_id: Optional[str] = None, timestamp: Optional[float] = None):
+        """End a session (the current one by default), now or at timestamp"""
+        session = self.sessions.get(session_id)
+        if session is None:
+            return 0
+        return self._record("end", session.session_id, timestamp)
+    
+    def end_idle_sessions(self, now: Optional[float] = None) -> int:
+        """End sessions inactive for SESSION_TIMEOUT at their last activity; returns how many"""
+        now = now or time.time()
+        idle = [s for s in self.sessions if now - s.last_activity > SESSION_TIMEOUT]
+        for session in idle:
+            logger.info(f"Session timeout - ending session {session.session_id}")
+            self.end_session(session.session_id, session.last_activity)
+        return len(idle)
+    
+    def update_activity(self, session_id: Optional[str] = None):
         """Update last activity timestamp"""
-        self.last_activity = datetime.now()
+        session_id = self._resolve(session_id)
+        session = self.sessions.get(session_id)
+        now = time.time()
+        
+        # Journal activity at minute resolution; it only feeds the inactivity timeout
+        if session is None or int(now // 60) != int(session.last_activity // 60):
+            self._record("activity", session_id)
+        else:
+            self.sessions.touch(session, now)
+    
+    def get_current_duration(self, session_id: Optional[str] = None) -> float:
+        """Get a session's duration in seconds (the current one by default)"""
+        session = self.sessions.get(session_id)
+        return session.duration() if session else 0
+    
+    def estimate_cost(self, tokens_used: int = None, session_id: Optional[str] = None) -> float:
+        """Estimate session cost based on duration and activity.
+        
+        Fallback for sessions without transcripts; record_usage() reports real costs.
+        """
+        session = self.sessions.get(session_id)
+        if session is None:
+            return 0.0
         
-        # Auto-start session if not active
-        if not self.session_active:
-            self.start_session("Auto-detected")
-    
-    def get_current_duration(self) -> float:
-        """Get current session duration in seconds"""
-        if self.session_active and self.session_start:
-            return (datetime.now() - self.session_start).total_seconds()
-        return 0
-    
-    def estimate_cost(self, tokens_used: int = None) -> float:
-        """Estimate session cost based on duration and activity"""
         if tokens_used:
             # If we have actual token count
             input_cost = tokens_used * 0.7 * self.model_rates["input_per_token"]
             output_cost = tokens_used * 0.3 * self.model_rates["output_per_token"]
-            self.estimated_cost = input_cost + output_cost
+            cost = input_cost + output_cost
         else:
             # Rough estimation based on time and activity
-            duration_minutes = self.get_current_duration() / 60
+            duration_minutes = session.duration() / 60
             estimated_tokens = duration_minutes * 500  # ~500 tokens per minute estimate
-            self.estimated_cost = estimated_tokens * 0.000009  # Average rate
+            cost = estimated_tokens * 0.000009  # Average rate
         
-        return self.estimated_cost
+        if cost != session.cost:
+            self._record("cost", session.session_id, c=cost)
+        return cost
     
-    def set_command_pending(self, pending: bool):
-        """Set command approval pending state"""
-        self.command_pending = pending
+    def set_command_pending(self, pending: bool, session_id: Optional[str] = None):
+        """Queue a command approval alert, or acknowledge pending ones.
+        
+        Without a session id, alerts go to the current session and
+        acknowledgements clear every session's queue.
+        """
         if pending:
+            self._record("alert", self._resolve(session_id))
             logger.info("Command approval required!")
+        elif session_id is None:
+            if self.sessions.alerts:
+                self._record("ack", None)
+        else:
+            session = self.sessions.get(session_id)
+            if session is not None and session.alerts:
+                self._record("ack", session_id)
     
-    def get_session_data(self) -> Dict[str, Any]:
-        """Get current session data for M5StickC"""
+    def record_command(self, session_id: Optional[str] = None):
+        """Count a command run in a session"""
+        self._record("command", self._resolve(session_id))
+    
+    def record_files(self, project: str, paths: Set[str]):
+        """Count files first edited in a project's session during one burst of changes"""
+        self.update_activity(project)
+        files_edited = self.sessions.mark_edited(self.sessions.get(project), paths)
+        if files_edited:
+            self._record("files", project, f=files_edited)
+    
+    def record_usage(self, usage: Usage):
+        """Add real token cost and tool counts read from a project's transcripts"""
+        self._record("usage", usage.project, c=usage.cost, k=usage.commands, f=usage.files_edited)
+    
+    def _static_session_data(self) -> Dict[str, Any]:
+        """Aggregate fields that only change when the tracker state changes"""
         return {
             "status": "active" if self.session_active else "idle",
-            "duration": int(self.get_current_duration()),
             "cost": round(self.estimated_cost, 3),
             "alert_pending": self.command_pending,
-            "project": "Claude Code",
-            "timestamp": datetime.now().isoformat(),
-            "stats": self.stats
+            "alerts": self.sessions.alerts,
+            "sessions": len(self.sessions),
+            "started": int(self.sessions.started),
+            "project": self.project,
+            "timestamp": self.updated_at.isoformat(),
+            "stats": dict(self.stats)
         }
+    
+    def _static_session_view(self, session: Session) -> Dict[str, Any]:
+        """Per-session fields that only change when that session changes"""
+        return {
+            "status": "active",
+            "session": session.session_id,
+            "cost": round(session.cost, 3),
+            "alert_pending": bool(session.alerts),
+            "alerts": len(session.alerts),
+            "project": session.project,
+            "started": int(session.started),
+            "commands": session.commands,
+            "files_edited": session.files_edited,
+            "timestamp": self.updated_at.isoformat()
+        }
+    
+    def status_snapshot(self, session_id: Optional[str] = None) -> Optional[StatusSnapshot]:
+        """Snapshot backing /status, or a session's own view (None if unknown)"""
+        if session_id is None:
+            return self.snapshot
+        session = self.sessions.get(session_id)
+        if session is None:
+            return None
+        if session.snapshot is None:
+            session.snapshot = StatusSnapshot()
+        return session.snapshot
+    
+    def get_session_data(self, session_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Get aggregate (or per-session) data for M5StickC"""
+        if session_id is None:
+            data = self._static_session_data()
+            data["duration"] = int(self.sessions.active_duration())
+            data["version"] = self.snapshot.version
+            return data
+        
+        session = self.sessions.get(session_id)
+        if session is None:
+            return None
+        data = self._static_session_view(session)
+        data["duration"] = int(session.duration())
+        data["version"] = self.status_snapshot(session_id).version
+        return data
+    
+    def get_project_data(self, project: str) -> Dict[str, Any]:
+        """Data of a project's live session, or an idle view when it has none"""
+        for session in self.sessions:
+            if session.project == project:
+                return self.get_session_data(session.session_id)
+        return {"status": "idle", "project": project, "duration": 0, "alerts": 0, "alert_pending": False}
+    
+    def get_snapshot(self, session_id: Optional[str] = None):
+        """Get the pre-serialized status payload and its ETag (None if unknown)"""
+        if session_id is None:
+            dynamic = {"duration": int(self.sessions.active_duration())}
+            return self.snapshot.render(self._static_session_data, dynamic)
+        
+        session = self.sessions.get(session_id)
+        if session is None:
+            return None
+        dynamic = {"duration": int(session.duration())}
+        return self.status_snapshot(session_id).render(lambda: self._static_session_view(session), dynamic)
+
+# Global session tracker, persisted to an append-only journal
+journal = SessionJournal()
+tracker = SessionTracker(journal, HistoryStore(os.path.join(journal.directory, "history.bin")))
+
+# Devices subscribed to the push channel, fed once per state change
+hub = SubscriberHub()
+publisher = EventPublisher(tracker.snapshot, tracker.get_session_data, hub,
+                           tracker.get_project_data, tracker.user)
 
-# Global session tracker
-tracker = SessionTracker()
+# Real token usage tailed from Claude Code's transcripts, offsets kept next to the journal
+transcripts = TranscriptIngester(state_path=os.path.join(journal.directory, "transcripts.json"))
+
+# Edits in project directories and transcript writes, via inotify-backed watchers
+file_activity = FileActivitySource(project_dirs_from_env(), transcripts.directory)
+
+# Incremental index of running processes (replaces per-poll psutil scans)
+process_watcher = ProcessWatcher(patterns=("claude",))
 
 # Web server for M5StickC communication
 async def handle_status(request):
-    """Endpoint for M5StickC to get session status"""
-    session_data = tracker.get_session_data()
-    return web.json_response(session_data)
+    """Endpoint for M5StickC to get aggregate (or ?session=<id>) status, long-polls with ?since=&wait="""
+    device = request.query.get("device")
+    if device:
+        hub.touch(device, request.remote)
+    
+    session_id = request.query.get("session")
+    snapshot = tracker.status_snapshot(session_id)
+    if snapshot is None:
+        return web.json_response({"error": f"Unknown session: {session_id}"}, status=404)
+    
+    since, wait = long_poll_params(request)
+    if since is not None and wait:
+        await snapshot.wait(since, wait)
+    
+    rendered = tracker.get_snapshot(session_id)
+    if rendered is None:
+        return web.json_response({"error": f"Session ended: {session_id}"}, status=404)
+    body, etag = rendered
+    return status_response(request, body, etag, snapshot.version)
+
+async def handle_events(request):
+    """Server-Sent Events stream of status deltas for M5StickC"""
+    return await stream_events(request, hub, publisher)
+
+async def handle_devices(request):
+    """List subscribed and recently polling devices"""
+    return web.json_response({"devices": hub.devices()})
+
+async def handle_history(request):
+    """Downsampled metric history: /history?metric=&from=&to=&step="""
+    return await history_response(request, tracker.history)
 
 async def handle_acknowledge(request):
-    """Endpoint for M5StickC to acknowledge alerts"""
-    tracker.set_command_pending(False)
+    """Endpoint for M5StickC to acknowledge alerts (all sessions, or ?session=<id>)"""
+    tracker.set_command_pending(False, request.query.get("session"))
     return web.json_response({"status": "acknowledged"})
 
 async def start_web_server():
     """Start web server for M5StickC communication"""
     app = web.Application()
     app.router.add_get('/status', handle_status)
+    app.router.add_get('/events', handle_events)
+    app.router.add_get('/devices', handle_devices)
+    app.router.add_get('/history', handle_history)
     app.router.add_post('/acknowledge', handle_acknowledge)
     
+    publisher.start()
     runner = web.AppRunner(app)
     await runner.setup()
     site = web.TCPSite(runner, '0.0.0.0', 8080)
@@ -161,19 +510,39 @@ async def handle_list_tools() -> list[types.Tool]:
                     "project_name": {
                         "type": "string",
                         "description": "Optional project identifier"
+                    },
+                    "session_id": {
+                        "type": "string",
+                        "description": "Optional session identifier (defaults to the project name)"
                     }
                 }
             }
         ),
         types.Tool(
             name="end_session", 
-            description="End the current Claude session",
-            inputSchema={"type": "object", "properties": {}}
+            description="End the current (or a given) Claude session",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "session_id": {
+                        "type": "string",
+                        "description": "Optional session identifier (defaults to the current session)"
+                    }
+                }
+            }
         ),
         types.Tool(
             name="get_session_stats",
-            description="Get current session statistics",
-            inputSchema={"type": "object", "properties": {}}
+            description="Get aggregate statistics, or one session's with session_id",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "session_id": {
+                        "type": "string",
+                        "description": "Optional session identifier"
+                    }
+                }
+            }
         ),
         types.Tool(
             name="set_alert_mode",
@@ -189,6 +558,10 @@ async def handle_list_tools() -> list[types.Tool]:
                     "command_pending": {
                         "type": "boolean",
                         "description": "Set command approval pending"
+                    },
+                    "session_id": {
+                        "type": "string",
+                        "description": "Optional session identifier (defaults to the current session)"
                     }
                 }
             }
@@ -196,7 +569,37 @@ async def handle_list_tools() -> list[types.Tool]:
         types.Tool(
             name="update_activity",
             description="Update session activity (auto-called by Claude Code)",
-            inputSchema={"type": "object", "properties": {}}
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "session_id": {
+                        "type": "string",
+                        "description": "Optional session identifier (defaults to the current session)"
+                    }
+                }
+            }
+        ),
+        types.Tool(
+            name="get_history",
+            description="Get the history of a session metric, e.g. time spent in sessions this week",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "metric": {
+                        "type": "string",
+                        "enum": list(METRICS),
+                        "description": "Metric to report (default: duration, in seconds)"
+                    },
+                    "hours": {
+                        "type": "number",
+                        "description": "How far back to look (default: 24)"
+                    },
+                    "step_minutes": {
+                        "type": "integer",
+                        "description": "Optional bucket size; chosen automatically when omitted"
+                    }
+                }
+            }
         )
     ]
 
@@ -207,33 +610,57 @@ async def handle_call_tool(name: str, arguments: dict | None) -> list[types.Text
     
     if name == "start_session":
         project_name = arguments.get("project_name", "Claude Code Session")
-        success = tracker.start_session(project_name)
+        success = tracker.start_session(project_name, arguments.get("session_id"))
         return [types.TextContent(
             type="text",
             text=f"Session {'started' if success else 'already active'}: {project_name}"
         )]
     
     elif name == "end_session":
-        duration = tracker.end_session()
+        duration = tracker.end_session(arguments.get("session_id"))
         return [types.TextContent(
             type="text", 
             text=f"Session ended. Duration: {duration:.1f} seconds"
         )]
     
     elif name == "get_session_stats":
-        data = tracker.get_session_data()
+        session_id = arguments.get("session_id")
+        data = tracker.get_session_data(session_id)
+        if data is None:
+            return [types.TextContent(type="text", text=f"Unknown session: {session_id}")]
+        
+        if session_id is not None:
+            stats_text = f"""
+Session {data['session']} ({data['project']}):
+- Duration: {data['duration']} seconds
+- Estimated Cost: ${data['cost']:.3f}
+- Commands Run: {data['commands']}
+- Files Edited: {data['files_edited']}
+- Pending Alerts: {data['alerts']}
+            """
+            return [types.TextContent(type="text", text=stats_text)]
+        
+        sessions_text = "\n".join(
+            f"- {s.session_id} ({s.project}): {int(s.duration())}s, ${s.cost:.3f}, {len(s.alerts)} alerts"
+            for s in tracker.sessions
+        ) or "- none"
         stats_text = f"""
 Current Session Status:
 - Status: {data['status']}
+- Active Sessions: {data['sessions']}
 - Duration: {data['duration']} seconds
 - Estimated Cost: ${data['cost']:.3f}
 - Alert Pending: {data['alert_pending']}
 
+Active Sessions:
+{sessions_text}
+
 Today's Stats:
 - Sessions: {data['stats']['sessions_today']}
 - Total Cost: ${data['stats']['total_cost_today']:.3f}
 - Longest Session: {data['stats']['longest_session']:.0f}s
 - Commands Run: {data['stats']['commands_run']}
+- Files Edited: {data['stats']['files_edited']}
         """
         return [types.TextContent(type="text", text=stats_text)]
     
@@ -241,7 +668,7 @@ Today's Stats:
         mode = arguments.get("mode", "enabled")
         command_pending = arguments.get("command_pending", False)
         
-        tracker.set_command_pending(command_pending)
+        tracker.set_command_pending(command_pending, arguments.get("session_id"))
         
         return [types.TextContent(
             type="text",
@@ -249,13 +676,35 @@ Today's Stats:
         )]
     
     elif name == "update_activity":
-        tracker.update_activity()
-        tracker.stats["commands_run"] += 1
+        session_id = arguments.get("session_id")
+        tracker.update_activity(session_id)
+        tracker.record_command(session_id)
         return [types.TextContent(
             type="text",
             text="Activity updated"
         )]
     
+    elif name == "get_history":
+        metric = arguments.get("metric", "duration")
+        hours = float(arguments.get("hours", 24))
+        step_minutes = arguments.get("step_minutes")
+        now = time.time()
+        result = tracker.history.query(metric, now - hours * 3600, now,
+                                       step_minutes * 60 if step_minutes else None)
+        
+        if metric == "duration":
+            total_text = str(timedelta(seconds=int(result["total"])))
+        elif metric == "cost":
+            total_text = f"${result['total']:.3f}"
+        else:
+            total_text = str(result["total"])
+        history_text = f"""
+{metric.capitalize()} over the last {hours:g} hours: {total_text}
+- Step: {result['step'] // 60} minutes ({len(result['points'])} points)
+- Points: {result['points']}
+        """
+        return [types.TextContent(type="text", text=history_text)]
+    
     else:
         raise ValueError(f"Unknown tool: {name}")
 
@@ -263,27 +712,40 @@ async def main():
     """Main server loop"""
     logger.info("Starting Claude Session Monitor MCP Server...")
     
+    # Rebuild stats and live sessions from the journal, then keep it appending
+    tracker.restore()
+    tracker.journal.start(tracker.export_state)
+    tracker.history.load()
+    tracker.history.start(tracker.history_tick)
+    
+    # Filesystem events drive activity (project dirs) and transcript scans (the
+    # transcript dir) when watchdog is available; each falls back on its own
+    file_activity.start(tracker.record_files, transcripts.wake)
+    watching = bool(file_activity.watched_projects)
+    if watching:
+        transcripts.count_edits = False
+    transcripts.start(tracker.record_usage, interval=300 if file_activity.watching_transcripts else 5)
+    
     # Start web server for M5StickC
     await start_web_server()
     
-    # Auto-detect Claude Code activity
+    # Without project-dir events, fall back to process-based activity detection
+    def on_claude_process(pattern, running):
+        if running:
+            tracker.update_activity()
+    
+    if not watching:
+        process_watcher.add_listener(on_claude_process)
+        process_watcher.start()
+    
     async def activity_monitor():
         while True:
-            # Check for Claude Code process activity
-            for proc in psutil.process_iter(['name', 'create_time']):
-                try:
-                    if 'claude' in proc.info['name'].lower():
-                        tracker.update_activity()
-                        break
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    continue
+            # Check for Claude Code process activity (O(1) index lookup)
+            if not watching and process_watcher.is_running("claude"):
+                tracker.update_activity()
             
-            # Check for session timeout (5 minutes inactive)
-            if tracker.session_active and tracker.last_activity:
-                inactive_time = datetime.now() - tracker.last_activity
-                if inactive_time > timedelta(minutes=5):
-                    logger.info("Session timeout - ending session")
-                    tracker.end_session()
+            # Check for session timeouts (5 minutes inactive)
+            tracker.end_idle_sessions()
             
             await asyncio.sleep(30)  # Check every 30 seconds
     
@@ -291,12 +753,18 @@ async def main():
     asyncio.create_task(activity_monitor())
     
     # Run MCP server
-    async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
-        await server.run(
-            read_stream, 
-            write_stream,
-            NotificationOptions()
-        )
+    try:
+        async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
+            await server.run(
+                read_stream, 
+                write_stream,
+                NotificationOptions()
+            )
+    finally:
+        file_activity.stop()
+        transcripts.stop()
+        await tracker.history.stop()
+        await tracker.journal.stop()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,228 @@
+"""
+Incremental process watcher for Claude Code activity detection
+Keeps a PID -> name index up to date so "is claude running" is O(1)
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import struct
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    import psutil
+except ImportError:  # Only needed where /proc is unavailable
+    psutil = None
+
+logger = logging.getLogger("claude-monitor")
+
+# Netlink process connector constants (linux/connector.h, linux/cn_proc.h)
+NETLINK_CONNECTOR = 11
+CN_IDX_PROC = 1
+CN_VAL_PROC = 1
+PROC_CN_MCAST_LISTEN = 1
+NLMSG_DONE = 3
+PROC_EVENT_FORK = 0x00000001
+PROC_EVENT_EXEC = 0x00000002
+PROC_EVENT_COMM = 0x00000200
+PROC_EVENT_EXIT = 0x80000000
+
+_NLMSG_HDR = struct.Struct("=IHHII")
+_CN_MSG_HDR = struct.Struct("=IIIIHH")
+_PROC_EVENT_HDR = struct.Struct("=IIQ")
+_PROC_EVENT_IDS = struct.Struct("=II")
+_PROC_EVENT_FORK = struct.Struct("=IIII")
+
+
+class ProcessWatcher:
+    """Tracks running processes whose name contains one of the given patterns.
+
+    The index is updated from a netlink proc connector when the kernel
+    allows it (exec/exit events, with an occasional resync) and otherwise
+    from a cheap diff of /proc, falling back to psutil on other platforms.
+    """
+
+    def __init__(self, patterns: Iterable[str] = ("claude",),
+                 poll_interval: float = 2.0, resync_interval: float = 60.0):
+        self.patterns: Tuple[str, ...] = tuple(p.lower() for p in patterns)
+        self.poll_interval = poll_interval
+        self.resync_interval = resync_interval
+
+        # PID -> lowercase process name, and pattern -> matching PIDs
+        self._names: Dict[int, str] = {}
+        self._matches: Dict[str, Set[int]] = {p: set() for p in self.patterns}
+        self._listeners: List[Callable[[str, bool], None]] = []
+
+        self._proc_root = "/proc" if os.path.isdir("/proc/self") else None
+        self._netlink: Optional[socket.socket] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def backend(self) -> str:
+        """Name of the update source currently in use"""
+        if self._netlink is not None:
+            return "netlink"
+        return "proc" if self._proc_root else "psutil"
+
+    def is_running(self, pattern: Optional[str] = None) -> bool:
+        """True if a process matching pattern (default: first pattern) is alive"""
+        key = (pattern or self.patterns[0]).lower()
+        if key not in self._matches:
+            raise ValueError(f"Process watcher is not tracking pattern {pattern!r}")
+        return bool(self._matches[key])
+
+    def add_listener(self, callback: Callable[[str, bool], None]):
+        """Register callback(pattern, running) fired when a pattern starts/stops matching"""
+        self._listeners.append(callback)
+
+    def start(self) -> asyncio.Task:
+        """Prime the index and start watching in the background"""
+        self._apply(*self._scan(frozenset(), full=True))
+        self._netlink = self._open_netlink()
+        logger.info(f"Process watcher started ({self.backend}, {len(self._names)} processes)")
+        self._task = asyncio.create_task(self._run())
+        return self._task
+
+    def stop(self):
+        """Stop watching and release the netlink socket"""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        if self._netlink is not None:
+            try:
+                asyncio.get_running_loop().remove_reader(self._netlink.fileno())
+            except RuntimeError:
+                pass
+            self._netlink.close()
+            self._netlink = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        if self._netlink is not None:
+            loop.add_reader(self._netlink.fileno(), self._drain_netlink)
+
+        last_full = loop.time()
+        while True:
+            interval = self.resync_interval if self._netlink is not None else self.poll_interval
+            await asyncio.sleep(interval)
+            try:
+                # Polling only names new PIDs; a periodic full rescan also catches
+                # known PIDs that exec'd into (or out of) a watched name
+                full = loop.time() - last_full >= self.resync_interval
+                if full:
+                    last_full = loop.time()
+                known = frozenset(self._names)
+                added, removed = await loop.run_in_executor(None, self._scan, known, full)
+                self._apply(added, removed)
+            except Exception as e:
+                logger.error(f"Process watcher scan error: {e}")
+
+    # Index maintenance
+
+    def _apply(self, added: Dict[int, str], removed: Iterable[int]):
+        before = {p: bool(pids) for p, pids in self._matches.items()}
+
+        for pid in removed:
+            self._names.pop(pid, None)
+            for pids in self._matches.values():
+                pids.discard(pid)
+
+        for pid, name in added.items():
+            self._names[pid] = name
+            for pattern, pids in self._matches.items():
+                if pattern in name:
+                    pids.add(pid)
+                else:
+                    pids.discard(pid)
+
+        for pattern, pids in self._matches.items():
+            running = bool(pids)
+            if running != before[pattern]:
+                for callback in self._listeners:
+                    callback(pattern, running)
+
+    def _scan(self, known: frozenset, full: bool = False) -> Tuple[Dict[int, str], Set[int]]:
+        """Diff the live PID set against known; only new PIDs are named unless full"""
+        if self._proc_root:
+            pids = {int(entry) for entry in os.listdir(self._proc_root) if entry.isdigit()}
+            names = {pid: self._read_comm(pid) for pid in (pids if full else pids - known)}
+        else:
+            pids = set(psutil.pids())
+            names = {}
+            for pid in (pids if full else pids - known):
+                try:
+                    names[pid] = psutil.Process(pid).name().lower()
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    names[pid] = ""
+        return names, set(known - pids)
+
+    def _read_comm(self, pid: int) -> str:
+        try:
+            with open(f"{self._proc_root}/{pid}/comm", "rb") as f:
+                return f.read().strip().decode("utf-8", "replace").lower()
+        except OSError:
+            return ""
+
+    # Netlink proc connector
+
+    def _open_netlink(self) -> Optional[socket.socket]:
+        """Subscribe to kernel process events; None if unsupported or not permitted"""
+        if not self._proc_root or not hasattr(socket, "AF_NETLINK"):
+            return None
+        sock = None
+        try:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_CONNECTOR)
+            sock.bind((os.getpid(), CN_IDX_PROC))
+            payload = struct.pack("=I", PROC_CN_MCAST_LISTEN)
+            cn_msg = _CN_MSG_HDR.pack(CN_IDX_PROC, CN_VAL_PROC, 0, 0, len(payload), 0) + payload
+            header = _NLMSG_HDR.pack(_NLMSG_HDR.size + len(cn_msg), NLMSG_DONE, 0, 0, os.getpid())
+            sock.send(header + cn_msg)
+            sock.setblocking(False)
+            return sock
+        except OSError as e:
+            if sock is not None:
+                sock.close()
+            logger.info(f"Netlink proc connector unavailable ({e}), polling /proc")
+            return None
+
+    def _drain_netlink(self):
+        added: Dict[int, str] = {}
+        removed: Set[int] = set()
+        while True:
+            try:
+                data = self._netlink.recv(4096)
+            except BlockingIOError:
+                break
+            except OSError as e:
+                # Buffer overrun drops events; the next resync repairs the index
+                logger.warning(f"Netlink receive error: {e}")
+                break
+
+            offset = _NLMSG_HDR.size + _CN_MSG_HDR.size
+            if len(data) < offset + _PROC_EVENT_HDR.size + _PROC_EVENT_IDS.size:
+                continue
+            what = _PROC_EVENT_HDR.unpack_from(data, offset)[0]
+            offset += _PROC_EVENT_HDR.size
+
+            if what == PROC_EVENT_FORK and len(data) >= offset + _PROC_EVENT_FORK.size:
+                _, parent_tgid, child_pid, child_tgid = _PROC_EVENT_FORK.unpack_from(data, offset)
+                if child_pid == child_tgid:
+                    # A forked child inherits its parent's name until it execs
+                    added[child_tgid] = added.get(parent_tgid, self._names.get(parent_tgid, ""))
+                    removed.discard(child_tgid)
+                continue
+
+            pid, tgid = _PROC_EVENT_IDS.unpack_from(data, offset)
+            if pid != tgid:
+                continue  # Thread event
+
+            if what in (PROC_EVENT_EXEC, PROC_EVENT_COMM):
+                added[tgid] = self._read_comm(tgid)
+                removed.discard(tgid)
+            elif what == PROC_EVENT_EXIT:
+                added.pop(tgid, None)
+                removed.add(tgid)
+
+        if added or removed:
+            self._apply(added, removed)
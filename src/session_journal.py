@@ -0,0 +1,165 @@
+"""
+Append-only journal of session tracker events with compacted snapshots
+Records are queued in memory and written in fsync'd batches from a worker
+thread; every compact_every records the tracker state is snapshotted and the
+journal truncated, so a restart only replays a short tail
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("claude-monitor")
+
+_SEPARATORS = (",", ":")
+
+# Where the journal lives unless CLAUDE_MONITOR_STATE_DIR says otherwise
+DEFAULT_STATE_DIR = os.path.join(os.path.expanduser("~"), ".claude-monitor")
+
+
+class SessionJournal:
+    """Durable event log for SessionTracker.
+
+    Each record is a small dict with a sequence number ("n") assigned on
+    append. The snapshot file stores the sequence number it covers, so a
+    crash between writing a snapshot and truncating the journal only causes
+    already-applied records to be skipped on replay.
+    """
+
+    def __init__(self, directory: Optional[str] = None, flush_interval: float = 0.5,
+                 compact_every: int = 2000):
+        self.directory = directory or os.environ.get("CLAUDE_MONITOR_STATE_DIR", DEFAULT_STATE_DIR)
+        self.journal_path = os.path.join(self.directory, "journal.jsonl")
+        self.snapshot_path = os.path.join(self.directory, "snapshot.json")
+        self.flush_interval = flush_interval
+        self.compact_every = compact_every
+
+        self.seq = 0
+        self._pending: List[bytes] = []
+        self._since_compact = 0
+        self._get_state: Optional[Callable[[], Dict[str, Any]]] = None
+        self._file = None
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._write_lock = threading.Lock()  # stop() may overlap an in-flight batch
+        self._valid_size: Optional[int] = None
+
+    def load(self) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Read the latest snapshot state and the journal records after it"""
+        state = None
+        try:
+            with open(self.snapshot_path, "rb") as f:
+                snapshot = json.loads(f.read())
+            self.seq = snapshot["seq"]
+            state = snapshot["state"]
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError) as e:
+            logger.error(f"Ignoring unreadable journal snapshot: {e}")
+
+        records = [record for record in self._read_journal() if record["n"] > self.seq]
+        if records:
+            self.seq = records[-1]["n"]
+        self._since_compact = len(records)
+        return state, records
+
+    def _read_journal(self) -> Iterator[Dict[str, Any]]:
+        offset = 0
+        try:
+            with open(self.journal_path, "rb") as f:
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("unterminated record")
+                        record = json.loads(line)
+                    except ValueError:
+                        # Torn final write from a crash; everything before it is intact
+                        logger.warning("Truncated journal record skipped")
+                        self._valid_size = offset
+                        return
+                    offset += len(line)
+                    yield record
+        except FileNotFoundError:
+            return
+
+    def append(self, record: Dict[str, Any]):
+        """Queue a record for the next batch; never blocks on disk"""
+        self.seq += 1
+        record["n"] = self.seq
+        self._pending.append(json.dumps(record, separators=_SEPARATORS).encode() + b"\n")
+        self._since_compact += 1
+        if self._wake is not None and len(self._pending) == 1:
+            self._wake.set()
+
+    def start(self, get_state: Callable[[], Dict[str, Any]]):
+        """Start the background writer; get_state supplies compaction snapshots"""
+        os.makedirs(self.directory, exist_ok=True)
+        self._get_state = get_state
+        self._file = open(self.journal_path, "ab")
+        if self._valid_size is not None:
+            # Drop the torn tail so new records don't land behind it
+            self._file.truncate(self._valid_size)
+            self._valid_size = None
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush outstanding records and close the journal"""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        if self._file is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self._write, *self._take_batch())
+            self._file.close()
+            self._file = None
+
+    def _take_batch(self) -> Tuple[List[bytes], Optional[bytes]]:
+        """Swap out the pending records, plus a snapshot when compaction is due.
+
+        Runs on the event loop so the captured state matches exactly the
+        records in the batch.
+        """
+        lines, self._pending = self._pending, []
+        snapshot = None
+        if self._since_compact >= self.compact_every and self._get_state is not None:
+            snapshot = json.dumps({"seq": self.seq, "state": self._get_state()},
+                                  separators=_SEPARATORS).encode()
+            self._since_compact = 0
+        return lines, snapshot
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._pending:
+                self._wake.clear()
+                await self._wake.wait()
+            # Let a burst accumulate so one fsync covers it
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await loop.run_in_executor(None, self._write, *self._take_batch())
+            except OSError as e:
+                logger.error(f"Journal write failed: {e}")
+
+    def _write(self, lines: List[bytes], snapshot: Optional[bytes]):
+        """Worker thread: append a batch, then compact if a snapshot is given"""
+        with self._write_lock:
+            self._write_batch(lines, snapshot)
+
+    def _write_batch(self, lines: List[bytes], snapshot: Optional[bytes]):
+        if lines:
+            self._file.write(b"".join(lines))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+        if snapshot is not None:
+            tmp_path = self.snapshot_path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(snapshot)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+            self._file.truncate(0)
+            os.fsync(self._file.fileno())
@@ -0,0 +1,206 @@
+"""
+Multi-session registry for concurrent Claude Code instances
+Each session (keyed by session id or project) keeps its own duration, cost,
+counters and pending alerts in a reusable slot; aggregates are maintained
+incrementally so lookups and aggregate reads stay O(1)
+"""
+
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Set
+
+# Pending alerts kept per session before the oldest is dropped
+MAX_PENDING_ALERTS = 16
+
+
+class Session:
+    """One live Claude session stored in a registry slot"""
+
+    __slots__ = ("slot", "session_id", "project", "started", "last_activity",
+                 "cost", "commands", "files_edited", "edited", "alerts", "snapshot")
+
+    def __init__(self, slot: int):
+        self.slot = slot
+        self.session_id = ""
+        self.project = ""
+        self.started = 0.0
+        self.last_activity = 0.0
+        self.cost = 0.0
+        self.commands = 0
+        self.files_edited = 0
+        self.edited: Set[str] = set()  # Paths already counted in files_edited
+        self.alerts: Deque[float] = deque((), MAX_PENDING_ALERTS)
+        self.snapshot = None  # Per-session status cache, created on first query
+
+    def duration(self, now: Optional[float] = None) -> float:
+        """Seconds since the session started"""
+        return (now or time.time()) - self.started
+
+    def to_dict(self, now: Optional[float] = None) -> Dict[str, Any]:
+        return {
+            "session": self.session_id,
+            "project": self.project,
+            "duration": int(self.duration(now)),
+            "cost": round(self.cost, 4),
+            "commands": self.commands,
+            "files_edited": self.files_edited,
+            "alerts": len(self.alerts),
+        }
+
+
+class SessionRegistry:
+    """Slot-based store of live sessions with running aggregate totals.
+
+    Sessions live in a list of slots indexed by a dict of session ids; ended
+    sessions return their slot to a free list for reuse. Every mutation goes
+    through the registry so the aggregate counters never need a full scan.
+    """
+
+    def __init__(self, on_change: Optional[Callable[[Session], None]] = None):
+        self.on_change = on_change
+        self._slots: List[Optional[Session]] = []
+        self._free: List[int] = []
+        self._index: Dict[str, int] = {}
+
+        # Running aggregates over live sessions
+        self._started_sum = 0.0
+        self.cost = 0.0
+        self.commands = 0
+        self.files_edited = 0
+        self.alerts = 0
+
+        # Most recently started or touched session, used when no id is given
+        self.current_id: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._index
+
+    def __iter__(self) -> Iterator[Session]:
+        for slot in self._index.values():
+            yield self._slots[slot]
+
+    def get(self, session_id: Optional[str] = None) -> Optional[Session]:
+        """Look up a live session; None selects the current one"""
+        slot = self._index.get(session_id if session_id is not None else self.current_id)
+        return self._slots[slot] if slot is not None else None
+
+    def open(self, session_id: str, project: str, now: Optional[float] = None) -> Session:
+        """Start a session in a free slot (or return it if already live)"""
+        existing = self.get(session_id)
+        if existing is not None:
+            return existing
+
+        now = now or time.time()
+        if self._free:
+            session = self._slots[self._free.pop()]
+        else:
+            session = Session(len(self._slots))
+            self._slots.append(session)
+
+        session.session_id = session_id
+        session.project = project
+        session.started = session.last_activity = now
+        session.cost = 0.0
+        session.commands = session.files_edited = 0
+        session.edited.clear()
+        session.alerts.clear()
+        session.snapshot = None
+
+        self._index[session_id] = session.slot
+        self._started_sum += now
+        self.current_id = session_id
+        self._changed(session)
+        return session
+
+    def close(self, session_id: Optional[str] = None) -> Optional[Session]:
+        """End a session and release its slot; returns the ended session"""
+        session = self.get(session_id)
+        if session is None:
+            return None
+
+        del self._index[session.session_id]
+        self._free.append(session.slot)
+        self._started_sum -= session.started
+        self.cost -= session.cost
+        self.commands -= session.commands
+        self.files_edited -= session.files_edited
+        self.alerts -= len(session.alerts)
+
+        if self.current_id == session.session_id:
+            self.current_id = next(iter(self._index), None)
+        if not self._index:
+            # Avoid float drift in the running sums once everything has ended
+            self._started_sum = self.cost = 0.0
+        self._changed(session)
+        return session
+
+    def touch(self, session: Session, now: Optional[float] = None):
+        """Record activity; only a change of current session (the aggregate project) is reported"""
+        session.last_activity = now or time.time()
+        if self.current_id != session.session_id:
+            self.current_id = session.session_id
+            self._changed(session)
+
+    def add(self, session: Session, commands: int = 0, files_edited: int = 0, cost: float = 0.0):
+        """Increment a session's counters"""
+        session.commands += commands
+        session.files_edited += files_edited
+        session.cost += cost
+        self.commands += commands
+        self.files_edited += files_edited
+        self.cost += cost
+        self._changed(session)
+
+    def mark_edited(self, session: Session, paths: Iterable[str]) -> int:
+        """Remember files edited in a session; returns how many it hadn't seen"""
+        before = len(session.edited)
+        session.edited.update(paths)
+        return len(session.edited) - before
+
+    def set_cost(self, session: Session, cost: float):
+        """Replace a session's cost estimate"""
+        if cost != session.cost:
+            self.add(session, cost=cost - session.cost)
+
+    def push_alert(self, session: Session, now: Optional[float] = None):
+        """Queue a pending command-approval alert on a session"""
+        if len(session.alerts) < MAX_PENDING_ALERTS:
+            self.alerts += 1
+        session.alerts.append(now or time.time())
+        self._changed(session)
+
+    def clear_alerts(self, session: Optional[Session] = None):
+        """Acknowledge a session's alerts, or every session's when None"""
+        targets = [session] if session is not None else [s for s in self if s.alerts]
+        for target in targets:
+            if target.alerts:
+                self.alerts -= len(target.alerts)
+                target.alerts.clear()
+                self._changed(target)
+
+    def active_duration(self, now: Optional[float] = None) -> float:
+        """Sum of live session durations, in O(1)"""
+        return len(self._index) * (now or time.time()) - self._started_sum
+
+    @property
+    def started(self) -> float:
+        """Mean start time, so that active_duration(now) == len(self) * (now - started)"""
+        return self._started_sum / len(self._index) if self._index else 0.0
+
+    def aggregate(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Totals across all live sessions"""
+        return {
+            "sessions": len(self._index),
+            "duration": int(self.active_duration(now)),
+            "cost": round(self.cost, 4),
+            "commands": self.commands,
+            "files_edited": self.files_edited,
+            "alerts": self.alerts,
+        }
+
+    def _changed(self, session: Session):
+        if self.on_change is not None:
+            self.on_change(session)
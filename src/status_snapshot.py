@@ -0,0 +1,94 @@
+"""
+Pre-serialized /status payload with versioning and ETag support
+The JSON body is rebuilt only when tracker state changes; per-second
+fields such as the session duration are patched in front of the cached bytes
+and left out of the ETag, so polling devices get 304s while a session runs
+"""
+
+import asyncio
+import json
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from aiohttp import web
+
+_SEPARATORS = (",", ":")
+
+# Upper bound for GET /status?wait= so parked requests can't pile up forever
+MAX_LONG_POLL_WAIT = 60
+
+
+class StatusSnapshot:
+    """Cached status body keyed by a monotonically increasing state version"""
+
+    def __init__(self):
+        self.version = 0
+        self._static: Optional[bytes] = None
+        self._dynamic_key: Optional[tuple] = None
+        self._body = b""
+        self._etag = ""
+        self._changed: Optional[asyncio.Event] = None
+
+    def invalidate(self):
+        """Mark the tracker state as changed; the next render re-serializes"""
+        self.version += 1
+        self._static = None
+
+        # Release every long-poll parked on the previous version
+        if self._changed is not None:
+            self._changed.set()
+            self._changed = None
+
+    async def wait(self, since: int, timeout: float) -> bool:
+        """Park until the version moves past since; False on timeout"""
+        if self.version != since:
+            return True
+        if self._changed is None:
+            self._changed = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def render(self, build_static: Callable[[], Dict[str, Any]],
+               dynamic: Dict[str, int]) -> Tuple[bytes, str]:
+        """Return (body, etag) for the current state.
+
+        build_static is only called after invalidate(). dynamic holds the
+        small, cheaply computed fields that change on their own (durations);
+        their keys must not overlap with the static payload. The weak ETag
+        names the version alone: clients advance the durations from the
+        payload's "started" and their own clock between versions.
+        """
+        key = tuple(dynamic.values())
+        if self._static is None:
+            static = build_static()
+            static["version"] = self.version
+            self._static = json.dumps(static, separators=_SEPARATORS).encode()
+            self._dynamic_key = None
+            self._etag = 'W/"%d"' % self.version
+
+        if key != self._dynamic_key:
+            head = json.dumps(dynamic, separators=_SEPARATORS).encode()
+            self._body = head[:-1] + b"," + self._static[1:] if dynamic else self._static
+            self._dynamic_key = key
+
+        return self._body, self._etag
+
+
+def long_poll_params(request: web.Request) -> Tuple[Optional[int], float]:
+    """Parse ?since=<version>&wait=<seconds>; (None, 0) means answer immediately"""
+    try:
+        since = int(request.query["since"])
+        wait = float(request.query.get("wait", 0))
+    except (KeyError, ValueError):
+        return None, 0
+    return since, max(0.0, min(wait, MAX_LONG_POLL_WAIT))
+
+
+def status_response(request: web.Request, body: bytes, etag: str, version: int) -> web.Response:
+    """Serve a snapshot as-is, or an empty 304 when the device already has it"""
+    headers = {"ETag": etag, "X-Status-Version": str(version), "Cache-Control": "no-cache"}
+    if request.headers.get("If-None-Match") == etag:
+        return web.Response(status=304, headers=headers)
+    return web.Response(body=body, content_type="application/json", headers=headers)
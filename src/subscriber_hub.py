@@ -0,0 +1,165 @@
+"""
+Subscriber registry and broadcast layer for multiple M5StickC devices
+Every stick and wall display registers with an id and optional filters;
+each state change is encoded once and fanned out through bounded queues
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger("claude-monitor")
+
+# Polling devices are listed until this long after their last request
+POLLER_TTL = 300.0
+
+# Most polling device ids remembered; ?device= is client-supplied
+MAX_POLLERS = 256
+
+
+class Subscriber:
+    """A streaming device with its own bounded outbound queue"""
+
+    __slots__ = ("device_id", "project", "user", "remote", "queue",
+                 "connected_at", "delivered", "overflows", "evicted", "task")
+
+    def __init__(self, device_id: str, project: Optional[str], user: Optional[str],
+                 remote: Optional[str], queue_size: int):
+        self.device_id = device_id
+        self.project = project
+        self.user = user
+        self.remote = remote
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.connected_at = time.time()
+        self.delivered = 0
+        self.overflows = 0  # Overflows since the consumer last emptied its queue
+        self.evicted = False
+        self.task: Optional[asyncio.Task] = None  # Stream handler, cancelled on eviction
+
+    @property
+    def filter(self) -> Tuple[Optional[str], Optional[str]]:
+        return self.project, self.user
+
+    def matches(self, key: Optional[Tuple[Optional[str], Optional[str]]]) -> bool:
+        """Untargeted messages reach everyone; targeted ones only that (project, user) filter"""
+        return key is None or self.filter == key
+
+
+class SubscriberHub:
+    """Fan-out of pre-encoded messages with backpressure and slow-consumer eviction.
+
+    A subscriber whose queue is full has its backlog collapsed into a single
+    resync message (a full snapshot), since dropping individual deltas would
+    leave the device with inconsistent state. Subscribers that overflow
+    more than max_overflows times without emptying their queue in between
+    are evicted, and their stream handler is cancelled even if it is stuck
+    writing. Polling devices are only
+    remembered for poller_ttl seconds, and at most max_pollers of them.
+    """
+
+    def __init__(self, queue_size: int = 8, max_overflows: int = 3,
+                 poller_ttl: float = POLLER_TTL, max_pollers: int = MAX_POLLERS):
+        self.queue_size = queue_size
+        self.max_overflows = max_overflows
+        self.poller_ttl = poller_ttl
+        self.max_pollers = max_pollers
+        self._subscribers: Dict[str, Subscriber] = {}
+        self._pollers: Dict[str, Dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def register(self, device_id: str, project: Optional[str] = None,
+                 user: Optional[str] = None, remote: Optional[str] = None) -> Subscriber:
+        """Add a streaming subscriber; a reconnecting device replaces its old stream"""
+        previous = self._subscribers.get(device_id)
+        if previous is not None:
+            self._evict(previous, "replaced by new connection")
+        subscriber = Subscriber(device_id, project, user, remote, self.queue_size)
+        self._subscribers[device_id] = subscriber
+        logger.info(f"Device {device_id} subscribed (project={project}, user={user})")
+        return subscriber
+
+    def unregister(self, subscriber: Subscriber):
+        """Remove a subscriber once its stream has closed"""
+        if self._subscribers.get(subscriber.device_id) is subscriber:
+            del self._subscribers[subscriber.device_id]
+            logger.info(f"Device {subscriber.device_id} unsubscribed")
+
+    def filters(self) -> Set[Tuple[Optional[str], Optional[str]]]:
+        """(project, user) filters of the connected subscribers"""
+        return {subscriber.filter for subscriber in self._subscribers.values()}
+
+    def touch(self, device_id: str, remote: Optional[str] = None):
+        """Record a poll from a device that isn't streaming"""
+        now = time.time()
+        # Re-inserting keeps the dict ordered by last poll, oldest first
+        self._pollers.pop(device_id, None)
+        self._pollers[device_id] = {"remote": remote, "last_seen": now}
+        self._expire_pollers(now)
+
+    def publish(self, message: bytes, resync: Optional[bytes] = None,
+                key: Optional[Tuple[Optional[str], Optional[str]]] = None) -> int:
+        """Queue message for every subscriber with filter key (all by default).
+
+        Returns the number reached. Without a resync, a full queue just
+        drops the message (heartbeats).
+        """
+        reached = 0
+        for subscriber in list(self._subscribers.values()):
+            if not subscriber.matches(key):
+                continue
+            try:
+                subscriber.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                subscriber.overflows += 1
+                if subscriber.overflows > self.max_overflows:
+                    self._evict(subscriber, "slow consumer")
+                    continue
+                if resync is None:
+                    continue
+                self._drain(subscriber)
+                subscriber.queue.put_nowait(resync)
+            reached += 1
+        return reached
+
+    def devices(self) -> List[Dict[str, Any]]:
+        """Describe connected streaming devices and recently polling ones"""
+        result = [{
+            "device": s.device_id,
+            "mode": "stream",
+            "remote": s.remote,
+            "project": s.project,
+            "user": s.user,
+            "connected_at": s.connected_at,
+            "delivered": s.delivered,
+            "queued": s.queue.qsize(),
+        } for s in self._subscribers.values()]
+        self._expire_pollers(time.time())
+        for device_id, info in self._pollers.items():
+            if device_id not in self._subscribers:
+                result.append({"device": device_id, "mode": "poll", **info})
+        return result
+
+    def _expire_pollers(self, now: float):
+        while self._pollers:
+            oldest = next(iter(self._pollers))
+            if (len(self._pollers) <= self.max_pollers and
+                    now - self._pollers[oldest]["last_seen"] < self.poller_ttl):
+                break
+            del self._pollers[oldest]
+
+    def _evict(self, subscriber: Subscriber, reason: str):
+        subscriber.evicted = True
+        self._drain(subscriber)
+        subscriber.queue.put_nowait(None)  # Wakes the stream handler so it closes
+        if subscriber.task is not None and subscriber.task is not asyncio.current_task():
+            subscriber.task.cancel()  # A handler blocked in a write never reads the None
+        self._subscribers.pop(subscriber.device_id, None)
+        logger.warning(f"Evicted device {subscriber.device_id}: {reason}")
+
+    @staticmethod
+    def _drain(subscriber: Subscriber):
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
@@ -0,0 +1,261 @@
+"""
+Incremental ingester for Claude Code's local JSONL transcripts
+Tails ~/.claude/projects/*/*.jsonl from remembered byte offsets, sums the real
+token usage per model against a rate table and counts Bash commands and file
+edits, so cost and counters are never recomputed from scratch
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger("claude-monitor")
+
+DEFAULT_TRANSCRIPT_DIR = os.path.join(os.path.expanduser("~"), ".claude", "projects")
+
+# USD per million tokens: (input, output, cache write, cache read), matched by model family
+MODEL_RATES = (
+    ("opus", (15.00, 75.00, 18.75, 1.50)),
+    ("sonnet", (3.00, 15.00, 3.75, 0.30)),
+    ("haiku", (0.80, 4.00, 1.00, 0.08)),
+)
+DEFAULT_RATES = MODEL_RATES[1][1]
+
+COMMAND_TOOLS = frozenset(("Bash",))
+EDIT_TOOLS = frozenset(("Edit", "MultiEdit", "Write", "NotebookEdit"))
+
+CHUNK_SIZE = 64 * 1024
+# Lines longer than this (huge tool results) are skipped rather than buffered
+MAX_LINE = 4 * 1024 * 1024
+
+
+def model_rates(model: str):
+    """Per-million-token rates for a model id"""
+    for family, rates in MODEL_RATES:
+        if family in model:
+            return rates
+    return DEFAULT_RATES
+
+
+def token_cost(model: str, usage: Dict[str, int]) -> float:
+    """Cost in USD of one API response's usage block"""
+    input_rate, output_rate, write_rate, read_rate = model_rates(model)
+    return (usage.get("input_tokens", 0) * input_rate +
+            usage.get("output_tokens", 0) * output_rate +
+            usage.get("cache_creation_input_tokens", 0) * write_rate +
+            usage.get("cache_read_input_tokens", 0) * read_rate) / 1_000_000
+
+
+class Usage:
+    """Usage accumulated for one project since the last scan"""
+
+    __slots__ = ("project", "cost", "tokens", "commands", "files_edited")
+
+    def __init__(self, project: str):
+        self.project = project
+        self.cost = 0.0
+        self.tokens = 0
+        self.commands = 0
+        self.files_edited = 0
+
+
+class _FileState:
+    __slots__ = ("offset", "project", "message_id", "skipping")
+
+    def __init__(self, offset: int, project: str):
+        self.offset = offset
+        self.project = project
+        self.message_id = None  # Streamed content blocks repeat the same message and usage
+        self.skipping = False
+
+
+class TranscriptIngester:
+    """Tails transcript files and reports per-project usage deltas.
+
+    Only the bytes appended since the previous scan are read, in fixed-size
+    chunks, so memory stays constant regardless of how large the transcript
+    directory grows. Files last modified before backfill_since start at
+    their current end instead of being replayed.
+    """
+
+    def __init__(self, directory: Optional[str] = None, state_path: Optional[str] = None,
+                 backfill_since: Optional[float] = None):
+        self.directory = directory or DEFAULT_TRANSCRIPT_DIR
+        self.state_path = state_path
+        self.backfill_since = backfill_since if backfill_since is not None else _start_of_today()
+        self._files: Dict[str, _FileState] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        # Off when file edits are counted from filesystem events instead
+        self.count_edits = True
+        self._load_offsets()
+
+    def scan(self) -> List[Usage]:
+        """Read everything appended since the last scan (blocking; use an executor)"""
+        deltas: Dict[str, Usage] = {}
+        try:
+            projects = os.scandir(self.directory)
+        except FileNotFoundError:
+            return []
+
+        changed = False
+        # Project dirs and transcripts can vanish mid-scan; skip them, but keep the
+        # deltas and offsets already taken from the others
+        with projects:
+            for project_dir in projects:
+                if not project_dir.is_dir():
+                    continue
+                try:
+                    entries = os.scandir(project_dir.path)
+                except OSError as e:
+                    logger.debug(f"Skipping transcript dir {project_dir.path}: {e}")
+                    continue
+                with entries:
+                    for entry in entries:
+                        if not entry.name.endswith(".jsonl"):
+                            continue
+                        try:
+                            changed |= self._scan_file(entry, project_dir.name, deltas)
+                        except OSError as e:
+                            changed = True  # The offset may have moved before the error
+                            logger.debug(f"Skipping transcript {entry.path}: {e}")
+
+        if changed and self.state_path:
+            self._save_offsets()
+        return list(deltas.values())
+
+    def _scan_file(self, entry: os.DirEntry, default_project: str, deltas: Dict[str, Usage]) -> bool:
+        stat = entry.stat()
+        state = self._files.get(entry.path)
+        if state is None:
+            # Old transcripts only contribute what they append from now on
+            offset = 0 if stat.st_mtime >= self.backfill_since else stat.st_size
+            state = self._files[entry.path] = _FileState(offset, default_project)
+        elif stat.st_size < state.offset:
+            state.offset = 0  # Truncated or replaced
+        if stat.st_size == state.offset:
+            return False
+
+        with open(entry.path, "rb") as f:
+            f.seek(state.offset)
+            parts: List[bytes] = []  # Pieces of a line spanning chunks
+            parts_len = 0
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                lines = chunk.split(b"\n")
+                tail = lines.pop()
+                for line in lines:
+                    if state.skipping:
+                        state.skipping = False  # End of an oversized line
+                    else:
+                        if parts:
+                            parts.append(line)
+                            line = b"".join(parts)
+                        if b'"assistant"' in line:
+                            self._ingest_line(line, state, deltas)
+                    state.offset += len(line) + 1
+                    parts, parts_len = [], 0
+
+                if state.skipping:
+                    state.offset += len(tail)
+                elif tail:
+                    parts.append(tail)
+                    parts_len += len(tail)
+                    if parts_len > MAX_LINE:
+                        state.offset += parts_len
+                        parts, parts_len = [], 0
+                        state.skipping = True
+        # A trailing partial line is re-read once it's complete
+        return True
+
+    def _ingest_line(self, line: bytes, state: _FileState, deltas: Dict[str, Usage]):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            return
+        message = record.get("message")
+        if record.get("type") != "assistant" or not isinstance(message, dict):
+            return
+
+        cwd = record.get("cwd")
+        if cwd:
+            state.project = os.path.basename(cwd.rstrip("/\\")) or cwd
+        usage = deltas.get(state.project)
+        if usage is None:
+            usage = deltas[state.project] = Usage(state.project)
+
+        message_id = message.get("id")
+        if message_id != state.message_id:
+            state.message_id = message_id
+            tokens = message.get("usage") or {}
+            usage.cost += token_cost(message.get("model", ""), tokens)
+            usage.tokens += sum(value for key, value in tokens.items()
+                                if key.endswith("_tokens") and isinstance(value, int))
+
+        for block in message.get("content") or ():
+            if isinstance(block, dict) and block.get("type") == "tool_use":
+                name = block.get("name")
+                if name in COMMAND_TOOLS:
+                    usage.commands += 1
+                elif name in EDIT_TOOLS and self.count_edits:
+                    usage.files_edited += 1
+
+    def start(self, on_usage: Callable[[Usage], None], interval: float = 5.0):
+        """Scan in a worker thread every interval seconds (or on wake()) and report deltas"""
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run(on_usage, interval))
+
+    def wake(self):
+        """Scan now, e.g. when a filesystem watcher saw a transcript change"""
+        if self._wake is not None:
+            self._wake.set()
+
+    def stop(self):
+        """Stop scanning"""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self, on_usage: Callable[[Usage], None], interval: float):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                for usage in await loop.run_in_executor(None, self.scan):
+                    on_usage(usage)
+            except Exception as e:
+                logger.error(f"Transcript ingester error: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def _load_offsets(self):
+        if not self.state_path:
+            return
+        try:
+            with open(self.state_path, "rb") as f:
+                saved = json.loads(f.read())
+        except FileNotFoundError:
+            return
+        except ValueError as e:
+            logger.error(f"Ignoring unreadable transcript offsets: {e}")
+            return
+        for path, (offset, project) in saved.items():
+            self._files[path] = _FileState(offset, project)
+
+    def _save_offsets(self):
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({path: (state.offset, state.project) for path, state in self._files.items()}, f)
+        os.replace(tmp_path, self.state_path)
+
+
+def _start_of_today() -> float:
+    now = time.localtime()
+    return time.mktime((now.tm_year, now.tm_mon, now.tm_mday, 0, 0, 0, 0, 0, -1))
@@ -5,26 +5,36 @@ Tracks real Claude Code sessions and serves data via HTTP
 """
 
 import asyncio
-import json
+import os
+import sys
 import time
-import psutil
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from datetime import timedelta
+from typing import Optional
 from aiohttp import web
 
+# Shared server modules live alongside the MCP server
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+from process_watcher import ProcessWatcher
+from status_snapshot import StatusSnapshot, long_poll_params, status_response
+from event_stream import EventPublisher, stream_events
+from subscriber_hub import SubscriberHub
+from session_registry import Session, SessionRegistry
+from history_store import HistoryStore, history_response
+from transcript_ingester import TranscriptIngester, Usage
+from file_activity import FileActivitySource, project_dirs_from_env
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("claude-monitor")
 
 class SessionTracker:
     def __init__(self):
-        self.session_start: Optional[datetime] = None
         self.total_duration: timedelta = timedelta()
-        self.estimated_cost: float = 0.0
-        self.command_pending: bool = False
-        self.session_active: bool = False
-        self.last_activity: Optional[datetime] = None
+        self.user: Optional[str] = os.environ.get("USER") or os.environ.get("USERNAME")
+        
+        # Live sessions keyed by session id (defaults to the project name)
+        self.sessions = SessionRegistry(on_change=self._session_changed)
         
         # Cost estimation (rough approximations)
         self.model_rates = {
@@ -41,95 +51,269 @@ class SessionTracker:
             "files_edited": 0
         }
         
+        # Pre-serialized /status payload, rebuilt only on state changes
+        self.snapshot = StatusSnapshot()
+        
+        # Per-minute time series (in memory; the MCP server persists its own)
+        self.history = HistoryStore()
+        
         # Auto-start session
         self.start_session()
     
-    def start_session(self, project_name: str = "Default"):
+    @property
+    def session_active(self) -> bool:
+        return len(self.sessions) > 0
+    
+    @property
+    def command_pending(self) -> bool:
+        return self.sessions.alerts > 0
+    
+    @property
+    def estimated_cost(self) -> float:
+        return self.sessions.cost
+    
+    @property
+    def project(self) -> str:
+        current = self.sessions.get()
+        return current.project if current else "Default"
+    
+    def _session_changed(self, session: Session):
+        """Registry callback: invalidate the aggregate and the session's own view"""
+        if session.snapshot is not None:
+            session.snapshot.invalidate()
+        self.snapshot.invalidate()
+    
+    def start_session(self, project_name: str = "Default", session_id: Optional[str] = None):
         """Start a new Claude session"""
-        if not self.session_active:
-            self.session_start = datetime.now()
-            self.session_active = True
-            self.last_activity = datetime.now()
+        session_id = session_id or project_name
+        if session_id not in self.sessions:
             self.stats["sessions_today"] += 1
-            logger.info(f"Session started for project: {project_name}")
+            self.sessions.open(session_id, project_name)
+            logger.info(f"Session {session_id} started for project: {project_name}")
     
-    def end_session(self):
-        """End current session"""
-        if self.session_active and self.session_start:
-            duration = datetime.now() - self.session_start
+    def end_session(self, session_id: Optional[str] = None):
+        """End a session (the current one by default)"""
+        session = self.sessions.close(session_id)
+        if session is not None:
+            duration = timedelta(seconds=int(session.duration()))
             self.total_duration += duration
+            self.stats["total_cost_today"] += session.cost
             
             # Update longest session
             if duration.total_seconds() > self.stats["longest_session"]:
                 self.stats["longest_session"] = int(duration.total_seconds())
             
-            self.session_active = False
-            logger.info(f"Session ended. Duration: {duration}")
+            logger.info(f"Session {session.session_id} ended. Duration: {duration}")
     
-    def update_activity(self):
+    def update_activity(self, session_id: Optional[str] = None):
         """Update last activity timestamp"""
-        self.last_activity = datetime.now()
-        if not self.session_active:
-            self.start_session()
-    
-    def get_current_duration(self):
-        """Get current session duration in seconds"""
-        if self.session_active and self.session_start:
-            return int((datetime.now() - self.session_start).total_seconds())
-        return 0
-    
-    def set_command_pending(self, pending: bool):
-        """Set command approval pending status"""
-        self.command_pending = pending
+        session = self.sessions.get(session_id)
+        if session is None:
+            self.start_session(session_id or "Default")
+            session = self.sessions.get(session_id or "Default")
+        self.sessions.touch(session)
+    
+    def get_current_duration(self, session_id: Optional[str] = None):
+        """Get a session's duration in seconds (the current one by default)"""
+        session = self.sessions.get(session_id)
+        return int(session.duration()) if session else 0
+    
+    def set_command_pending(self, pending: bool, session_id: Optional[str] = None):
+        """Queue a command approval alert, or acknowledge pending ones.
+        
+        Without a session id, alerts go to the current session and
+        acknowledgements clear every session's queue.
+        """
         if pending:
+            self.update_activity(session_id)
+            self.sessions.push_alert(self.sessions.get(session_id))
+            self.history.record("alerts", 1)
             logger.info("Command approval required")
         else:
+            session = self.sessions.get(session_id) if session_id is not None else None
+            if session_id is None or session is not None:
+                self.sessions.clear_alerts(session)
             logger.info("Command approved/acknowledged")
     
-    def get_status(self):
-        """Get current session status for M5StickC"""
-        duration = self.get_current_duration()
+    def _refresh(self):
+        """Cheap per-request bookkeeping; returns (duration, claude_running)"""
+        duration = int(self.sessions.active_duration())
         
-        # Detect if Claude Code is running (activity indicator)
-        claude_running = False
-        for proc in psutil.process_iter(['name']):
-            try:
-                if 'claude' in proc.info['name'].lower():
-                    claude_running = True
-                    self.update_activity()
-                    break
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                continue
+        # Detect if Claude Code is running (activity comes from file events when watched)
+        claude_running = process_watcher.is_running("claude")
+        if claude_running and not file_activity.watched_projects:
+            self.update_activity()
         
-        # Auto-increment stats based on activity
-        if claude_running and duration > 0:
-            # Estimate commands and files based on session duration
-            self.stats["commands_run"] = max(self.stats["commands_run"], duration // 45 + 1)
-            self.stats["files_edited"] = max(self.stats["files_edited"], duration // 60 + 1)
+        return duration, claude_running
+    
+    def record_files(self, project: str, paths):
+        """Count files first edited in a project's session during one burst of changes"""
+        self.update_activity(project)
+        session = self.sessions.get(project)
+        files_edited = self.sessions.mark_edited(session, paths)
+        if files_edited:
+            self.stats["files_edited"] += files_edited
+            self.sessions.add(session, files_edited=files_edited)
+    
+    def record_usage(self, usage: Usage):
+        """Add real token cost and tool counts read from a project's transcripts"""
+        session = self.sessions.get(usage.project)
+        if session is None:
+            self.start_session(usage.project)
+            session = self.sessions.get(usage.project)
+        self.sessions.touch(session)
         
+        self.stats["commands_run"] += usage.commands
+        self.stats["files_edited"] += usage.files_edited
+        self.sessions.add(session, usage.commands, usage.files_edited, usage.cost)
+        self.history.record("cost", usage.cost)
+        self.history.record("commands", usage.commands)
+    
+    def history_tick(self, elapsed):
+        """Per-minute sample of session time and Claude activity"""
+        return {
+            "duration": len(self.sessions) * elapsed,
+            "activity": 1 if process_watcher.is_running("claude") else 0
+        }
+    
+    def _static_status(self):
+        """Aggregate status fields that only change when the tracker state changes"""
+        claude_running = process_watcher.is_running("claude")
         return {
             "active": self.session_active and claude_running,
-            "duration": duration,
             "status": "active" if claude_running else "idle",
+            "sessions": len(self.sessions),
+            "started": int(self.sessions.started),
             "commands": self.stats["commands_run"],
             "files_edited": self.stats["files_edited"],
-            "alerts": 1 if self.command_pending else 0,
-            "cost": self.estimated_cost,
+            "alerts": self.sessions.alerts,
+            "cost": round(self.estimated_cost, 4)
+        }
+    
+    def _static_session_status(self, session: Session):
+        """Per-session status fields that only change when that session changes"""
+        claude_running = process_watcher.is_running("claude")
+        return {
+            "active": claude_running,
+            "status": "active" if claude_running else "idle",
+            "session": session.session_id,
+            "project": session.project,
+            "started": int(session.started),
+            "commands": session.commands,
+            "files_edited": session.files_edited,
+            "alerts": len(session.alerts),
+            "cost": round(session.cost, 4)
+        }
+    
+    def _dynamic_status(self, duration):
+        """Status fields that change with the clock"""
+        return {
+            "duration": duration,
             "productivity": min(100, duration // 6 + 30) if duration > 0 else 0
         }
+    
+    def status_snapshot(self, session_id: Optional[str] = None) -> Optional[StatusSnapshot]:
+        """Snapshot backing /status, or a session's own view (None if unknown)"""
+        if session_id is None:
+            return self.snapshot
+        session = self.sessions.get(session_id)
+        if session is None:
+            return None
+        if session.snapshot is None:
+            session.snapshot = StatusSnapshot()
+        return session.snapshot
+    
+    def get_status(self, session_id: Optional[str] = None):
+        """Get aggregate (or per-session) status for M5StickC"""
+        duration, _ = self._refresh()
+        if session_id is None:
+            status = self._static_status()
+            status.update(self._dynamic_status(duration))
+            status["version"] = self.snapshot.version
+            return status
+        
+        session = self.sessions.get(session_id)
+        if session is None:
+            return None
+        status = self._static_session_status(session)
+        status.update(self._dynamic_status(int(session.duration())))
+        status["version"] = self.status_snapshot(session_id).version
+        return status
+    
+    def get_project_status(self, project: str):
+        """Status of a project's live session, or an idle one when it has none"""
+        for session in self.sessions:
+            if session.project == project:
+                return self.get_status(session.session_id)
+        return {"active": False, "status": "idle", "project": project, "duration": 0, "productivity": 0}
+    
+    def get_snapshot(self, session_id: Optional[str] = None):
+        """Get the pre-serialized status payload and its ETag (None if unknown)"""
+        duration, _ = self._refresh()
+        if session_id is None:
+            return self.snapshot.render(self._static_status, self._dynamic_status(duration))
+        
+        session = self.sessions.get(session_id)
+        if session is None:
+            return None
+        return self.status_snapshot(session_id).render(
+            lambda: self._static_session_status(session),
+            self._dynamic_status(int(session.duration())))
 
 # Global session tracker
 tracker = SessionTracker()
 
+# Devices subscribed to the push channel, fed once per state change
+hub = SubscriberHub()
+publisher = EventPublisher(tracker.snapshot, tracker.get_status, hub,
+                           tracker.get_project_status, tracker.user)
+
+# Real token usage and tool counts tailed from Claude Code's transcripts
+transcripts = TranscriptIngester()
+
+# Edits in project directories and transcript writes, via inotify-backed watchers
+file_activity = FileActivitySource(project_dirs_from_env(), transcripts.directory)
+
+# Incremental index of running processes, so /status never scans the process table
+process_watcher = ProcessWatcher(patterns=("claude",))
+
 async def handle_status(request):
-    """Return current session status for M5StickC PLUS"""
-    status = tracker.get_status()
-    logger.info(f"Serving status: {status}")
-    return web.json_response(status)
+    """Return aggregate (or ?session=<id>) status for M5StickC PLUS (long-polls with ?since=&wait=)"""
+    device = request.query.get("device")
+    if device:
+        hub.touch(device, request.remote)
+    
+    session_id = request.query.get("session")
+    snapshot = tracker.status_snapshot(session_id)
+    if snapshot is None:
+        return web.json_response({"error": f"Unknown session: {session_id}"}, status=404)
+    
+    since, wait = long_poll_params(request)
+    if since is not None and wait:
+        await snapshot.wait(since, wait)
+    
+    rendered = tracker.get_snapshot(session_id)
+    if rendered is None:
+        return web.json_response({"error": f"Session ended: {session_id}"}, status=404)
+    body, etag = rendered
+    logger.debug(f"Serving status {etag}")
+    return status_response(request, body, etag, snapshot.version)
+
+async def handle_events(request):
+    """Server-Sent Events stream of status deltas for M5StickC"""
+    return await stream_events(request, hub, publisher)
+
+async def handle_devices(request):
+    """List subscribed and recently polling devices"""
+    return web.json_response({"devices": hub.devices()})
+
+async def handle_history(request):
+    """Downsampled metric history: /history?metric=&from=&to=&step="""
+    return await history_response(request, tracker.history)
 
 async def handle_acknowledge(request):
     """Handle alert acknowledgments from M5StickC PLUS"""
-    tracker.set_command_pending(False)
+    tracker.set_command_pending(False, request.query.get("session"))
     logger.info("Alert acknowledged by M5StickC")
     return web.json_response({"status": "acknowledged"})
 
@@ -137,44 +321,37 @@ async def handle_start_session(request):
     """Manually start a new session"""
     data = await request.json() if request.content_type == 'application/json' else {}
     project_name = data.get('project_name', 'Manual')
-    tracker.start_session(project_name)
-    return web.json_response({"status": "session_started", "project": project_name})
+    session_id = data.get('session_id') or project_name
+    tracker.start_session(project_name, session_id)
+    return web.json_response({"status": "session_started", "project": project_name, "session": session_id})
 
 async def handle_end_session(request):
-    """Manually end current session"""
-    tracker.end_session()
+    """Manually end the current (or a given) session"""
+    data = await request.json() if request.content_type == 'application/json' else {}
+    tracker.end_session(data.get('session_id'))
     return web.json_response({"status": "session_ended"})
 
 async def handle_set_alert(request):
     """Set command pending alert"""
     data = await request.json() if request.content_type == 'application/json' else {}
     pending = data.get('pending', True)
-    tracker.set_command_pending(pending)
+    tracker.set_command_pending(pending, data.get('session_id'))
     return web.json_response({"status": "alert_set", "pending": pending})
 
 async def activity_monitor():
     """Monitor for Claude Code activity and session timeouts"""
     while True:
         try:
-            # Check for Claude Code process activity
-            claude_found = False
-            for proc in psutil.process_iter(['name', 'create_time']):
-                try:
-                    proc_name = proc.info['name'].lower()
-                    if 'claude' in proc_name or 'python' in proc_name:
-                        # Found potential Claude activity
-                        claude_found = True
-                        tracker.update_activity()
-                        break
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    continue
+            # Without project-dir events, fall back to Claude Code process activity
+            if not file_activity.watched_projects and process_watcher.is_running("claude"):
+                tracker.update_activity()
             
-            # Check for session timeout (10 minutes inactive)
-            if tracker.session_active and tracker.last_activity:
-                inactive_time = datetime.now() - tracker.last_activity
-                if inactive_time > timedelta(minutes=10):
-                    logger.info("Session timeout - ending session")
-                    tracker.end_session()
+            # Check for session timeouts (10 minutes inactive)
+            now = time.time()
+            for session in list(tracker.sessions):
+                if now - session.last_activity > 10 * 60:
+                    logger.info(f"Session timeout - ending session {session.session_id}")
+                    tracker.end_session(session.session_id)
             
             # Simulate occasional command approval alerts for testing
             if tracker.session_active and tracker.get_current_duration() % 120 == 0:
@@ -194,6 +371,9 @@ async def create_app():
     
     # Routes for M5StickC communication
     app.router.add_get('/status', handle_status)
+    app.router.add_get('/events', handle_events)
+    app.router.add_get('/devices', handle_devices)
+    app.router.add_get('/history', handle_history)
     app.router.add_post('/acknowledge', handle_acknowledge)
     
     # Routes for Claude Code MCP integration (future)
@@ -201,6 +381,24 @@ async def create_app():
     app.router.add_post('/end_session', handle_end_session)
     app.router.add_post('/set_alert', handle_set_alert)
     
+    # Publisher, samplers and watchers run for the lifetime of the app
+    async def start_background(app):
+        publisher.start()
+        tracker.history.start(tracker.history_tick)
+        file_activity.start(tracker.record_files, transcripts.wake)
+        if file_activity.watched_projects:
+            transcripts.count_edits = False
+        transcripts.start(tracker.record_usage, interval=300 if file_activity.watching_transcripts else 5)
+    
+    async def stop_background(app):
+        publisher.stop()
+        file_activity.stop()
+        transcripts.stop()
+        await tracker.history.stop()
+    
+    app.on_startup.append(start_background)
+    app.on_cleanup.append(stop_background)
+    
     return app
 
 async def main():
@@ -216,13 +414,27 @@ async def main():
     
     logger.info("Web server started on http://0.0.0.0:8080")
     logger.info("Endpoints:")
-    logger.info("  GET /status - Get session data (for M5StickC)")
+    logger.info("  GET /status - Get aggregate session data (for M5StickC)")
+    logger.info("  GET /status?session=<id> - Get one session's data")
+    logger.info("  GET /status?since=<version>&wait=30 - Long-poll until the state changes")
+    logger.info("  GET /events?device=<id>&project=&user= - Server-Sent Events stream of status deltas")
+    logger.info("  GET /devices - List subscribed and polling devices")
+    logger.info("  GET /history?metric=&from=&to=&step= - Downsampled metric history")
     logger.info("  POST /acknowledge - Acknowledge alerts (from M5StickC)")
     logger.info("  POST /start_session - Start new session")
     logger.info("  POST /end_session - End current session")
     logger.info("  POST /set_alert - Set command pending alert")
     
-    # Start activity monitoring
+    # Start process watching and activity monitoring
+    def on_process_change(pattern, running):
+        if pattern == "claude":
+            tracker.snapshot.invalidate()
+            for session in tracker.sessions:
+                if session.snapshot is not None:
+                    session.snapshot.invalidate()
+    
+    process_watcher.add_listener(on_process_change)
+    process_watcher.start()
     activity_task = asyncio.create_task(activity_monitor())
     
     # Keep server running
@@ -232,6 +444,7 @@ async def main():
     except KeyboardInterrupt:
         logger.info("Shutting down server...")
         activity_task.cancel()
+        process_watcher.stop()
         await runner.cleanup()
 
 if __name__ == "__main__":